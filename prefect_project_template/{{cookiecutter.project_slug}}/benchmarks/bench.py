@@ -0,0 +1,445 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from stub import StubConfig, fetch_stats, stub_server
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Latencies of the successful units of work, and the number that failed
+Samples = tuple[list[float], int]
+
+
+@dataclass(kw_only=True)
+class Scenario:
+    description: str
+    unit: str  # What one latency sample measures
+    run: Callable[[str, argparse.Namespace], Awaitable[Samples]]
+    error_rate: float = 0.0  # Fault injection used unless set on the command line
+    rate_limit_rate: float = 0.0
+
+
+async def bench_make_request(
+    base_url: str, args: argparse.Namespace, **options: Any
+) -> Samples:
+    from core.models import Repository
+    from utils.requests import (
+        RequestError,
+        RetryPolicy,
+        make_request,
+        session_pool,
+        with_session,
+    )
+
+    retry_policy = RetryPolicy(wait_min=0, wait_max=0, logger=None)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def fetch(session, i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await make_request(
+                    session,
+                    "GET",
+                    f"{base_url}/repos/octo/repo-{i % 100}",
+                    retry_policy=retry_policy,
+                    response_type=Repository,
+                    **options,
+                )
+            except RequestError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    async with session_pool.lifespan(), with_session(pooled=True) as session:
+        await asyncio.gather(*(fetch(session, i) for i in range(args.requests)))
+    return latencies, errors
+
+
+async def bench_make_request_cached(base_url: str, args: argparse.Namespace) -> Samples:
+    from utils.requests import HTTPCache
+
+    return await bench_make_request(base_url, args, cache=HTTPCache())
+
+
+async def bench_paginate(base_url: str, args: argparse.Namespace) -> Samples:
+    from core.models import Contributor
+    from utils.requests import (
+        RequestError,
+        RetryPolicy,
+        paginate_requests,
+        session_pool,
+        with_session,
+    )
+
+    retry_policy = RetryPolicy(wait_min=0, wait_max=0, logger=None)
+    pages = max(1, -(-args.contributors // 100))
+    semaphore = asyncio.Semaphore(max(1, args.concurrency // 5))
+    latencies, errors = [], 0
+
+    async def crawl(session, i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async for _ in paginate_requests(
+                    session,
+                    "GET",
+                    f"{base_url}/repos/octo/repo-{i % 100}/contributors",
+                    retry_policy=retry_policy,
+                    params={"per_page": 100},
+                    response_type=list[Contributor],
+                ):
+                    pass
+            except RequestError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    crawls = max(1, args.requests // pages)
+    async with session_pool.lifespan(), with_session(pooled=True) as session:
+        await asyncio.gather(*(crawl(session, i) for i in range(crawls)))
+    return latencies, errors
+
+
+async def bench_flow(base_url: str, args: argparse.Namespace) -> Samples:
+    # Settings are read on import, `run_worker` pointed them at the stub already
+    from main import main
+
+    repos = [f"octo/repo-{i}" for i in range(args.repos)]
+    latencies, errors = [], 0
+    for _ in range(args.flow_runs):
+        start = time.perf_counter()
+        summaries = await main(repos=repos)
+        latencies.append(time.perf_counter() - start)
+        errors += sum(summary.error is not None for summary in summaries)
+    return latencies, errors
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "make_request": Scenario(
+        description="Concurrent single GETs decoded into a Struct",
+        unit="request",
+        run=bench_make_request,
+    ),
+    "make_request_cached": Scenario(
+        description="Concurrent GETs revalidated against an in-memory HTTPCache",
+        unit="request",
+        run=bench_make_request_cached,
+    ),
+    "make_request_faults": Scenario(
+        description="Concurrent GETs retried through injected 502s and 429s",
+        unit="request",
+        run=bench_make_request,
+        error_rate=0.05,
+        rate_limit_rate=0.05,
+    ),
+    "paginate": Scenario(
+        description="Concurrent paginate_requests crawls of the contributors",
+        unit="crawl",
+        run=bench_paginate,
+    ),
+    "flow": Scenario(
+        description="Runs of the main flow over `--repos` repositories",
+        unit="flow run",
+        run=bench_flow,
+    ),
+}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="bench",
+        description=(
+            "Benchmark the request layer and the main flow against a local "
+            "GitHub-like stub server. Each scenario runs in its own process."
+        ),
+    )
+    parser.add_argument(
+        "scenarios",
+        nargs="*",
+        help=f"Scenarios to run, all of them by default: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--contributors", type=int, default=1000)
+    parser.add_argument("--repos", type=int, default=10)
+    parser.add_argument("--flow-runs", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=None)
+    parser.add_argument("--rate-limit-rate", type=float, default=None)
+    parser.add_argument(
+        "--no-allocations",
+        action="store_true",
+        help="Skip the tracemalloc pass",
+    )
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument(
+        "--baseline", type=Path, help="JSON report to compare the results with"
+    )
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    return args
+
+
+def stub_config(scenario: Scenario, args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        repos=args.repos,
+        contributors=args.contributors,
+        payload_bytes=args.payload_bytes,
+        error_rate=scenario.error_rate if args.error_rate is None else args.error_rate,
+        rate_limit_rate=scenario.rate_limit_rate
+        if args.rate_limit_rate is None
+        else args.rate_limit_rate,
+    )
+
+
+def run_worker(name: str, args: argparse.Namespace) -> dict:
+    """Run one scenario in this process: a warm-up, a timed and a traced pass."""
+    scenario = SCENARIOS[name]
+    config = stub_config(scenario, args)
+    with stub_server(config) as base_url, tempfile.TemporaryDirectory() as cache_dir:
+        os.environ.update(
+            HTTP_GITHUB_API_URL=base_url,
+            HTTP_CACHE_DIR=cache_dir,
+            # Measure the client, not the client-side rate limiter
+            HTTP_RATE_LIMIT_PER_SECOND="1000000",
+            HTTP_RATE_LIMIT_BURST="1000000",
+            PREFECT_LOGGING_LEVEL="WARNING",
+        )
+        return asyncio.run(_measure(scenario, base_url, config, args))
+
+
+async def _measure(
+    scenario: Scenario, base_url: str, config: StubConfig, args: argparse.Namespace
+) -> dict:
+    await scenario.run(base_url, args)
+
+    before = await fetch_stats(base_url)
+    start = time.perf_counter()
+    latencies, errors = await scenario.run(base_url, args)
+    duration = time.perf_counter() - start
+    after = await fetch_stats(base_url)
+    peak_rss = _peak_rss_bytes()
+
+    allocations = None
+    if not args.no_allocations:
+        tracemalloc.start()
+        await scenario.run(base_url, args)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocations = {"peak_bytes": peak, "retained_bytes": retained}
+
+    requests = after["hits"] - before["hits"]
+    statuses = {
+        status: count - before["statuses"].get(status, 0)
+        for status, count in after["statuses"].items()
+    }
+    return {
+        "unit": scenario.unit,
+        "samples": len(latencies),
+        "errors": errors,
+        "requests": requests,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "duration_s": duration,
+        "requests_per_s": requests / duration if duration else 0.0,
+        "latency_ms": _latency_summary(latencies),
+        "allocations": allocations,
+        "peak_rss_bytes": peak_rss,
+        "stub": vars(config),
+    }
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> dict:
+    """Run a scenario in a fresh interpreter, so peak RSS is its own."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output = Path(tmp_dir) / "result.json"
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(
+                None,
+                [str(ROOT / "src"), str(ROOT / "benchmarks"), env.get("PYTHONPATH")],
+            )
+        )
+        worker_args = {k: v for k, v in vars(args).items() if k in _FORWARDED_ARGS}
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "bench",
+                "--worker",
+                name,
+                "--worker-output",
+                str(output),
+                *_to_argv(worker_args),
+            ],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise RuntimeError(f"Scenario {name} failed:\n{process.stderr}")
+        result = json.loads(output.read_text())
+    return {"scenario": name, "description": SCENARIOS[name].description, **result}
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.worker:
+        result = run_worker(args.worker, args)
+        args.worker_output.write_text(json.dumps(result))
+        return
+
+    results = []
+    for name in args.scenarios:
+        print(f"Running {name}...", file=sys.stderr)
+        results.append(run_scenario(name, args))
+
+    report = {"metadata": _metadata(args), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+
+    baseline = None
+    if args.baseline:
+        baseline = {
+            result["scenario"]: result
+            for result in json.loads(args.baseline.read_text())["results"]
+        }
+    _print_summary(results, baseline)
+
+
+_FORWARDED_ARGS = {
+    "requests",
+    "concurrency",
+    "contributors",
+    "repos",
+    "flow_runs",
+    "latency_ms",
+    "jitter_ms",
+    "payload_bytes",
+    "error_rate",
+    "rate_limit_rate",
+    "no_allocations",
+}
+
+
+def _to_argv(options: dict[str, Any]) -> list[str]:
+    argv = []
+    for key, value in options.items():
+        flag = "--" + key.replace("_", "-")
+        if value is True:
+            argv.append(flag)
+        elif value is not None and value is not False:
+            argv += [flag, str(value)]
+    return argv
+
+
+def _latency_summary(latencies: list[float]) -> dict[str, float] | None:
+    if not latencies:
+        return None
+    ms = [latency * 1000 for latency in latencies]
+    if len(ms) > 1:
+        percentiles = statistics.quantiles(ms, n=100, method="inclusive")
+        p50, p95, p99 = percentiles[49], percentiles[94], percentiles[98]
+    else:
+        p50 = p95 = p99 = ms[0]
+    return {
+        "mean": statistics.fmean(ms),
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "max": max(ms),
+    }
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _metadata(args: argparse.Namespace) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": {k: v for k, v in vars(args).items() if k in _FORWARDED_ARGS},
+    }
+
+
+def _print_summary(results: list[dict], baseline: dict[str, dict] | None) -> None:
+    header = f"{'scenario':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'RSS MB':>9}{'alloc MB':>10}"
+    print(header, file=sys.stderr)
+    for result in results:
+        latency = result["latency_ms"] or {"p50": 0, "p95": 0, "p99": 0}
+        allocations = result["allocations"] or {"peak_bytes": 0}
+        print(
+            f"{result['scenario']:<22}"
+            f"{result['requests_per_s']:>10.1f}"
+            f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}"
+            f"{result['errors']:>8}"
+            f"{result['peak_rss_bytes'] / 2**20:>9.1f}"
+            f"{allocations['peak_bytes'] / 2**20:>10.1f}",
+            file=sys.stderr,
+        )
+
+        previous = (baseline or {}).get(result["scenario"])
+        if previous is not None:
+            print(
+                f"{'  vs baseline':<22}"
+                f"{_change(previous['requests_per_s'], result['requests_per_s']):>10}"
+                + "".join(
+                    f"{_change((previous['latency_ms'] or {}).get(p), latency[p]):>10}"
+                    for p in ("p50", "p95", "p99")
+                ),
+                file=sys.stderr,
+            )
+
+
+def _change(before: float | None, after: float) -> str:
+    if not before:
+        return "-"
+    return f"{(after - before) / before:+.1%}"
+
+
+if __name__ == "__main__":
+    main()
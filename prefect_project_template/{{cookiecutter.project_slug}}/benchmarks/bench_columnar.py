@@ -0,0 +1,212 @@
+import argparse
+import heapq
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable
+
+from core.columnar import (
+    contribution_percentiles,
+    contribution_totals,
+    contributor_table,
+    top_contributors,
+)
+from core.models import Contributor
+
+PERCENTILES = (50, 90, 99)
+
+
+def contributor_dicts(rows: int, repos: int, seed: int) -> dict[str, list[dict]]:
+    """Contributors spread over `repos` repositories, with a long tail of small counts."""
+    rng = random.Random(seed)
+    by_repo: dict[str, list[dict]] = {f"org/repo-{i}": [] for i in range(repos)}
+    names = list(by_repo)
+    for i in range(rows):
+        contributor_id = rng.randrange(rows // 4 or 1)
+        by_repo[names[i % repos]].append(
+            {
+                "login": f"contributor-{contributor_id}",
+                "id": contributor_id,
+                "type": "User",
+                "contributions": int(rng.paretovariate(1.2)),
+            }
+        )
+    return by_repo
+
+
+def aggregate_dicts(by_repo: dict[str, list[dict]], top: int) -> dict[str, Any]:
+    """The stats computed item by item over lists of dicts."""
+    totals, percentiles, per_contributor = {}, {}, Counter()
+    for repo, contributors in by_repo.items():
+        counts = sorted(contributor["contributions"] for contributor in contributors)
+        totals[repo] = (len(counts), sum(counts), counts[-1] if counts else None)
+        percentiles[repo] = [_percentile(counts, q) for q in PERCENTILES]
+        for contributor in contributors:
+            per_contributor[contributor["id"]] += contributor["contributions"]
+    everything = sorted(
+        contributor["contributions"]
+        for contributors in by_repo.values()
+        for contributor in contributors
+    )
+    percentiles[None] = [_percentile(everything, q) for q in PERCENTILES]
+    leaders = heapq.nlargest(top, per_contributor.items(), key=lambda item: item[1])
+    return {"totals": totals, "percentiles": percentiles, "top": leaders}
+
+
+def aggregate_columnar(
+    by_repo: dict[str, list[Contributor]], top: int
+) -> dict[str, Any]:
+    """The same stats from an Arrow table, see `core.columnar`."""
+    table = contributor_table(by_repo)
+    return {
+        "totals": contribution_totals(table),
+        "percentiles": contribution_percentiles(table, PERCENTILES),
+        "top": top_contributors(table, top),
+    }
+
+
+def _percentile(ordered: list[int], q: float) -> float:
+    if not ordered:
+        return math.nan
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def check_same(dict_stats: dict[str, Any], columnar_stats: dict[str, Any]) -> None:
+    """Fail loudly if both implementations don't agree, timings would be meaningless."""
+    totals = {
+        row["repo"]: (
+            row["contributors"],
+            row["contributions"],
+            row["max_contributions"],
+        )
+        for row in columnar_stats["totals"].to_pylist()
+    }
+    if totals != {
+        repo: total for repo, total in dict_stats["totals"].items() if total[0]
+    }:
+        raise AssertionError("totals differ")
+    for row in columnar_stats["percentiles"].to_pylist():
+        expected = dict_stats["percentiles"][row["repo"]]
+        actual = [row[f"p{q}"] for q in PERCENTILES]
+        if not all(
+            math.isclose(a, e) or (math.isnan(a) and math.isnan(e))
+            for a, e in zip(actual, expected)
+        ):
+            raise AssertionError(f"percentiles of {row['repo']} differ")
+    expected_top = sorted(count for _, count in dict_stats["top"])
+    actual_top = sorted(columnar_stats["top"].column("contributions").to_pylist())
+    if expected_top != actual_top:
+        raise AssertionError("top contributors differ")
+
+
+def measure(function: Callable[[], Any], repeat: int) -> tuple[Any, float]:
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times) * 1000
+
+
+def traced_mib(function: Callable[[], Any]) -> tuple[Any, float]:
+    """Result of `function` and the Python heap it still holds, in MiB."""
+    tracemalloc.start()
+    try:
+        result = function()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current / 2**20
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bench_columnar",
+        description=(
+            "Compare per-repo totals, top contributors and contribution "
+            "percentiles computed over lists of dicts with the columnar "
+            "(Arrow/NumPy) stage in `core.columnar`."
+        ),
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repos", type=int, default=1000)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    by_repo_dicts, dicts_mib = traced_mib(
+        lambda: contributor_dicts(args.rows, args.repos, args.seed)
+    )
+    by_repo_structs = {
+        repo: [Contributor(**contributor) for contributor in contributors]
+        for repo, contributors in by_repo_dicts.items()
+    }
+    table = contributor_table(by_repo_structs)
+
+    dict_stats, dict_ms = measure(
+        lambda: aggregate_dicts(by_repo_dicts, args.top), args.repeat
+    )
+    _, convert_ms = measure(lambda: contributor_table(by_repo_structs), args.repeat)
+    columnar_stats, columnar_ms = measure(
+        lambda: aggregate_columnar(by_repo_structs, args.top), args.repeat
+    )
+    _, aggregate_ms = measure(
+        lambda: (
+            contribution_totals(table),
+            contribution_percentiles(table, PERCENTILES),
+            top_contributors(table, args.top),
+        ),
+        args.repeat,
+    )
+    check_same(dict_stats, columnar_stats)
+
+    results = {
+        "dicts": {"total_ms": dict_ms, "memory_mib": dicts_mib},
+        "columnar": {
+            "total_ms": columnar_ms,
+            "convert_ms": convert_ms,
+            "aggregate_ms": aggregate_ms,
+            "memory_mib": table.nbytes / 2**20,
+        },
+    }
+    options = {
+        "rows": args.rows,
+        "repos": args.repos,
+        "top": args.top,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    report = json.dumps({"options": options, "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+    print(
+        f"{'implementation':<16}{'total ms':>10}{'convert ms':>12}"
+        f"{'aggregate ms':>14}{'MiB':>8}",
+        file=sys.stderr,
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<16}{result['total_ms']:>10.0f}"
+            f"{result.get('convert_ms', math.nan):>12.0f}"
+            f"{result.get('aggregate_ms', result['total_ms']):>14.0f}"
+            f"{result['memory_mib']:>8.1f}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time allowed per module, in milliseconds. `main` is mostly
+# Prefect, which the flow can't run without, and takes about 3s on a laptop
+DEFAULT_BUDGETS_MS = {
+    "settings": 400.0,
+    "utils.requests": 600.0,
+    "main": 5000.0,
+}
+
+# Modules that must not be imported by importing the key, they are only loaded
+# once a request is made or a feature is used. Prefect's own imports, like
+# `prefect.concurrency` from `from prefect import task`, can't be deferred.
+DEFERRED_IMPORTS = {
+    "settings": ["prefect", "aiohttp", "tenacity"],
+    "utils.requests": ["prefect", "aiohttp", "tenacity"],
+    "main": [
+        "aiohttp",
+        "tenacity",
+        "prefect.artifacts",
+        "numpy",
+        "pyarrow",
+    ],
+}
+
+
+def measure_import(module: str) -> dict[str, tuple[int, int]]:
+    """Import `module` in a fresh interpreter, returning (self, cumulative) µs per module imported."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")])
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr}")
+
+    timings = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def check_module(module: str, repeat: int, budget_ms: float | None, top: int) -> dict:
+    cumulative_ms, self_ms = [], defaultdict(list)
+    for _ in range(repeat):
+        timings = measure_import(module)
+        cumulative_ms.append(timings[module][1] / 1000)
+        for name, (self_us, _) in timings.items():
+            self_ms[name].append(self_us / 1000)
+
+    median_ms = statistics.median(cumulative_ms)
+    # Any run importing a deferred module is a regression, unlike timings
+    imported = [
+        name
+        for name in DEFERRED_IMPORTS.get(module, [])
+        if name in self_ms or any(other.startswith(f"{name}.") for other in self_ms)
+    ]
+    slowest = sorted(
+        ((name, statistics.median(times)) for name, times in self_ms.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+
+    failures = []
+    if budget_ms is not None and median_ms > budget_ms:
+        failures.append(f"took {median_ms:.0f}ms, over its {budget_ms:.0f}ms budget")
+    if imported:
+        failures.append(f"imports {', '.join(imported)} eagerly")
+    return {
+        "module": module,
+        "median_ms": median_ms,
+        "min_ms": min(cumulative_ms),
+        "max_ms": max(cumulative_ms),
+        "budget_ms": budget_ms,
+        "deferred_imports_loaded": imported,
+        "slowest_self_ms": dict(slowest),
+        "failures": failures,
+    }
+
+
+def parse_budget(value: str) -> tuple[str, float]:
+    module, sep, budget = value.partition("=")
+    try:
+        if not sep:
+            raise ValueError
+        return module, float(budget)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected MODULE=MS, got {value!r}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bench_importtime",
+        description=(
+            "Measure the cold-start import time of the project's modules with "
+            "`python -X importtime`, each in a fresh interpreter. Exits with an "
+            "error when a module goes over its budget or eagerly imports a "
+            "dependency that should be deferred."
+        ),
+    )
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=list(DEFAULT_BUDGETS_MS),
+        help=f"Modules to import, default: {', '.join(DEFAULT_BUDGETS_MS)}",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=parse_budget,
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="Override the budget of a module, can be repeated",
+    )
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    budgets = DEFAULT_BUDGETS_MS | dict(args.budget)
+    results = [
+        check_module(module, args.repeat, budgets.get(module), args.top)
+        for module in args.modules
+    ]
+
+    report = json.dumps({"repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+    print(f"{'module':<20}{'median ms':>10}{'budget ms':>10}  status", file=sys.stderr)
+    for result in results:
+        budget = result["budget_ms"]
+        print(
+            f"{result['module']:<20}{result['median_ms']:>10.0f}"
+            f"{'-' if budget is None else f'{budget:.0f}':>10}  "
+            f"{'; '.join(result['failures']) or 'ok'}",
+            file=sys.stderr,
+        )
+        for name, self_ms in result["slowest_self_ms"].items():
+            print(f"  {name:<50}{self_ms:>8.1f}ms self", file=sys.stderr)
+
+    if any(result["failures"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
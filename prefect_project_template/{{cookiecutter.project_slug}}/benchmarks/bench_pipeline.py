@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import msgspec
+
+from core.models import Contributor
+from core.pipeline import Pipeline, Stage
+
+_decoder = msgspec.json.Decoder(list[Contributor])
+
+
+class Workload:
+    """
+    Repositories whose contributors are fetched (`latency` seconds each, like a
+    GitHub response), decoded from JSON, reduced to a few stats and written out.
+    """
+
+    def __init__(self, repos: int, contributors: int, latency: float, seed: int):
+        rng = random.Random(seed)
+        self.repos = repos
+        self.latency = latency
+        # Every repository gets its own copy when fetched, like a real response
+        self.payload = msgspec.json.encode(
+            [
+                Contributor(
+                    contributions=int(rng.paretovariate(1.2)),
+                    id=i,
+                    login=f"contributor-{i}",
+                )
+                for i in range(contributors)
+            ]
+        )
+
+    async def fetch(self, repo: int) -> tuple[int, bytes]:
+        await asyncio.sleep(self.latency)
+        return repo, bytes(self.payload)
+
+    @staticmethod
+    def decode(page: tuple[int, bytes]) -> tuple[int, list[Contributor]]:
+        repo, body = page
+        return repo, _decoder.decode(body)
+
+    @staticmethod
+    def transform(repo_contributors: tuple[int, list[Contributor]]) -> dict:
+        repo, contributors = repo_contributors
+        counts = sorted(contributor.contributions for contributor in contributors)
+        return {
+            "repo": repo,
+            "contributors": len(counts),
+            "contributions": sum(counts),
+            "median": counts[len(counts) // 2] if counts else None,
+        }
+
+    @staticmethod
+    def sink(file: Any) -> Callable[[dict], None]:
+        def write(summary: dict) -> None:
+            file.write(msgspec.json.encode(summary) + b"\n")
+
+        return write
+
+
+async def run_batch(workload: Workload, file: Any, concurrency: int) -> None:
+    """Fetch everything, then decode everything, then transform and write."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(repo: int) -> tuple[int, bytes]:
+        async with slots:
+            return await workload.fetch(repo)
+
+    pages = await asyncio.gather(*(fetch(repo) for repo in range(workload.repos)))
+    decoded = [workload.decode(page) for page in pages]
+    write = workload.sink(file)
+    for summary in map(workload.transform, decoded):
+        write(summary)
+
+
+async def run_pipeline(workload: Workload, file: Any, concurrency: int) -> None:
+    """The same stages overlapping in a `core.pipeline.Pipeline`."""
+    await Pipeline(
+        range(workload.repos),
+        [
+            Stage("fetch", workload.fetch, concurrency=concurrency),
+            Stage("decode", workload.decode, concurrency=2, threaded=True),
+            Stage("transform", workload.transform),
+            Stage("sink", workload.sink(file), threaded=True),
+        ],
+    ).run()
+
+
+def measure(
+    run: Callable[[Workload, Any, int], Awaitable[None]],
+    workload: Workload,
+    concurrency: int,
+    repeat: int,
+) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryFile() as file:
+            start = time.perf_counter()
+            asyncio.run(run(workload, file, concurrency))
+            times.append(time.perf_counter() - start)
+
+    # Separately, tracing allocations slows everything down
+    with tempfile.TemporaryFile() as file:
+        tracemalloc.start()
+        try:
+            asyncio.run(run(workload, file, concurrency))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"total_ms": statistics.median(times) * 1000, "peak_mib": peak / 2**20}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bench_pipeline",
+        description=(
+            "Compare fetching every repository before processing any with "
+            "streaming them through the bounded fetch → decode → transform → "
+            "sink stages of `core.pipeline`."
+        ),
+    )
+    parser.add_argument("--repos", type=int, default=500)
+    parser.add_argument("--contributors", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    workload = Workload(
+        args.repos, args.contributors, args.latency_ms / 1000, args.seed
+    )
+    results = {
+        "batch": measure(run_batch, workload, args.concurrency, args.repeat),
+        "pipeline": measure(run_pipeline, workload, args.concurrency, args.repeat),
+    }
+    options = {
+        "repos": args.repos,
+        "contributors": args.contributors,
+        "latency_ms": args.latency_ms,
+        "concurrency": args.concurrency,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    report = json.dumps({"options": options, "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+    print(f"{'implementation':<16}{'total ms':>10}{'peak MiB':>10}", file=sys.stderr)
+    for name, result in results.items():
+        print(
+            f"{name:<16}{result['total_ms']:>10.0f}{result['peak_mib']:>10.1f}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from prefect.serializers import JSONSerializer, PickleSerializer, Serializer
+
+from core.models import Contributor
+from utils.results import MsgpackSerializer
+
+
+def contributor_structs(n: int) -> list[Contributor]:
+    return [
+        Contributor(contributions=n - i, id=1_000_000 + i, login=f"contributor-{i}")
+        for i in range(n)
+    ]
+
+
+def contributor_dicts(n: int) -> list[dict[str, Any]]:
+    """Contributors as the GitHub API returns them."""
+    items = []
+    for i in range(n):
+        login = f"contributor-{i}"
+        api_url = f"https://api.github.com/users/{login}"
+        items.append(
+            {
+                "login": login,
+                "id": 1_000_000 + i,
+                "node_id": f"MDQ6VXNlcj{i:08d}",
+                "avatar_url": f"https://avatars.githubusercontent.com/u/{1_000_000 + i}?v=4",
+                "gravatar_id": "",
+                "url": api_url,
+                "html_url": f"https://github.com/{login}",
+                "followers_url": f"{api_url}/followers",
+                "following_url": api_url + "/following{/other_user}",
+                "gists_url": api_url + "/gists{/gist_id}",
+                "starred_url": api_url + "/starred{/owner}{/repo}",
+                "subscriptions_url": f"{api_url}/subscriptions",
+                "organizations_url": f"{api_url}/orgs",
+                "repos_url": f"{api_url}/repos",
+                "events_url": api_url + "/events{/privacy}",
+                "received_events_url": f"{api_url}/received_events",
+                "type": "User",
+                "user_view_type": "public",
+                "site_admin": False,
+                "contributions": n - i,
+            }
+        )
+    return items
+
+
+PAYLOADS: dict[str, Callable[[int], Any]] = {
+    "contributor_structs": contributor_structs,
+    "contributor_dicts": contributor_dicts,
+}
+
+
+def serializers() -> dict[str, Serializer]:
+    candidates = {
+        "pickle (default)": PickleSerializer,
+        "json": JSONSerializer,
+        "msgpack": MsgpackSerializer,
+        "msgpack+zstd": lambda: MsgpackSerializer(compression="zstd"),
+    }
+    available = {}
+    for name, make in candidates.items():
+        try:
+            available[name] = make()
+        except ImportError as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+    return available
+
+
+def measure(serializer: Serializer, payload: Any, repeat: int) -> dict | None:
+    try:
+        blob = serializer.dumps(payload)
+        if serializer.loads(blob) != payload:
+            return None  # Doesn't round-trip this payload
+    except Exception:
+        return None
+
+    encode, decode = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        blob = serializer.dumps(payload)
+        encode.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        serializer.loads(blob)
+        decode.append(time.perf_counter() - start)
+    return {
+        "encode_ms": statistics.median(encode) * 1000,
+        "decode_ms": statistics.median(decode) * 1000,
+        "bytes": len(blob),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="bench_serializers",
+        description=(
+            "Compare Prefect result serializers on contributor payloads: median "
+            "encode/decode time and stored bytes."
+        ),
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    results = []
+    for payload_name, make_payload in PAYLOADS.items():
+        for size in args.sizes:
+            payload = make_payload(size)
+            for name, serializer in serializers().items():
+                result = measure(serializer, payload, args.repeat)
+                results.append(
+                    {
+                        "payload": payload_name,
+                        "items": size,
+                        "serializer": name,
+                        **(result or {"unsupported": True}),
+                    }
+                )
+
+    options = {"sizes": args.sizes, "repeat": args.repeat}
+    report = json.dumps({"options": options, "results": results}, indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+    print(
+        f"{'payload':<22}{'items':>7}  {'serializer':<18}{'encode ms':>10}{'decode ms':>10}{'KiB':>10}",
+        file=sys.stderr,
+    )
+    for result in results:
+        if result.get("unsupported"):
+            continue
+        print(
+            f"{result['payload']:<22}{result['items']:>7}  {result['serializer']:<18}"
+            f"{result['encode_ms']:>10.2f}{result['decode_ms']:>10.2f}"
+            f"{result['bytes'] / 1024:>10.1f}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import multiprocessing
+import random
+import socket
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Generator
+
+import msgspec
+from aiohttp import ClientSession, web
+
+__all__ = ["StubConfig", "make_app", "run_stub", "stub_server", "fetch_stats"]
+
+
+@dataclass(kw_only=True)
+class StubConfig:
+    """Behaviour of the GitHub-like stub server."""
+
+    latency: float = 0.0  # Seconds added to every response
+    jitter: float = 0.0  # Uniform extra latency, up to this many seconds
+    repos: int = 10  # Repositories listed per organization
+    contributors: int = 500  # Contributors per repository
+    per_page: int = 30  # Page size when `per_page` isn't sent, as on GitHub
+    max_per_page: int = 100
+    payload_bytes: int = 0  # Padding added to every returned item
+    error_rate: float = 0.0  # Fraction of requests answered with a 502
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with a 429
+    retry_after: float = 0.0  # `Retry-After` sent along with the 429s
+    etag: bool = True  # Send ETags and answer matching requests with a 304
+    seed: int = 0
+
+
+def make_app(config: StubConfig) -> web.Application:
+    """
+    Serve `/repos/{owner}/{repo}`, its `/contributors` and `/orgs/{org}/repos`
+    the way GitHub does (Link pagination, ETags, rate-limit headers), plus
+    `/_stats` with the number of responses sent per status code.
+    """
+    rng = random.Random(config.seed)
+    statuses: Counter[int] = Counter()
+    encoder = msgspec.json.Encoder()
+    padding = "x" * config.payload_bytes
+
+    @web.middleware
+    async def behaviour(request: web.Request, handler) -> web.StreamResponse:
+        if request.path == "/_stats":
+            return await handler(request)
+
+        delay = config.latency + rng.uniform(0, config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = rng.random()
+        if roll < config.error_rate:
+            response = web.Response(status=502, text="Bad Gateway")
+        elif roll < config.error_rate + config.rate_limit_rate:
+            response = web.json_response(
+                {"message": "API rate limit exceeded"},
+                status=429,
+                headers={"Retry-After": f"{config.retry_after:g}"},
+            )
+        else:
+            response = await handler(request)
+        statuses[response.status] += 1
+        return response
+
+    def json_response(request: web.Request, payload, **headers: str) -> web.Response:
+        body = encoder.encode(payload)
+        headers["X-RateLimit-Limit"] = "5000"
+        headers["X-RateLimit-Remaining"] = "4999"
+        headers["X-RateLimit-Reset"] = str(int(time.time()) + 3600)
+        if config.etag:
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            headers["ETag"] = etag
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def paginated(request: web.Request, total: int, make_item) -> web.Response:
+        per_page = min(
+            int(request.query.get("per_page", config.per_page)), config.max_per_page
+        )
+        page = int(request.query.get("page", 1))
+        last = max(1, -(-total // per_page))
+        start = (page - 1) * per_page
+        items = [make_item(i) for i in range(start, min(start + per_page, total))]
+
+        links = []
+        url = request.url.with_query({"per_page": per_page})
+        if page < last:
+            links.append(f'<{url.update_query(page=page + 1)}>; rel="next"')
+            links.append(f'<{url.update_query(page=last)}>; rel="last"')
+        if page > 1:
+            links.append(f'<{url.update_query(page=page - 1)}>; rel="prev"')
+            links.append(f'<{url.update_query(page=1)}>; rel="first"')
+        headers = {"Link": ", ".join(links)} if links else {}
+        return json_response(request, items, **headers)
+
+    def repository(owner: str, name: str, base_url: str) -> dict:
+        return {
+            "full_name": f"{owner}/{name}",
+            "stargazers_count": len(name) * 1000,
+            "contributors_url": f"{base_url}/repos/{owner}/{name}/contributors",
+            "description": padding,
+        }
+
+    async def get_repo(request: web.Request) -> web.Response:
+        base_url = str(request.url.origin())
+        owner, name = request.match_info["owner"], request.match_info["repo"]
+        return json_response(request, repository(owner, name, base_url))
+
+    async def get_contributors(request: web.Request) -> web.Response:
+        return paginated(
+            request,
+            config.contributors,
+            lambda i: {
+                "login": f"user-{i}",
+                "id": i,
+                "type": "User",
+                "contributions": config.contributors - i,
+                "avatar_url": padding,
+            },
+        )
+
+    async def get_org_repos(request: web.Request) -> web.Response:
+        base_url = str(request.url.origin())
+        org = request.match_info["org"]
+        return paginated(
+            request, config.repos, lambda i: repository(org, f"repo-{i}", base_url)
+        )
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(
+            {"hits": sum(statuses.values()), "statuses": dict(statuses)}
+        )
+
+    app = web.Application(middlewares=[behaviour])
+    app.router.add_get("/repos/{owner}/{repo}", get_repo)
+    app.router.add_get("/repos/{owner}/{repo}/contributors", get_contributors)
+    app.router.add_get("/orgs/{org}/repos", get_org_repos)
+    app.router.add_get("/_stats", get_stats)
+    return app
+
+
+def run_stub(config: StubConfig, port: int, host: str = "127.0.0.1") -> None:
+    """Serve the stub until the process is terminated."""
+    web.run_app(make_app(config), host=host, port=port, print=None)
+
+
+@contextmanager
+def stub_server(config: StubConfig) -> Generator[str, None, None]:
+    """
+    Run the stub in a separate process, so its CPU time doesn't skew the client's
+    numbers, and yield its base URL.
+    """
+    port = _free_port()
+    process = multiprocessing.get_context("spawn").Process(
+        target=run_stub, args=(config, port), daemon=True
+    )
+    process.start()
+    try:
+        _wait_for_port(port, process)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.join()
+
+
+async def fetch_stats(base_url: str) -> dict:
+    """Number of responses the stub sent so far, in total and per status code."""
+    async with ClientSession() as session:
+        async with session.get(f"{base_url}/_stats") as response:
+            stats = await response.json()
+    stats["statuses"] = {int(k): v for k, v in stats["statuses"].items()}
+    return stats
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(
+    port: int, process: multiprocessing.Process, timeout: float = 30
+) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise RuntimeError("Stub server exited during startup")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Stub server didn't start listening on port {port}")
@@ -1,14 +1,133 @@
+import hashlib
+import json
 import logging
+import sys
+from pathlib import Path
+from typing import Any, Iterator
 
 from settings import config
 from prefect.runner.storage import GitRepository
 from prefect_github import GitHubCredentials
 from prefect import flow
+from prefect.docker import DockerImage
+from prefect.client.orchestration import get_client
+from prefect.exceptions import ObjectNotFound
 
 logger = logging.getLogger(config.app.SLUG)
 
+ROOT = Path(__file__).resolve().parent.parent
+ENTRYPOINT = "src/main.py:main"
+# Everything the image is built from, besides a custom Dockerfile and the flow parameters
+FINGERPRINTED_PATHS = ("src", "pyproject.toml", "poetry.lock")
+FINGERPRINT_TAG_PREFIX = "fingerprint:"
+
+
+def source_fingerprint(
+    parameters: dict[str, Any],
+    root: Path = ROOT,
+    paths: tuple[str, ...] = FINGERPRINTED_PATHS,
+) -> str:
+    """
+    Hash the flow's source tree, the lockfile and the flow parameters.
+    :param parameters: The parameters the flow is deployed with.
+    :param root: Directory `paths` are relative to.
+    :param paths: Files and directories whose contents go into the hash.
+    :return: A short hex digest, changing whenever any input does.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(_fingerprinted_files(root, paths)):
+        digest.update(path.relative_to(root).as_posix().encode() + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    digest.update(json.dumps(parameters, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def _fingerprinted_files(root: Path, paths: tuple[str, ...]) -> Iterator[Path]:
+    for name in paths:
+        path = root / name
+        if path.is_file():
+            yield path
+        elif path.is_dir():
+            for file in path.rglob("*"):
+                if file.is_file() and "__pycache__" not in file.parts:
+                    yield file
+
+
+def deployed_image(client, deployment_name: str) -> tuple[str | None, str | None]:
+    """
+    Read the fingerprint and image of an existing deployment.
+    :param client: A synchronous Prefect client.
+    :param deployment_name: The deployment, as 'flow name/deployment name'.
+    :return: The fingerprint recorded in its tags and the image it runs, each
+        None for a new deployment or one deployed without them.
+    """
+    try:
+        deployment = client.read_deployment_by_name(deployment_name)
+    except ObjectNotFound:
+        return None, None
+    fingerprint = next(
+        (
+            tag.removeprefix(FINGERPRINT_TAG_PREFIX)
+            for tag in deployment.tags or []
+            if tag.startswith(FINGERPRINT_TAG_PREFIX)
+        ),
+        None,
+    )
+    return fingerprint, (deployment.job_variables or {}).get("image")
+
+
+def deploy_flow(
+    flow,
+    client,
+    *,
+    image_name: str,
+    force: bool = False,
+    dockerfile: str = "auto",
+    **deployment,
+):
+    """
+    Deploy `flow`, only building and pushing its image when the source changed.
+
+    The image is tagged with the fingerprint of what it is built from (see
+    `source_fingerprint`), which is also stored in the deployment's tags. When
+    the last deployment ran the same image, it is reused as is and only the
+    deployment metadata is updated, so changing the schedule, tags or work pool
+    doesn't rebuild.
+    :param flow: The flow to deploy.
+    :param client: A synchronous Prefect client, to read the last deployment.
+    :param image_name: Repository of the image, e.g. 'user/project'.
+    :param force: Build and push even if nothing changed.
+    :param dockerfile: Dockerfile the image is built from, "auto" lets Prefect generate one.
+    :param deployment: Arguments for `flow.deploy`, `image`/`build`/`push` are decided here.
+    :return: The id of the deployment.
+    """
+    paths = (
+        FINGERPRINTED_PATHS
+        if dockerfile == "auto"
+        else (*FINGERPRINTED_PATHS, dockerfile)
+    )
+    fingerprint = source_fingerprint(deployment.get("parameters") or {}, paths=paths)
+    image = DockerImage(name=image_name, tag=fingerprint, dockerfile=dockerfile)
+    previous, previous_image = deployed_image(
+        client, f"{flow.name}/{deployment['name']}"
+    )
+
+    # A renamed image repository doesn't have the tag yet
+    changed = force or previous != fingerprint or previous_image != image.reference
+    if changed:
+        logger.info("Source fingerprint %s (was %s), building", fingerprint, previous)
+    else:
+        logger.info("Source unchanged (%s), reusing its image", fingerprint)
+
+    tags = [*(deployment.pop("tags", None) or []), FINGERPRINT_TAG_PREFIX + fingerprint]
+    return flow.deploy(
+        **deployment, image=image, tags=tags, build=changed, push=changed
+    )
+
+
 if __name__ == "__main__":
     logger.info("Starting deployment script")
+    force = "--force" in sys.argv[1:]
 
     # Set up Git repository source
     logger.info("Configuring Git repository source")
@@ -27,7 +146,7 @@ if __name__ == "__main__":
     try:
         flow = flow.from_source(
             source=source,
-            entrypoint="src/main.py:main",
+            entrypoint=ENTRYPOINT,
         )
         logger.info("Flow loaded successfully from source")
     except Exception as e:
@@ -37,16 +156,22 @@ if __name__ == "__main__":
     # Deploy the flow
     logger.info("Starting deployment of flow")
     try:
-        flow.deploy(
-            name=config.app.ENVIRONMENT,
-            build=True,  # Build a new image for the flow
-            push=True,  # Push the built image to a registry
-            work_pool_name=config.prefect.WORK_POOL,
-            cron=config.prefect.CRON_SCHEDULE,
-            tags=["app:%s" % config.app.SLUG, "env:%s" % config.app.ENVIRONMENT],
-            job_variables={"env": {"APP_ENVIRONMENT": "%s" % config.app.ENVIRONMENT}},
-            parameters={},
-        )
+        with get_client(sync_client=True) as client:
+            deploy_flow(
+                flow,
+                client,
+                image_name=config.docker.IMAGE_NAME
+                or "%s/%s" % (config.docker.USERNAME, config.app.SLUG),
+                force=force,
+                name=config.app.ENVIRONMENT,
+                work_pool_name=config.prefect.WORK_POOL,
+                cron=config.prefect.CRON_SCHEDULE,
+                tags=["app:%s" % config.app.SLUG, "env:%s" % config.app.ENVIRONMENT],
+                job_variables={
+                    "env": {"APP_ENVIRONMENT": "%s" % config.app.ENVIRONMENT}
+                },
+                parameters={},
+            )
         logger.info("Deployment successful for environment: %s", config.app.ENVIRONMENT)
     except Exception as e:
         logger.error("Deployment failed: %s", e)
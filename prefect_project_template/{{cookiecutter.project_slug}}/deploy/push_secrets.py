@@ -1,15 +1,32 @@
-from secrets_manager import execute_all_modules, search_modules, execute_function
+from secrets_manager import (
+    execute_all_modules,
+    execute_function,
+    format_summary,
+    search_modules,
+    summarize,
+)
 import sys
 
 
-if __name__ == "__main__":
-    secret = sys.argv[1] if len(sys.argv) > 1 else None
+def main(argv: list[str]) -> int:
+    """
+    Push one secret, or all of them, and print what happened.
+    :param argv: The upsert function to run, all of them when empty.
+    :return: The exit code, 1 if any secret failed.
+    """
+    secret = argv[0] if argv else None
     if secret:
         modules = search_modules(secret)
         if not modules:
             print("No modules found for function %s" % secret)
-            sys.exit()
-        for module in modules:
-            execute_function(module, secret)
+            return 0
+        summary = summarize(execute_function(module, secret) for module in modules)
     else:
-        execute_all_modules()
+        summary = execute_all_modules()
+
+    print(format_summary(summary))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,78 +1,95 @@
+import ast
+import hashlib
 import importlib
+import json
 import logging
 import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from settings import config
 
-from typing import List
+from typing import Any, List
 
 logger = logging.getLogger(config.app.SLUG)
 
+FOLDER = Path(__file__).parent
+# Where the upsert functions found in each module are cached between runs
+INDEX_PATH = Path(".cache") / "secrets_manager_index.json"
+_INDEX_VERSION = 1
 
-def execute_all_modules() -> None:
+_index: dict[str, list[str]] | None = None
+
+
+def execute_all_modules(max_workers: int = config.git.SECRETS_MAX_WORKERS) -> Counter:
     """
-    Execute all functions in all modules in the folder.
+    Execute all functions in all modules in the folder, concurrently.
+    :param max_workers: How many functions run at the same time.
+    :return: How many functions had each outcome, e.g. "created" or "skipped".
     """
     logger.info("Executing all functions in all modules...")
-    m = list_modules()
-    for module in m:
-        execute_all_functions_in_module(module)
+    calls = [
+        (module, function)
+        for module in list_modules()
+        for function in list_functions_in_module(module)
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        outcomes = executor.map(lambda call: execute_function(*call), calls)
+        return summarize(outcomes)
 
 
-def list_modules() -> List[str]:
+def list_modules(folder: Path = FOLDER) -> List[str]:
     """
     List all Python modules in the folder, excluding __init__.py.
+    :param folder: The folder to list, this package's by default.
     """
     return [
         module[:-3]
-        for module in os.listdir(os.path.dirname(__file__))
+        for module in os.listdir(folder)
         if module.endswith(".py") and module not in {"__init__.py"}
     ]
 
 
-def execute_all_functions_in_module(module_name: str) -> None:
+def execute_all_functions_in_module(module_name: str) -> Counter:
     """
     Execute all non-private functions in a specific module.
     :param module_name: The name of the module.
+    :return: How many functions had each outcome.
     """
     functions = list_functions_in_module(module_name)
     if not functions:
         logger.info("No public functions found in %s.py." % module_name)
-        return
+        return Counter()
 
     logger.info("Executing all public functions in %s.py..." % module_name)
-    for function in functions:
-        execute_function(module_name, function)
+    return summarize(execute_function(module_name, function) for function in functions)
 
 
 def list_functions_in_module(module_name: str) -> List[str]:
     """
-    List all functions in a given module, excluding private functions (those starting with '_').
+    List all upsert functions in a given module, without importing it.
     :param module_name: The name of the module to retrieve functions from.
     :return: A list of function names in the module.
     """
-    try:
-        module = importlib.import_module("secrets_manager." + module_name)
-        return [
-            func
-            for func in dir(module)
-            if callable(getattr(module, func)) and func.startswith("upsert")
-        ]
-    except ModuleNotFoundError:
+    functions = discovery_index().get(module_name)
+    if functions is None:
         logger.error("Error: module '%s.py' not found." % module_name)
         return []
+    return functions
 
 
-def execute_function(module_name: str, function_name: str) -> None:
+def execute_function(module_name: str, function_name: str) -> Any:
     """
     Execute a specific function from a specific module.
     :param module_name: The name of the module.
     :param function_name: The name of the function to execute.
+    :return: What the function returned, or "failed" if it couldn't run.
     """
     try:
         module = importlib.import_module("secrets_manager." + module_name)
         if hasattr(module, function_name):
             logger.info("Executing %s from %s.py..." % (function_name, module_name))
-            getattr(module, function_name)()
+            return getattr(module, function_name)()
         else:
             logger.error(
                 "Error: Function '%s' not found in %s.py."
@@ -80,6 +97,32 @@ def execute_function(module_name: str, function_name: str) -> None:
             )
     except ModuleNotFoundError:
         logger.error("Failed to import module '%s.py'." % module_name)
+    except Exception as e:
+        # Keep going with the other secrets, the summary reports the failure
+        logger.exception("%s from %s.py failed: %s" % (function_name, module_name, e))
+    return "failed"
+
+
+def summarize(outcomes) -> Counter:
+    """
+    Count the outcomes of upsert functions.
+    :param outcomes: Values returned by `execute_function`.
+    :return: How many functions had each outcome.
+    """
+    return Counter(outcome or "done" for outcome in outcomes)
+
+
+def format_summary(summary: Counter) -> str:
+    counts = ", ".join(
+        "%d %s" % (summary[outcome], outcome)
+        for outcome in ("created", "updated", "skipped", "failed")
+    )
+    others = ", ".join(
+        "%d %s" % (count, outcome)
+        for outcome, count in summary.items()
+        if outcome not in {"created", "updated", "skipped", "failed"}
+    )
+    return "Secrets: " + ", ".join(filter(None, [counts, others]))
 
 
 def search_modules(function_name: str) -> str:
@@ -91,3 +134,72 @@ def search_modules(function_name: str) -> str:
         if function_name in functions:
             modules_with_target.append(module)
     return modules_with_target
+
+
+def discovery_index(path: Path = INDEX_PATH) -> dict[str, list[str]]:
+    """
+    Map every module in the folder to the upsert functions it defines.
+
+    Modules are scanned with `ast` instead of being imported, since importing
+    them evaluates default arguments that read settings and secrets. Results
+    are cached in `path` and a module is only scanned again once its contents
+    change: a matching mtime and size is trusted, otherwise its hash decides.
+    :param path: The file the index is cached in.
+    :return: The sorted upsert function names of each module.
+    """
+    global _index
+    if _index is None:
+        _index = _load_index(path, FOLDER)
+    return _index
+
+
+def _load_index(path: Path, folder: Path) -> dict[str, list[str]]:
+    """The index of the modules in `folder`, updating its cache in `path`."""
+    try:
+        cached = json.loads(path.read_text())
+        if cached.get("version") != _INDEX_VERSION:
+            cached = {}
+    except (OSError, ValueError):
+        cached = {}
+    cached_modules = cached.get("modules", {})
+
+    modules, changed = {}, False
+    for module_name in list_modules(folder):
+        source_path = folder / f"{module_name}.py"
+        stat = source_path.stat()
+        entry = cached_modules.get(module_name)
+        if entry is None or (entry["mtime_ns"], entry["size"]) != (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            source = source_path.read_bytes()
+            digest = hashlib.sha256(source).hexdigest()
+            if entry is None or entry["sha256"] != digest:
+                entry = {"sha256": digest, "functions": _scan_functions(source)}
+            entry = {**entry, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            changed = True
+        modules[module_name] = entry
+    changed = changed or modules.keys() != cached_modules.keys()
+
+    if changed:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps({"version": _INDEX_VERSION, "modules": modules}, indent=2)
+            )
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning("Could not cache the secrets manager index: %s" % e)
+
+    return {name: entry["functions"] for name, entry in modules.items()}
+
+
+def _scan_functions(source: bytes) -> List[str]:
+    """Names of the top-level upsert functions defined in a module's source."""
+    return sorted(
+        node.name
+        for node in ast.parse(source).body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        and node.name.startswith("upsert")
+    )
@@ -12,3 +12,4 @@ def upsert_github_access_key(
     :param access_token : The GitHub access token to store in the credentials block.
     """
     GitHubCredentials(token=access_token).save(name=block_name, overwrite=True)
+    return "updated"  # Saved with overwrite, whether it existed or not
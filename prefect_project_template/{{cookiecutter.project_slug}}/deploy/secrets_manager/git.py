@@ -1,7 +1,14 @@
+import hashlib
+import hmac
+import json
 import logging
+import re
+import threading
+from pathlib import Path
+
 from settings import config
 
-from github import Github
+from github import Auth, Github
 from github import GithubException
 
 logger = logging.getLogger(config.app.SLUG)
@@ -11,76 +18,184 @@ def upsert_git_access_token(
     secret_name: str = "GIT_ACCESS_TOKEN",
     secret_value: str = config.git.ACCESS_TOKEN.get_secret_value(),
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_git_repository_link(
     secret_name: str = "GIT_REPOSITORY_LINK",
     secret_value: str = config.git.REPOSITORY_LINK,
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_prefect_api_url(
     secret_name: str = "PREFECT_API_URL",
     secret_value: str = config.prefect.API_URL,
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_prefect_api_key(
     secret_name: str = "PREFECT_API_KEY",
     secret_value: str = config.prefect.API_KEY,
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_prefect_work_pool(
     secret_name: str = "PREFECT_WORK_POOL",
     secret_value: str = config.prefect.WORK_POOL,
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_prefect_block_with_github_credentials(
     secret_name: str = "PREFECT_BLOCK_GITHUB_CREDENTIALS",
     secret_value: str = config.blocks.GITHUB_CREDENTIALS,
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_docker_username(
     secret_name: str = "DOCKER_USERNAME",
     secret_value: str = config.docker.USERNAME,
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def upsert_docker_password(
     secret_name: str = "DOCKER_PASSWORD",
     secret_value: str = config.docker.PASSWORD.get_secret_value(),
 ):
-    _upsert_github_secret(secret_name, secret_value)
+    return _upsert_github_secret(secret_name, secret_value)
 
 
 def _upsert_github_secret(
     secret_name: str,
-    secret_value: str,
-    repo_name: str = "andre-cavalheiro/bailout_bot",  # FIXME!!! I could get this by parsing the Repository URL.
+    secret_value: str | None,
+    repo_name: str | None = None,
     token: str = config.git.ACCESS_TOKEN.get_secret_value(),
-):
+) -> str:
     """
     Upserts (inserts or updates) a GitHub secret in a repository.
     :param secret_name: The name of the secret to create or update.
     :param secret_value: The value of the secret to store.
-    :param repo_name: Repository name in the format 'owner/repo'.
+    :param repo_name: Repository name in the format 'owner/repo', parsed from
+        the repository link by default.
     :param token: GitHub personal access token with repo access.
+    :return: "created", "updated", "skipped" when unchanged since the last push, or "failed".
     """
-    github = Github(token)
-    repo = github.get_repo(repo_name)
+    if secret_value is None:
+        logger.error(f"Secret '{secret_name}' has no value, not upserting it.")
+        return "failed"
+    repo_name = repo_name or _repository_name(config.git.REPOSITORY_LINK)
 
     try:
-        repo.create_secret(secret_name, secret_value, secret_type="actions")
-        logger.info(f"Secret '{secret_name}' upserted in {repo_name}.")
+        return _repository_secrets(repo_name, token).upsert(secret_name, secret_value)
     except GithubException as e:
         logger.error(f"Error upserting secret: {e}")
+        return "failed"
+
+
+class _RepositorySecrets:
+    """
+    Secrets of one repository, sharing a client and the list of existing secrets
+    between every upsert.
+
+    GitHub never returns secret values, so a manifest of keyed hashes of what
+    was last pushed tells unchanged secrets apart; those are skipped as long as
+    the secret still exists in the repository.
+    """
+
+    def __init__(self, repo_name: str, token: str, manifest: "_SecretsManifest"):
+        self.repo_name = repo_name
+        self.github = Github(
+            auth=Auth.Token(token),
+            base_url=config.git.API_URL,
+            lazy=True,  # Don't fetch the repository, only its secrets are needed
+            pool_size=config.git.SECRETS_MAX_WORKERS,
+            seconds_between_requests=config.git.SECRETS_SECONDS_BETWEEN_REQUESTS,
+            seconds_between_writes=config.git.SECRETS_SECONDS_BETWEEN_WRITES,
+        )
+        self.repo = self.github.get_repo(repo_name)
+        self.manifest = manifest
+        # Keyed with the token, the manifest doesn't help guessing short secrets
+        self._hash_key = token.encode()
+        self._lock = threading.Lock()
+        self._existing: set[str] | None = None
+
+    def upsert(self, secret_name: str, secret_value: str) -> str:
+        existing = self._existing_secrets()
+        digest = hmac.new(
+            self._hash_key, f"{secret_name}\0{secret_value}".encode(), hashlib.sha256
+        ).hexdigest()
+        known = self.manifest.get(self.repo_name, secret_name)
+        if (
+            secret_name in existing
+            and known is not None
+            and hmac.compare_digest(known, digest)
+        ):
+            logger.info(f"Secret '{secret_name}' unchanged in {self.repo_name}.")
+            return "skipped"
+
+        self.repo.create_secret(secret_name, secret_value)
+        self.manifest.record(self.repo_name, secret_name, digest)
+        logger.info(f"Secret '{secret_name}' upserted in {self.repo_name}.")
+        return "updated" if secret_name in existing else "created"
+
+    def _existing_secrets(self) -> set[str]:
+        with self._lock:
+            if self._existing is None:
+                self._existing = {secret.name for secret in self.repo.get_secrets()}
+            return self._existing
+
+
+class _SecretsManifest:
+    """Keyed hashes of the secret values last pushed to each repository, in a JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._hashes: dict[str, dict[str, str]] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self._hashes = {}
+
+    def get(self, repo_name: str, secret_name: str) -> str | None:
+        with self._lock:
+            return self._hashes.get(repo_name, {}).get(secret_name)
+
+    def record(self, repo_name: str, secret_name: str, digest: str) -> None:
+        with self._lock:
+            self._hashes.setdefault(repo_name, {})[secret_name] = digest
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            tmp_path.write_text(json.dumps(self._hashes, indent=2, sort_keys=True))
+            tmp_path.replace(self.path)
+
+
+_clients_lock = threading.Lock()
+_clients: dict[tuple[str, str], _RepositorySecrets] = {}
+_manifest: _SecretsManifest | None = None
+
+
+def _repository_secrets(repo_name: str, token: str) -> _RepositorySecrets:
+    """The shared `_RepositorySecrets` of a repository, upserts run in several threads."""
+    global _manifest
+    with _clients_lock:
+        if _manifest is None:
+            _manifest = _SecretsManifest(Path(config.git.SECRETS_MANIFEST))
+        client = _clients.get((repo_name, token))
+        if client is None:
+            client = _clients[repo_name, token] = _RepositorySecrets(
+                repo_name, token, _manifest
+            )
+        return client
+
+
+def _repository_name(repository_link: str) -> str:
+    """'owner/repo' of an https or ssh GitHub repository link."""
+    match = re.search(r"github\.com[:/]([^/]+/[^/]+?)(?:\.git)?/?$", repository_link)
+    if match is None:
+        raise ValueError(f"Not a GitHub repository link: {repository_link}")
+    return match.group(1)
@@ -1,7 +1,5 @@
 from dotenv import load_dotenv
 
-from dataclasses import dataclass
-
 from pydantic import BaseConfig, Extra, SecretStr, ValidationError
 from pydantic_settings import BaseSettings
 
@@ -63,6 +61,14 @@ class GitSettings(BaseSettings):
 
     REPOSITORY_LINK: str
     ACCESS_TOKEN: SecretStr
+    API_URL: str = "https://api.github.com"
+    # Keyed hashes of the pushed secrets, to skip unchanged ones
+    SECRETS_MANIFEST: str = ".cache/github_secrets.json"
+    SECRETS_MAX_WORKERS: int = 8
+    # GitHub asks for spacing out large numbers of writes, a deploy only pushes a few.
+    # PyGithub waits 0.25s between any two requests otherwise, serializing the workers.
+    SECRETS_SECONDS_BETWEEN_REQUESTS: float = 0.0
+    SECRETS_SECONDS_BETWEEN_WRITES: float = 0.0
 
 
 class DockerSettings(BaseSettings):
@@ -73,39 +79,56 @@ class DockerSettings(BaseSettings):
 
     USERNAME: str | None = None
     PASSWORD: SecretStr | None = None
+    # Repository the flow's image is pushed to, '<USERNAME>/<APP_SLUG>' by default
+    IMAGE_NAME: str | None = None
 
 
-@dataclass(frozen=True, kw_only=True, slots=True)
 class SettingsConfig:
+    """
+    Settings sections, each validated from the environment on first access.
+
+    Short-lived processes only pay for the sections they actually read, and a
+    misconfigured section only fails the code that uses it.
+    """
+
     app: AppSettings
     prefect: PrefectSettings
     blocks: PrefectBlocksSettings
     git: GitSettings
     docker: DockerSettings
 
+    def __init__(self, **sections: BaseSettings):
+        for name, section in sections.items():
+            setattr(self, name, section)
+
+    def __getattr__(self, name: str) -> BaseSettings:
+        # Only reached for sections that weren't loaded yet
+        settings_type = type(self).__annotations__.get(name)
+        if settings_type is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        try:
+            section = settings_type()
+        except ValidationError as exc:
+            print(f"Error loading settings: {exc}")
+            raise
+        setattr(self, name, section)
+        return section
+
+    def reload(self) -> None:
+        """Forget the loaded sections, they are read again on next access."""
+        self.__dict__.clear()
+
+
+# Other libraries (e.g. Prefect) read their settings straight from the environment
+load_dotenv()
 
-_loaded_settings: SettingsConfig = None
+config: SettingsConfig = SettingsConfig()
 
 
 def load_settings(force_reload: bool = False) -> SettingsConfig:
-    global _loaded_settings
-    if _loaded_settings is not None and not force_reload:
-        return _loaded_settings
-
-    load_dotenv()
-    try:
-        _loaded_settings = SettingsConfig(
-            app=AppSettings(),
-            prefect=PrefectSettings(),
-            blocks=PrefectBlocksSettings(),
-            git=GitSettings(),
-            docker=DockerSettings(),
-        )
-    except ValidationError as exc:
-        print(f"Error loading settings: {exc}")
-        raise
-
-    return _loaded_settings
-
-
-config: SettingsConfig = load_settings()
+    if force_reload:
+        load_dotenv()
+        config.reload()
+    return config
@@ -0,0 +1,199 @@
+import os
+import types
+from itertools import chain
+from pathlib import Path
+from typing import Mapping, Sequence, Union, get_args, get_origin
+
+import msgspec
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError as e:
+    raise ImportError(
+        "Columnar aggregation needs the optional `numpy` and `pyarrow` packages, "
+        "install them with `poetry install --extras columnar`"
+    ) from e
+
+from core.models import Contributor, RepoSummary
+
+__all__ = [
+    "CONTRIBUTOR_SCHEMA",
+    "contributor_table",
+    "struct_table",
+    "repository_table",
+    "contribution_totals",
+    "top_contributors",
+    "contribution_percentiles",
+    "write_parquet",
+]
+
+# Repository names are dictionary-encoded, each row only stores an int32 code
+CONTRIBUTOR_SCHEMA = pa.schema(
+    [
+        ("repo", pa.dictionary(pa.int32(), pa.string())),
+        ("id", pa.int64()),
+        ("login", pa.string()),
+        ("contributions", pa.int64()),
+    ]
+)
+
+_ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bool: pa.bool_(),
+}
+
+
+def contributor_table(
+    contributors_by_repo: Mapping[str, Sequence[Contributor]],
+) -> pa.Table:
+    """One row per contributor of each repository, see `CONTRIBUTOR_SCHEMA`."""
+    names = list(contributors_by_repo)
+    sizes = np.fromiter(
+        (len(contributors) for contributors in contributors_by_repo.values()),
+        dtype=np.int64,
+        count=len(names),
+    )
+    # Plain list comprehensions are the fastest way to pull attributes off Structs
+    rows = list(chain.from_iterable(contributors_by_repo.values()))
+
+    repo = pa.DictionaryArray.from_arrays(
+        np.repeat(np.arange(len(names), dtype=np.int32), sizes),
+        pa.array(names, type=pa.string()),
+    )
+    contributions = np.fromiter(
+        [contributor.contributions for contributor in rows],
+        dtype=np.int64,
+        count=len(rows),
+    )
+    return pa.Table.from_arrays(
+        [
+            repo,
+            pa.array([contributor.id for contributor in rows], type=pa.int64()),
+            pa.array([contributor.login for contributor in rows], type=pa.string()),
+            pa.array(contributions),
+        ],
+        schema=CONTRIBUTOR_SCHEMA,
+    )
+
+
+def struct_table(
+    items: Sequence[msgspec.Struct], struct_type: type[msgspec.Struct]
+) -> pa.Table:
+    """Columns of the scalar (optionally None) fields of `items`; nested fields are left out."""
+    columns = {}
+    for field in msgspec.structs.fields(struct_type):
+        arrow_type = _arrow_type(field.type)
+        if arrow_type is not None:
+            columns[field.name] = pa.array(
+                [getattr(item, field.name) for item in items], type=arrow_type
+            )
+    return pa.table(columns)
+
+
+def repository_table(summaries: Sequence[RepoSummary]) -> pa.Table:
+    """One row per repository of a flow run."""
+    return struct_table(summaries, RepoSummary)
+
+
+def contribution_totals(table: pa.Table) -> pa.Table:
+    """Contributors, total and highest contributions of each repository."""
+    totals = table.group_by("repo").aggregate(
+        [
+            ("contributions", "count"),
+            ("contributions", "sum"),
+            ("contributions", "max"),
+        ]
+    )
+    return totals.rename_columns(
+        ["repo", "contributors", "contributions", "max_contributions"]
+    )
+
+
+def top_contributors(table: pa.Table, n: int = 10) -> pa.Table:
+    """
+    The `n` contributors with the most contributions summed over every repository,
+    with the number of repositories they contributed to.
+    """
+    known = table.filter(pc.is_valid(table["id"]))
+    per_contributor = known.group_by(["id", "login"]).aggregate(
+        [("contributions", "sum"), ("repo", "count")]
+    )
+    per_contributor = per_contributor.rename_columns(
+        ["id", "login", "contributions", "repos"]
+    )
+    top = per_contributor.take(
+        pc.select_k_unstable(
+            per_contributor, k=n, sort_keys=[("contributions", "descending")]
+        )
+    )
+    return top.sort_by([("contributions", "descending"), ("id", "ascending")])
+
+
+def contribution_percentiles(
+    table: pa.Table, percentiles: Sequence[float] = (50, 90, 99)
+) -> pa.Table:
+    """
+    Percentiles of `contributions` for each repository, linearly interpolated like
+    `numpy.percentile`, plus a last row over all of them with a null `repo`.
+    """
+    repo = table.unify_dictionaries()["repo"].combine_chunks()
+    codes = repo.indices.to_numpy(zero_copy_only=False)
+    values = table["contributions"].to_numpy()
+    quantiles = np.asarray(percentiles, dtype=np.float64) / 100
+
+    # Sort by repository then contributions, every repository is one segment
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    bounds = np.searchsorted(codes[order], np.arange(len(repo.dictionary) + 1))
+    starts, counts = bounds[:-1], np.diff(bounds)
+
+    # Interpolate between the two ranks around each percentile of each segment
+    positions = starts[:, None] + (counts[:, None] - 1) * quantiles
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+    empty = counts == 0
+    lower[empty], upper[empty] = 0, 0
+    if len(ordered):
+        results = ordered[lower] + (ordered[upper] - ordered[lower]) * (
+            positions - lower
+        )
+    else:
+        results = np.zeros(positions.shape)
+    results[empty] = np.nan
+
+    overall = (
+        np.percentile(values, percentiles)
+        if len(values)
+        else np.full(len(percentiles), np.nan)
+    )
+    results = np.vstack([results, overall])
+
+    columns = {
+        "repo": pa.array([*repo.dictionary.to_pylist(), None], type=pa.string()),
+        "contributors": pa.array(np.append(counts, len(values))),
+    }
+    for index, percentile in enumerate(percentiles):
+        columns[f"p{percentile:g}"] = pa.array(results[:, index])
+    return pa.table(columns)
+
+
+def write_parquet(table: pa.Table, path: str | Path, compression: str = "zstd") -> Path:
+    """Write `table` to a Parquet file atomically, readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp_path, compression=compression)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _arrow_type(annotation: object) -> pa.DataType | None:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        annotation = args[0] if len(args) == 1 else None
+    return _ARROW_TYPES.get(annotation)
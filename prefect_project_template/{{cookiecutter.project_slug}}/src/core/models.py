@@ -0,0 +1,61 @@
+import msgspec
+
+__all__ = [
+    "Repository",
+    "Contributor",
+    "ContributorChange",
+    "ContributorDelta",
+    "RepoSummary",
+]
+
+
+class Repository(msgspec.Struct):
+    """Subset of the GitHub `/repos/{owner}/{repo}` payload used by the flow."""
+
+    full_name: str
+    stargazers_count: int
+    contributors_url: str
+    pushed_at: str | None = None
+
+
+class Contributor(msgspec.Struct):
+    """Subset of a GitHub `/repos/{owner}/{repo}/contributors` item."""
+
+    contributions: int
+    id: int | None = None
+    login: str | None = None  # Anonymous contributors have no account
+    type: str = "User"
+
+
+class ContributorChange(msgspec.Struct):
+    """A contributor whose contribution count changed since the last sync."""
+
+    id: int
+    before: int
+    after: int
+    login: str | None = None
+
+
+class ContributorDelta(msgspec.Struct):
+    """What changed in a repository's contributors since the last sync."""
+
+    full_name: str
+    added: list[Contributor] = []
+    removed: list[int] = []  # Ids only, snapshots don't keep logins
+    changed: list[ContributorChange] = []
+    total: int = 0  # Contributors as of this sync
+    initial: bool = False  # No previous snapshot, everyone was added
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+class RepoSummary(msgspec.Struct):
+    """Per-repository result of a flow run."""
+
+    full_name: str
+    stargazers_count: int
+    contributors: int | None = None
+    delta: ContributorDelta | None = None  # Only in incremental runs
+    error: str | None = None
@@ -0,0 +1,240 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable
+
+__all__ = ["Pipeline", "Stage", "StageStats"]
+
+_DONE = object()  # Sent downstream once a stage has emitted everything
+
+
+@dataclass(slots=True)
+class _Failed:
+    error: BaseException
+
+
+@dataclass(slots=True)
+class _Pending:
+    """Outputs of one item of an ordered stage, queued in input order before they're ready."""
+
+    task: asyncio.Task[list[Any]]
+
+
+@dataclass(kw_only=True, slots=True)
+class StageStats:
+    received: int = 0
+    emitted: int = 0
+    busy: float = 0.0  # Seconds spent in the stage's function, summed over workers
+    blocked: float = 0.0  # Seconds outputs waited for room downstream (backpressure)
+    max_queued: int = 0  # Most outputs waiting for the next stage at once
+
+
+@dataclass(slots=True)
+class Stage:
+    """
+    One step of a `Pipeline`, applying `function` to each item it receives.
+
+    `function` may be a coroutine function, an async generator function, which
+    emits any number of outputs per item, or a plain function, which is run in
+    a thread with `threaded=True` so CPU-bound work doesn't stall the event loop.
+    Threaded stages get `concurrency` threads of their own, so they neither wait
+    for nor hold up the loop's default executor.
+    Up to `concurrency` items are processed at once. Outputs are passed on as
+    they're ready, or in the order items arrived with `ordered=True`, in which
+    case the outputs of an async generator are delivered together once its item
+    is done. At most `buffer` outputs (default `2 * concurrency`) wait for the
+    next stage; once they do, this stage stops taking new items.
+    """
+
+    name: str
+    function: Callable[[Any], Any]
+    concurrency: int = 1
+    ordered: bool = False
+    threaded: bool = False
+    buffer: int | None = None
+    stats: StageStats = field(default_factory=StageStats)
+
+
+class Pipeline:
+    """
+    Items of `source` streamed through `stages` (e.g. fetch → decode → transform →
+    sink), each connected to the next by a bounded queue.
+
+    Stages run concurrently, so network, CPU and output work overlap, and a slow
+    stage holds back the ones before it instead of letting items pile up:
+    memory is bounded by the queue sizes, not by the number of items. The
+    source is pulled lazily, sync or async. Iterate over the pipeline for the
+    outputs of the last stage, or `run` it to completion. The first exception
+    raised by a stage cancels the rest of the pipeline and is raised to the
+    caller; catch errors inside a stage's function to keep going past them.
+    """
+
+    def __init__(
+        self, source: Iterable[Any] | AsyncIterable[Any], stages: Iterable[Stage]
+    ):
+        self.source = source
+        self.stages = list(stages)
+        if not self.stages:
+            raise ValueError("A pipeline needs at least one stage")
+        for stage in self.stages:
+            if stage.concurrency < 1 or (stage.buffer is not None and stage.buffer < 1):
+                raise ValueError(
+                    f"Stage {stage.name!r} needs a concurrency and buffer of at least 1"
+                )
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def stats(self) -> dict[str, StageStats]:
+        return {stage.name: stage.stats for stage in self.stages}
+
+    async def run(self) -> dict[str, StageStats]:
+        """Stream every item through, dropping the last stage's outputs."""
+        async for _ in self:
+            pass
+        return self.stats
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        threads = sum(stage.concurrency for stage in self.stages if stage.threaded)
+        if threads:
+            self._executor = ThreadPoolExecutor(
+                max_workers=threads, thread_name_prefix="pipeline"
+            )
+        inbox = asyncio.Queue(maxsize=_buffer_size(self.stages[0]))
+        tasks = [asyncio.create_task(self._feed(inbox))]
+        for stage in self.stages:
+            stage.stats = StageStats()
+            outbox = asyncio.Queue(maxsize=_buffer_size(stage))
+            tasks.append(asyncio.create_task(self._dispatch(stage, inbox, outbox)))
+            inbox = outbox
+
+        try:
+            async for output in _receive(inbox):
+                yield output
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._executor is not None:
+                # Don't block the loop on functions still running in cancelled stages
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def _feed(self, outbox: asyncio.Queue) -> None:
+        try:
+            if isinstance(self.source, AsyncIterable):
+                async for item in self.source:
+                    await outbox.put(item)
+            else:
+                for item in self.source:
+                    await outbox.put(item)
+        except Exception as e:
+            await outbox.put(_Failed(e))
+        else:
+            await outbox.put(_DONE)
+
+    async def _dispatch(
+        self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue
+    ) -> None:
+        """Start a worker per item received, never more than `concurrency` at once."""
+        running: set[asyncio.Task] = set()
+        try:
+            async for item in _receive(inbox):
+                stage.stats.received += 1
+                while len(running) >= stage.concurrency:
+                    _, running = await asyncio.wait(
+                        running, return_when=asyncio.FIRST_COMPLETED
+                    )
+                if stage.ordered:
+                    # Queued right away, the next stage waits for it in turn
+                    task = asyncio.create_task(self._collect(stage, item))
+                    task.add_done_callback(_retrieve)
+                    running.add(task)
+                    await self._put(stage, outbox, _Pending(task))
+                else:
+                    running.add(asyncio.create_task(self._emit(stage, item, outbox)))
+            if running:
+                await asyncio.wait(running)
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        except Exception as e:
+            # Items already queued still go through first, the next stage raises `e` after them
+            if running:
+                await asyncio.wait(running)
+            await outbox.put(_Failed(e))
+        else:
+            await outbox.put(_DONE)
+
+    async def _emit(self, stage: Stage, item: Any, outbox: asyncio.Queue) -> None:
+        try:
+            async for output in self._apply(stage, item):
+                await self._put(stage, outbox, output)
+                stage.stats.emitted += 1
+        except Exception as e:
+            await outbox.put(_Failed(e))
+
+    async def _collect(self, stage: Stage, item: Any) -> list[Any]:
+        outputs = [output async for output in self._apply(stage, item)]
+        stage.stats.emitted += len(outputs)
+        return outputs
+
+    async def _apply(self, stage: Stage, item: Any) -> AsyncIterator[Any]:
+        function = stage.function
+        started = time.perf_counter()
+        if inspect.isasyncgenfunction(function):
+            async with aclosing(function(item)) as outputs:
+                async for output in outputs:
+                    stage.stats.busy += time.perf_counter() - started
+                    yield output
+                    started = time.perf_counter()
+        else:
+            if inspect.iscoroutinefunction(function):
+                output = await function(item)
+            elif stage.threaded:
+                # Like asyncio.to_thread, with the caller's context
+                call = functools.partial(contextvars.copy_context().run, function, item)
+                output = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, call
+                )
+            else:
+                output = function(item)
+            stage.stats.busy += time.perf_counter() - started
+            yield output
+
+    @staticmethod
+    async def _put(stage: Stage, outbox: asyncio.Queue, output: Any) -> None:
+        if outbox.full():
+            started = time.perf_counter()
+            await outbox.put(output)
+            stage.stats.blocked += time.perf_counter() - started
+        else:
+            outbox.put_nowait(output)
+        stage.stats.max_queued = max(stage.stats.max_queued, outbox.qsize())
+
+
+async def _receive(queue: asyncio.Queue) -> AsyncIterator[Any]:
+    """Items sent down `queue`, raising the upstream error that ended it, if any."""
+    while (item := await queue.get()) is not _DONE:
+        if isinstance(item, _Failed):
+            raise item.error
+        if isinstance(item, _Pending):
+            for output in await item.task:
+                yield output
+        else:
+            yield item
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()  # Retrieved here in case the pipeline stopped before it was read
+
+
+def _buffer_size(stage: Stage) -> int:
+    return stage.buffer if stage.buffer is not None else 2 * stage.concurrency
@@ -0,0 +1,207 @@
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+import msgspec
+
+from core.models import Contributor, ContributorChange, ContributorDelta
+
+__all__ = ["ContributorSnapshot", "ContributorSnapshots", "diff_contributors"]
+
+_FRAME_HEADER = struct.Struct(">I")  # Length of each msgpack-encoded update
+
+
+class ContributorSnapshot(msgspec.Struct, array_like=True):
+    """Contribution count per contributor id of a repository, as of a sync."""
+
+    counts: dict[int, int]
+    pushed_at: str | None = None  # Of the repository, when it was synced
+    synced_at: float = 0.0
+    generation: int = 0  # Bumped by each compaction, updates of older ones are ignored
+
+    def is_current(self, pushed_at: str | None, settle: float) -> bool:
+        """
+        Whether nothing was pushed to the repository since this snapshot.
+        GitHub computes contributors asynchronously, so a snapshot taken less than
+        `settle` seconds after the push it saw doesn't count as current.
+        """
+        if pushed_at is None or pushed_at != self.pushed_at:
+            return False
+        pushed = datetime.fromisoformat(pushed_at.replace("Z", "+00:00"))
+        return self.synced_at >= pushed.timestamp() + settle
+
+
+class _Update(msgspec.Struct, array_like=True):
+    """One sync's changes, appended to the log of a snapshot."""
+
+    counts: dict[int, int]  # Added or changed contributors
+    removed: list[int]
+    pushed_at: str | None
+    synced_at: float
+    generation: int
+
+
+class ContributorSnapshots:
+    """
+    Contributor snapshots of every synced repository, in `directory`.
+
+    A snapshot is a compact base file plus a log of the updates synced since; the
+    log is folded back into the base once it grows past the base (or
+    `min_compaction_bytes`), so a snapshot stays within about twice the size of
+    the counts it holds however many syncs it went through.
+    """
+
+    def __init__(self, directory: str | Path, *, min_compaction_bytes: int = 64 * 1024):
+        self.directory = Path(directory)
+        self.min_compaction_bytes = min_compaction_bytes
+
+        # Tasks of different repositories sync from task-runner threads
+        self._lock = threading.Lock()
+        self._encoder = msgspec.msgpack.Encoder()
+        self._base_decoder = msgspec.msgpack.Decoder(ContributorSnapshot)
+        self._update_decoder = msgspec.msgpack.Decoder(_Update)
+
+    def load(self, full_name: str) -> ContributorSnapshot | None:
+        """The snapshot of `full_name`, or None if it was never synced."""
+        with self._lock:
+            return self._read(full_name)[0]
+
+    def is_empty(self) -> bool:
+        """Whether no repository was synced yet."""
+        return not any(self.directory.glob("*.msgpack"))
+
+    def sync(
+        self,
+        full_name: str,
+        contributors: Iterable[Contributor],
+        pushed_at: str | None = None,
+    ) -> ContributorDelta:
+        """Diff `contributors` against the snapshot of `full_name` and save them as the new one."""
+        contributors = list(contributors)
+        with self._lock:
+            snapshot, log_end = self._read(full_name)
+            delta = diff_contributors(
+                full_name, snapshot.counts if snapshot else None, contributors
+            )
+            synced = ContributorSnapshot(
+                counts={
+                    c.id: c.contributions for c in contributors if c.id is not None
+                },
+                pushed_at=pushed_at,
+                synced_at=time.time(),
+                generation=snapshot.generation if snapshot else 0,
+            )
+
+            base_path, log_path = self._paths(full_name)
+            if snapshot is None or log_end >= max(
+                base_path.stat().st_size, self.min_compaction_bytes
+            ):
+                synced.generation += 1
+                self._compact(full_name, synced)
+            else:
+                update = _Update(
+                    counts={c.id: c.contributions for c in delta.added}
+                    | {change.id: change.after for change in delta.changed},
+                    removed=delta.removed,
+                    pushed_at=pushed_at,
+                    synced_at=synced.synced_at,
+                    generation=synced.generation,
+                )
+                frame = self._encoder.encode(update)
+                with open(log_path, "ab") as file:
+                    # Drop what a crash may have left after the last complete update
+                    file.truncate(log_end)
+                    file.write(_FRAME_HEADER.pack(len(frame)) + frame)
+        return delta
+
+    def _paths(self, full_name: str) -> tuple[Path, Path]:
+        name = full_name.replace("/", "__")
+        return self.directory / f"{name}.msgpack", self.directory / f"{name}.log"
+
+    def _read(self, full_name: str) -> tuple[ContributorSnapshot | None, int]:
+        """Replay the log onto the base, returning the snapshot and where the log's last complete update ends."""
+        base_path, log_path = self._paths(full_name)
+        try:
+            snapshot = self._base_decoder.decode(base_path.read_bytes())
+        except (FileNotFoundError, msgspec.DecodeError):
+            return None, 0
+        try:
+            log = log_path.read_bytes()
+        except FileNotFoundError:
+            return snapshot, 0
+
+        offset = 0
+        while offset + _FRAME_HEADER.size <= len(log):
+            (size,) = _FRAME_HEADER.unpack_from(log, offset)
+            start = offset + _FRAME_HEADER.size
+            if start + size > len(log):
+                break
+            try:
+                update = self._update_decoder.decode(log[start : start + size])
+            except msgspec.DecodeError:
+                break
+            offset = start + size
+            if update.generation != snapshot.generation:
+                continue  # Left over from before the last compaction
+            for contributor_id in update.removed:
+                snapshot.counts.pop(contributor_id, None)
+            snapshot.counts.update(update.counts)
+            snapshot.pushed_at, snapshot.synced_at = update.pushed_at, update.synced_at
+        return snapshot, offset
+
+    def _compact(self, full_name: str, snapshot: ContributorSnapshot) -> None:
+        base_path, log_path = self._paths(full_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = base_path.with_name(f".{base_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(self._encoder.encode(snapshot))
+        os.replace(tmp_path, base_path)
+        # Should this fail, the updates left in the log are of an older generation
+        log_path.unlink(missing_ok=True)
+
+
+def diff_contributors(
+    full_name: str,
+    before: dict[int, int] | None,
+    contributors: Iterable[Contributor],
+) -> ContributorDelta:
+    """
+    Compare `contributors` with the counts per id of a previous sync.
+    Without previous counts every contributor is added.
+    """
+    contributors = [c for c in contributors if c.id is not None]
+    if before is None:
+        return ContributorDelta(
+            full_name=full_name,
+            added=contributors,
+            total=len(contributors),
+            initial=True,
+        )
+
+    added, changed, seen = [], [], set()
+    for contributor in contributors:
+        seen.add(contributor.id)
+        previous = before.get(contributor.id)
+        if previous is None:
+            added.append(contributor)
+        elif previous != contributor.contributions:
+            changed.append(
+                ContributorChange(
+                    id=contributor.id,
+                    before=previous,
+                    after=contributor.contributions,
+                    login=contributor.login,
+                )
+            )
+    return ContributorDelta(
+        full_name=full_name,
+        added=added,
+        removed=sorted(
+            contributor_id for contributor_id in before if contributor_id not in seen
+        ),
+        changed=changed,
+        total=len(contributors),
+    )
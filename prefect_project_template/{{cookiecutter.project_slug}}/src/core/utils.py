@@ -1,24 +1,197 @@
+import asyncio
 import logging
-from settings import config
+from datetime import timedelta
 
 from prefect import task
-from utils.requests import with_session, make_request, RetryPolicy, RequestError
+from prefect.settings import PREFECT_HOME
+
+from settings import config
+from core.models import Contributor, ContributorDelta, Repository
+from core.snapshots import ContributorSnapshots
+from utils.caching import cached_request_task
+from utils.results import MsgpackSerializer
+from utils.requests import (
+    with_session,
+    make_request,
+    HTTPCache,
+    CheckpointStore,
+    CircuitBreakers,
+    RetryBudget,
+    RateLimiter,
+    RequestCoalescer,
+    RequestHedger,
+    RequestSpec,
+    paginate_requests,
+    RetryPolicy,
+    RequestError,
+)
 
 logger = logging.getLogger(config.app.SLUG)
 
+# The credential sent to GitHub, it's part of every cache key so tokens never share results
+github_headers = (
+    {"Authorization": f"Bearer {config.http.GITHUB_TOKEN.get_secret_value()}"}
+    if config.http.GITHUB_TOKEN
+    else {}
+)
+
+# Revalidates repeated fetches with ETags, 304s don't count against the rate limit
+http_cache = HTTPCache(
+    max_entries=config.http.CACHE_MAX_ENTRIES,
+    directory=config.http.CACHE_DIR,
+    max_disk_bytes=config.http.CACHE_MAX_DISK_BYTES,
+)
+
+# A retried crawl resumes from the pages it had already fetched
+checkpoints = (
+    CheckpointStore(
+        config.http.CHECKPOINT_DIR,
+        interval=config.http.CHECKPOINT_INTERVAL,
+        max_age=config.http.CHECKPOINT_MAX_AGE,
+    )
+    if config.http.CHECKPOINT_DIR
+    else None
+)
+
+# Shared by every task so concurrent fan-out doesn't burst into secondary limits
+rate_limiter = RateLimiter(
+    rate=config.http.RATE_LIMIT_PER_SECOND,
+    capacity=config.http.RATE_LIMIT_BURST,
+)
+
+# Fail fast while GitHub is down instead of every request retrying on its own
+circuit_breakers = CircuitBreakers(
+    failure_threshold=config.http.CIRCUIT_FAILURE_THRESHOLD,
+    min_requests=config.http.CIRCUIT_MIN_REQUESTS,
+    window=config.http.CIRCUIT_WINDOW,
+    open_for=config.http.CIRCUIT_OPEN_FOR,
+)
+retry_budget = RetryBudget(
+    ratio=config.http.RETRY_BUDGET_RATIO,
+    min_per_second=config.http.RETRY_BUDGET_MIN_PER_SECOND,
+)
+
+# Tail latency: a GET slower than usual for its host is sent again, the first answer wins
+hedger = (
+    RequestHedger(
+        quantile=config.http.HEDGE_QUANTILE,
+        max_ratio=config.http.HEDGE_MAX_RATIO,
+    )
+    if config.http.HEDGE_ENABLED
+    else None
+)
+
+# Tasks asking for the same URL at the same time share a single request
+coalescer = RequestCoalescer()
+
+# Contributor counts of the last incremental sync of each repo, kept between runs
+snapshot_dir = config.flow.SNAPSHOT_DIR or (
+    PREFECT_HOME.value() / config.app.SLUG / "snapshots"
+)
+contributor_snapshots = ContributorSnapshots(snapshot_dir)
+
+# Persisted task results are msgpack, decoded straight back into our Structs
+result_serializer = MsgpackSerializer(
+    compression=config.flow.RESULT_COMPRESSION or None
+)
+
+
+def github_slot():
+    """Hold a slot of the configured Prefect concurrency limit, if any, while calling GitHub."""
+    from prefect.concurrency.asyncio import concurrency
+
+    return concurrency(config.flow.CONCURRENCY_LIMIT or [], occupy=1)
+
+
+def github_task(request):
+    """Task whose result is reused while the GitHub request it sends is unchanged."""
+    return cached_request_task(
+        request,
+        expiration=timedelta(seconds=config.flow.TASK_CACHE_EXPIRATION),
+        validate=config.flow.TASK_CACHE_VALIDATE,
+        headers=github_headers,
+        http_cache=http_cache,
+        result_serializer=result_serializer,
+        retries=config.flow.TASK_RETRIES,
+        retry_delay_seconds=config.flow.TASK_RETRY_DELAY,
+    )
+
+
+def org_repos_request(org: str) -> RequestSpec:
+    return RequestSpec(
+        url=f"{config.http.GITHUB_API_URL}/orgs/{org}/repos",
+        options={"params": {"per_page": 100}},
+    )
 
-@task
-async def get_repo_info(repo_owner: str, repo_name: str):
+
+def repo_info_request(repo_owner: str, repo_name: str) -> RequestSpec:
+    return RequestSpec(
+        url=f"{config.http.GITHUB_API_URL}/repos/{repo_owner}/{repo_name}"
+    )
+
+
+def contributors_request(repo_info: Repository) -> RequestSpec:
+    return RequestSpec(
+        url=repo_info.contributors_url, options={"params": {"per_page": 100}}
+    )
+
+
+@github_task(org_repos_request)
+async def list_org_repos(org: str) -> list[Repository]:
+    """List every repository of a GitHub organization."""
+    request = org_repos_request(org)
+
+    async with github_slot(), with_session(
+        pooled=True, headers=github_headers
+    ) as session:
+        try:
+            repos = [
+                repo
+                async for repo in paginate_requests(
+                    session,
+                    request.method,
+                    request.url,
+                    **request.options,
+                    response_type=list[Repository],
+                    cache=http_cache,
+                    rate_limiter=rate_limiter,
+                    coalescer=coalescer,
+                    circuit_breakers=circuit_breakers,
+                    retry_budget=retry_budget,
+                    hedger=hedger,
+                    checkpoints=checkpoints,
+                )
+            ]
+            return repos
+        except RequestError as e:
+            logger.error(f"Failed to list repos of {org}: {e}")
+            raise
+
+
+@github_task(repo_info_request)
+async def get_repo_info(repo_owner: str, repo_name: str) -> Repository:
     """Get info about a repo - will retry twice on failure."""
-    url = f"https://api.github.com/repos/{repo_owner}/{repo_name}"
+    request = repo_info_request(repo_owner, repo_name)
 
     # Define retry policy (optional)
     retry_policy = RetryPolicy(max_attempts=2, logger=logger)
 
-    async with with_session() as session:
+    async with github_slot(), with_session(
+        pooled=True, headers=github_headers
+    ) as session:
         try:
             repo_info = await make_request(
-                session, "GET", url, retry_policy=retry_policy
+                session,
+                request.method,
+                request.url,
+                retry_policy=retry_policy,
+                response_type=Repository,
+                cache=http_cache,
+                rate_limiter=rate_limiter,
+                coalescer=coalescer,
+                circuit_breakers=circuit_breakers,
+                retry_budget=retry_budget,
+                hedger=hedger,
             )
             return repo_info
         except RequestError as e:
@@ -26,14 +199,68 @@ async def get_repo_info(repo_owner: str, repo_name: str):
             raise
 
 
-@task
-async def get_contributors(repo_info: dict):
-    """Get contributors for a repo."""
-    contributors_url = repo_info["contributors_url"]
+@github_task(contributors_request)
+async def get_contributors(repo_info: Repository) -> list[Contributor]:
+    """Get all contributors for a repo, fetching every page concurrently."""
+    return await _fetch_contributors(repo_info)
+
+
+@task(
+    retries=config.flow.TASK_RETRIES,
+    retry_delay_seconds=config.flow.TASK_RETRY_DELAY,
+)
+async def sync_contributors(repo_info: Repository) -> ContributorDelta:
+    """
+    Get the contributors added, removed or whose count changed since the repo's
+    last sync, and save the current ones as its new snapshot.
+
+    Nothing is fetched when the repo wasn't pushed to since the snapshot, and
+    unchanged pages are answered from the HTTP cache with a 304. Results aren't
+    cached, a delta is only ever reported once.
+    """
+    snapshot = await asyncio.to_thread(contributor_snapshots.load, repo_info.full_name)
+    if snapshot is not None and snapshot.is_current(
+        repo_info.pushed_at, config.flow.SNAPSHOT_SETTLE
+    ):
+        return ContributorDelta(
+            full_name=repo_info.full_name, total=len(snapshot.counts)
+        )
+
+    if snapshot is None:
+        logger.debug(f"First sync of {repo_info.full_name}, every contributor is added")
+    contributors = await _fetch_contributors(repo_info)
+    return await asyncio.to_thread(
+        contributor_snapshots.sync,
+        repo_info.full_name,
+        contributors,
+        repo_info.pushed_at,
+    )
+
+
+async def _fetch_contributors(repo_info: Repository) -> list[Contributor]:
+    request = contributors_request(repo_info)
 
-    async with with_session() as session:
+    async with github_slot(), with_session(
+        pooled=True, headers=github_headers
+    ) as session:
         try:
-            contributors = await make_request(session, "GET", contributors_url)
+            contributors = [
+                contributor
+                async for contributor in paginate_requests(
+                    session,
+                    request.method,
+                    request.url,
+                    **request.options,
+                    response_type=list[Contributor],
+                    cache=http_cache,
+                    rate_limiter=rate_limiter,
+                    coalescer=coalescer,
+                    circuit_breakers=circuit_breakers,
+                    retry_budget=retry_budget,
+                    hedger=hedger,
+                    checkpoints=checkpoints,
+                )
+            ]
             return contributors
         except RequestError as e:
             logger.error(f"Failed to fetch contributors: {e}")
@@ -1,27 +1,277 @@
 import asyncio
 import logging
+import re
+from functools import partial
+from pathlib import Path
+from typing import Any
 
-from prefect import flow, tags
+from prefect import Task, flow, tags
 from settings import config
-from core.utils import get_contributors, get_repo_info
+from core.models import Contributor, RepoSummary
+from core.pipeline import Pipeline, Stage
+from core.utils import (
+    circuit_breakers,
+    contributor_snapshots,
+    get_contributors,
+    get_repo_info,
+    hedger,
+    list_org_repos,
+    rate_limiter,
+    result_serializer,
+    retry_budget,
+    snapshot_dir,
+    sync_contributors,
+)
+from utils.requests import request_metrics, session_pool
 from utils.logging import setup_logger
 
 setup_logger()
 logger = logging.getLogger(config.app.SLUG)
 
 
-@flow(name=config.app.SLUG, log_prints=False)
-async def main(repo_owner: str = "PrefectHQ", repo_name: str = "prefect"):
+async def _run(task: Task, *args: Any) -> Any:
+    """Run `task` on the flow's event loop, returning its exception if it failed."""
+    try:
+        return await task(*args)
+    except Exception as e:
+        return e
+
+
+@flow(
+    name=config.app.SLUG,
+    log_prints=False,
+    result_serializer=result_serializer,
+)
+async def main(
+    repo_owner: str = "PrefectHQ",
+    repo_name: str = "prefect",
+    repos: list[str] | None = None,
+    org: str | None = None,
+    incremental: bool = config.flow.INCREMENTAL,
+) -> list[RepoSummary]:
     """
-    Given a GitHub repository, logs the number of stargazers
-    and contributors for that repo.
+    Given GitHub repositories, logs the number of stargazers
+    and contributors for each repo.
+
+    Processes `repo_owner/repo_name` by default, every "owner/name" in `repos`
+    when given, or every repository of `org`. Tasks run concurrently on the
+    flow's event loop, so they share its pooled HTTP sessions and coalesced
+    requests, and a failing repo doesn't fail the others.
+
+    Each repo streams through lookup → contributors → summary stages (see
+    `core.pipeline`) as soon as the previous stage is done with it, so the repos
+    in flight are bounded by the stages' queues however many are processed.
+
+    With `incremental`, each summary carries the contributors added, removed or
+    changed since the previous incremental run instead of being recounted.
     """
 
-    repo_info = await get_repo_info(repo_owner, repo_name)
-    logger.info(f"Stars 🌠 : {repo_info['stargazers_count']}")
+    contributors_task = sync_contributors if incremental else get_contributors
+    keep_contributors = bool(config.flow.PARQUET_DIR) and not incremental
+    if incremental and await asyncio.to_thread(contributor_snapshots.is_empty):
+        logger.warning(
+            f"No contributor snapshots in {snapshot_dir} yet, every contributor "
+            "is reported as added this run"
+        )
+
+    async def lookup(full_name: str) -> tuple[str, Any]:
+        owner, name = full_name.split("/", 1)
+        return full_name, await _run(get_repo_info, owner, name)
+
+    async def fetch(repo: tuple[str, Any]) -> tuple[str, Any, Any]:
+        full_name, repo_info = repo
+        # Nothing to fetch for a repo whose info couldn't be read
+        if isinstance(repo_info, BaseException):
+            return full_name, repo_info, None
+        return full_name, repo_info, await _run(contributors_task, repo_info)
+
+    summaries, contributors_by_repo = [], {}
+    concurrency = config.flow.MAX_WORKERS
+    # Tasks share pooled HTTP sessions, release their connections once done
+    async with session_pool.lifespan():
+        if org is not None:
+            repo_infos = await list_org_repos(org)
+            stages = []
+            source = [(info.full_name, info) for info in repo_infos]
+        else:
+            stages = [Stage("lookup", lookup, concurrency=concurrency, ordered=True)]
+            source = repos or [f"{repo_owner}/{repo_name}"]
+        stages += [
+            Stage("contributors", fetch, concurrency=concurrency, ordered=True),
+            Stage("summary", partial(_summarize, incremental=incremental)),
+        ]
+        pipeline = Pipeline(source, stages)
+        async for summary, contributors in pipeline:
+            summaries.append(summary)
+            # Contributor lists are dropped once counted unless written to Parquet
+            if keep_contributors and summary.error is None:
+                contributors_by_repo[summary.full_name] = contributors
+
+    if config.flow.PARQUET_DIR:
+        await asyncio.to_thread(
+            _write_parquet,
+            Path(config.flow.PARQUET_DIR),
+            summaries,
+            contributors_by_repo,
+        )
+
+    failed = sum(summary.error is not None for summary in summaries)
+    logger.info(f"Processed {len(summaries)} repos, {failed} failed")
+    for name, stage in pipeline.stats.items():
+        logger.debug(
+            "Stage %s: %d repos, busy %.2fs, waited %.2fs on the next stage",
+            name,
+            stage.received,
+            stage.busy,
+            stage.blocked,
+        )
+    logger.debug(
+        "Rate limiter waited %.2fs in total (max %.2fs) over %d requests",
+        rate_limiter.stats.total_wait,
+        rate_limiter.stats.max_wait,
+        rate_limiter.stats.acquired,
+    )
+    budget = retry_budget.stats()
+    logger.debug(
+        "Retry budget allowed %d and denied %d retries over %d requests",
+        budget.retries,
+        budget.denied,
+        budget.requests,
+    )
+    for host, breaker in circuit_breakers.stats().items():
+        if breaker.opened:
+            logger.warning(
+                "Circuit of %s opened %d times, %d requests failed fast, now %s",
+                host,
+                breaker.opened,
+                breaker.rejected,
+                breaker.state.value,
+            )
+    if hedger is not None:
+        logger.debug(
+            "Hedged %d of %d requests, %d hedges won, %d held back by the cap",
+            hedger.stats.hedged,
+            hedger.stats.requests,
+            hedger.stats.won,
+            hedger.stats.capped,
+        )
+    if request_metrics.enabled:
+        await _report_request_metrics()
+    return summaries
+
+
+def _summarize(
+    repo: tuple[str, Any, Any], *, incremental: bool
+) -> tuple[RepoSummary, Any]:
+    """Log the summary of a repo's info and contributors, or of whichever failed."""
+    full_name, repo_info, contributors = repo
+    if isinstance(repo_info, BaseException):
+        summary = RepoSummary(
+            full_name=full_name, stargazers_count=0, error=str(repo_info)
+        )
+    else:
+        summary = RepoSummary(
+            full_name=repo_info.full_name,
+            stargazers_count=repo_info.stargazers_count,
+        )
+        if isinstance(contributors, BaseException):
+            summary.error = str(contributors)
+        elif incremental:
+            summary.delta = contributors
+            summary.contributors = contributors.total
+        else:
+            summary.contributors = len(contributors)
+
+    if summary.error is not None:
+        logger.warning(f"{summary.full_name} failed: {summary.error}")
+    elif summary.delta is not None:
+        _log_delta(summary)
+    else:
+        logger.info(
+            f"{summary.full_name} - Stars 🌠 : {summary.stargazers_count}, "
+            f"Number of contributors 👷: {summary.contributors}"
+        )
+    return summary, contributors
+
+
+def _log_delta(summary: RepoSummary) -> None:
+    delta = summary.delta
+    logger.info(
+        f"{summary.full_name} - Stars 🌠 : {summary.stargazers_count}, "
+        f"Number of contributors 👷: {delta.total} "
+        f"(+{len(delta.added)} -{len(delta.removed)} ~{len(delta.changed)})"
+    )
+    if delta.initial:
+        return  # Everyone was added, don't list the whole repo
+    for contributor in delta.added:
+        logger.debug(
+            f"{summary.full_name} + {contributor.login} ({contributor.contributions})"
+        )
+    for contributor_id in delta.removed:
+        logger.debug(f"{summary.full_name} - contributor {contributor_id}")
+    for change in delta.changed:
+        logger.debug(
+            f"{summary.full_name} ~ {change.login}: {change.before} -> {change.after}"
+        )
+
+
+def _write_parquet(
+    directory: Path,
+    summaries: list[RepoSummary],
+    contributors_by_repo: dict[str, list[Contributor]],
+) -> None:
+    """Write the run's repos and, unless it was incremental, contributors and their stats as Parquet."""
+    from core import columnar
+
+    columnar.write_parquet(
+        columnar.repository_table(summaries), directory / "repos.parquet"
+    )
+    if not contributors_by_repo:
+        return
+
+    contributors = columnar.contributor_table(contributors_by_repo)
+    percentiles = columnar.contribution_percentiles(contributors)
+    columnar.write_parquet(contributors, directory / "contributors.parquet")
+    columnar.write_parquet(
+        columnar.contribution_totals(contributors), directory / "totals.parquet"
+    )
+    columnar.write_parquet(percentiles, directory / "percentiles.parquet")
+    columnar.write_parquet(
+        columnar.top_contributors(contributors), directory / "top_contributors.parquet"
+    )
+
+    overall = percentiles.slice(percentiles.num_rows - 1).to_pylist()[0]
+    logger.info(
+        "Contributions of %d contributors: p50 %.0f, p90 %.0f, p99 %.0f, written to %s",
+        overall["contributors"],
+        overall["p50"],
+        overall["p90"],
+        overall["p99"],
+        directory,
+    )
+
+
+async def _report_request_metrics() -> None:
+    """Publish the HTTP timings of the run as an artifact and, if configured, a Prometheus file."""
+    from prefect.artifacts import create_markdown_artifact
 
-    contributors = await get_contributors(repo_info)
-    logger.info(f"Number of contributors 👷: {len(contributors)}")
+    await create_markdown_artifact(
+        # Artifact keys only allow lowercase letters, numbers and dashes
+        key=re.sub(r"[^a-z0-9]+", "-", f"{config.app.SLUG}-http-metrics".lower()),
+        markdown=request_metrics.to_markdown(),
+        description="Per-phase timings, responses and retries of the HTTP requests",
+    )
+    if config.http.METRICS_PATH:
+        path = Path(config.http.METRICS_PATH)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        # Written atomically, the textfile collector may read it at any time
+        tmp_path.write_text(
+            request_metrics.to_prometheus()
+            + circuit_breakers.to_prometheus()
+            + retry_budget.to_prometheus()
+            + (hedger.to_prometheus() if hedger is not None else "")
+        )
+        tmp_path.replace(path)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,6 @@
 from dotenv import load_dotenv
 
-from dataclasses import dataclass
-
-from pydantic import BaseConfig, Extra, ValidationError
+from pydantic import BaseConfig, Extra, SecretStr, ValidationError
 from pydantic_settings import BaseSettings
 
 
@@ -61,35 +59,110 @@ class LoggingSettings(BaseSettings):
 
     LEVEL: str = "INFO"
     FORMAT: str = "{name}:{function}:{line} - {message}"
+    JSON: bool = False  # One JSON object per line instead of text
+    RATE_LIMIT: int = 20  # Identical records below WARNING per period, 0 disables
+    RATE_LIMIT_PERIOD: float = 60.0
+
+
+class HttpSettings(BaseSettings):
+    """HTTP client settings."""
+
+    class Config(RootConfig):  # noqa: D106
+        env_prefix = "HTTP_"
+
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_TOKEN: SecretStr | None = None  # Raises the rate limit to 5000 requests/hour
+    CONNECTOR_LIMIT: int = 100
+    CONNECTOR_LIMIT_PER_HOST: int = 0
+    KEEPALIVE_TIMEOUT: float = 30.0
+    DNS_CACHE_TTL: int = 300
+    CACHE_DIR: str | None = None
+    CACHE_MAX_ENTRIES: int = 256
+    CACHE_MAX_DISK_BYTES: int = 100 * 1024 * 1024
+    CHECKPOINT_DIR: str | None = None
+    CHECKPOINT_INTERVAL: int = 10  # Pages fetched between two checkpoints
+    CHECKPOINT_MAX_AGE: int = 24 * 60 * 60  # Seconds before abandoned ones are removed
+    RATE_LIMIT_PER_SECOND: float = 10.0
+    RATE_LIMIT_BURST: int = 20
+    CIRCUIT_FAILURE_THRESHOLD: float = 0.5  # Failure rate that opens a host's circuit
+    CIRCUIT_MIN_REQUESTS: int = 20
+    CIRCUIT_WINDOW: float = 30.0  # Seconds of outcomes the failure rate covers
+    CIRCUIT_OPEN_FOR: float = 30.0  # Seconds before probing the host again
+    RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed per request sent
+    RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    HEDGE_ENABLED: bool = False  # Resend slow GETs, the first answer wins
+    HEDGE_QUANTILE: float = 0.95  # Latency quantile of a host to wait before hedging
+    HEDGE_MAX_RATIO: float = 0.1  # Hedges allowed per request sent
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str | None = None
+
+
+class FlowSettings(BaseSettings):
+    """Flow execution settings."""
+
+    class Config(RootConfig):  # noqa: D106
+        env_prefix = "FLOW_"
+
+    MAX_WORKERS: int = 8  # Repos each stage of the flow works on at once
+    CONCURRENCY_LIMIT: str | None = None
+    TASK_CACHE_EXPIRATION: int = 600  # Seconds task results are reused for
+    TASK_CACHE_VALIDATE: bool = False  # Also needs CACHE_DIR, see RequestCachePolicy
+    TASK_RETRIES: int = 2
+    TASK_RETRY_DELAY: int = 30  # Seconds
+    INCREMENTAL: bool = False  # Report contributor changes since the last run
+    # Must outlive the worker, defaults to <PREFECT_HOME>/<APP_SLUG>/snapshots
+    SNAPSHOT_DIR: str | None = None
+    SNAPSHOT_SETTLE: int = 3600  # Seconds between a push and its final contributors
+    PARQUET_DIR: str | None = None  # Needs the columnar extra
+    RESULT_COMPRESSION: str | None = None
 
 
-@dataclass(frozen=True, kw_only=True, slots=True)
 class SettingsConfig:
+    """
+    Settings sections, each validated from the environment on first access.
+
+    Short-lived processes only pay for the sections they actually read, and a
+    misconfigured section only fails the code that uses it.
+    """
+
     app: AppSettings
     development: DevelopmentSettings
     logging: LoggingSettings
+    http: HttpSettings
+    flow: FlowSettings
 
+    def __init__(self, **sections: BaseSettings):
+        for name, section in sections.items():
+            setattr(self, name, section)
 
-_loaded_settings: SettingsConfig = None
+    def __getattr__(self, name: str) -> BaseSettings:
+        # Only reached for sections that weren't loaded yet
+        settings_type = type(self).__annotations__.get(name)
+        if settings_type is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        try:
+            section = settings_type()
+        except ValidationError as exc:
+            print(f"Error loading settings: {exc}")
+            raise
+        setattr(self, name, section)
+        return section
 
+    def reload(self) -> None:
+        """Forget the loaded sections, they are read again on next access."""
+        self.__dict__.clear()
 
-def load_settings(force_reload: bool = False) -> SettingsConfig:
-    global _loaded_settings
-    if _loaded_settings is not None and not force_reload:
-        return _loaded_settings
 
-    load_dotenv()
-    try:
-        _loaded_settings = SettingsConfig(
-            app=AppSettings(),
-            development=DevelopmentSettings(),
-            logging=LoggingSettings(),
-        )
-    except ValidationError as exc:
-        print(f"Error loading settings: {exc}")
-        raise
+# Other libraries (e.g. Prefect) read their settings straight from the environment
+load_dotenv()
 
-    return _loaded_settings
+config: SettingsConfig = SettingsConfig()
 
 
-config: SettingsConfig = load_settings()
+def load_settings(force_reload: bool = False) -> SettingsConfig:
+    if force_reload:
+        load_dotenv()
+        config.reload()
+    return config
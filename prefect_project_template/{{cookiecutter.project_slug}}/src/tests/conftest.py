@@ -0,0 +1,62 @@
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+DEPLOY_DIR = SRC_DIR.parent / "deploy"
+
+# Tests import the flow's modules the way it runs them, from `src`
+sys.path.insert(0, str(SRC_DIR))
+
+# Settings the deploy scripts need at import time, their values don't matter here
+DEPLOY_ENV = {
+    "PREFECT_API_URL": "http://prefect.test/api",
+    "PREFECT_API_KEY": "test-api-key",
+    "PREFECT_WORK_POOL": "test-pool",
+    "PREFECT_CRON_SCHEDULE": "0 0 * * *",
+    "GIT_REPOSITORY_LINK": "https://github.com/owner/repo.git",
+    "GIT_ACCESS_TOKEN": "test-token",
+    "DOCKER_USERNAME": "test-user",
+    "DOCKER_PASSWORD": "test-password",
+    "BLOCKS_GITHUB_CREDENTIALS": "test-credentials",
+}
+
+
+@pytest.fixture(scope="session")
+def deploy_modules():
+    """
+    Import modules of `deploy/`, which run with `deploy/` on the path.
+
+    It has its own top-level `settings` module, only put in `sys.modules` while
+    a deploy module is imported so that `src`'s modules keep theirs. Its
+    sections are all loaded then, from `DEPLOY_ENV`.
+    """
+    sys.path.append(str(DEPLOY_DIR))
+    spec = importlib.util.spec_from_file_location(
+        "settings", DEPLOY_DIR / "settings.py"
+    )
+    deploy_settings = importlib.util.module_from_spec(spec)
+
+    def import_module(name: str) -> ModuleType:
+        src_settings = sys.modules.get("settings")
+        sys.modules["settings"] = deploy_settings
+        try:
+            with pytest.MonkeyPatch.context() as monkeypatch:
+                for env_name, value in DEPLOY_ENV.items():
+                    monkeypatch.setenv(env_name, value)
+                if not hasattr(deploy_settings, "config"):
+                    spec.loader.exec_module(deploy_settings)
+                    for section in type(deploy_settings.config).__annotations__:
+                        getattr(deploy_settings.config, section)
+                return importlib.import_module(name)
+        finally:
+            if src_settings is None:
+                del sys.modules["settings"]
+            else:
+                sys.modules["settings"] = src_settings
+
+    yield import_module
+    sys.path.remove(str(DEPLOY_DIR))
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from utils.caching import RequestCachePolicy
+from utils.requests import CachedResponse, HTTPCache, RequestSpec
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+URL = "https://api.github.test/repos/owner/repo"
+
+FLOW_SCRIPT = """
+import asyncio
+from prefect import flow
+from core.utils import github_task
+
+@github_task(lambda name: f"https://api.github.test/repos/{name}")
+async def get_repo(name: str) -> dict:
+    print("fetched", name)
+    return {"name": name}
+
+@flow
+async def run(name: str) -> dict:
+    return await get_repo(name)
+
+print(asyncio.run(run("owner/repo")))
+"""
+
+
+def compute_key(policy: RequestCachePolicy, url: str = URL) -> str | None:
+    task_ctx = SimpleNamespace(task=SimpleNamespace(task_key="get_repo"))
+    return policy.compute_key(task_ctx, {"url": url}, {})
+
+
+def store(cache: HTTPCache, etag: str, *, age: float, max_age: int = 60) -> None:
+    entry = CachedResponse(
+        body=b"{}",
+        content_type="application/json",
+        encoding="utf-8",
+        headers={"Cache-Control": f"private, max-age={max_age}"},
+        etag=etag,
+        stored_at=time.time() - age,
+    )
+    asyncio.run(cache.put(cache.key("GET", URL), entry))
+
+
+def test_key_follows_the_request():
+    policy = RequestCachePolicy(request=lambda url: url)
+
+    assert compute_key(policy) == compute_key(policy)
+    assert compute_key(policy) != compute_key(policy, URL + "/contributors")
+    assert compute_key(policy) == compute_key(
+        RequestCachePolicy(request=lambda url: RequestSpec(url=url))
+    )
+
+
+def test_key_covers_credentials():
+    def policy(token: str) -> RequestCachePolicy:
+        return RequestCachePolicy(
+            request=lambda url: url, headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert compute_key(policy("a")) == compute_key(policy("a"))
+    assert compute_key(policy("a")) != compute_key(policy("b"))
+
+
+def test_validation_needs_a_persistent_http_cache():
+    with pytest.raises(ValueError):
+        RequestCachePolicy(request=lambda url: url, validate=True)
+    with pytest.raises(ValueError):
+        RequestCachePolicy(
+            request=lambda url: url, validate=True, http_cache=HTTPCache()
+        )
+
+
+def test_validated_key_follows_the_fresh_etag(tmp_path):
+    cache = HTTPCache(directory=tmp_path)
+    policy = RequestCachePolicy(
+        request=lambda url: url, validate=True, http_cache=cache
+    )
+    assert compute_key(policy) is None  # Nothing stored yet
+
+    store(cache, '"v1"', age=0)
+    first = compute_key(policy)
+    assert first is not None
+
+    # Read back from disk, as the next process would
+    cache.clear_memory()
+    assert compute_key(policy) == first
+
+    store(cache, '"v2"', age=0)
+    assert compute_key(policy) not in (None, first)
+
+    store(cache, '"v2"', age=120)
+    assert compute_key(policy) is None  # Stale, the task runs and revalidates
+
+
+def test_second_process_reuses_the_result(tmp_path):
+    script = tmp_path / "flow.py"
+    script.write_text(FLOW_SCRIPT)
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC_DIR),
+        "PREFECT_HOME": str(tmp_path / "prefect"),
+        "PREFECT_LOGGING_LEVEL": "WARNING",
+    }
+    env.pop("PREFECT_API_URL", None)  # A temporary local server
+
+    def run() -> str:
+        return subprocess.run(
+            [sys.executable, str(script)],
+            cwd=tmp_path,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=300,
+        ).stdout
+
+    assert "fetched owner/repo" in run()
+    second = run()
+    assert "fetched" not in second
+    assert "{'name': 'owner/repo'}" in second
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+
+from aiohttp import web
+
+from utils.requests import CheckpointStore, ServerError, paginate_requests, with_session
+
+LAST_PAGE = 6
+
+
+class PaginatedServer:
+    """Pages 1 to `LAST_PAGE` of two items, failing the pages in `failing` once each."""
+
+    def __init__(self, failing: set[int] = frozenset()):
+        self.failing = set(failing)
+        self.requested: list[int] = []
+
+    async def handler(self, request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 1))
+        self.requested.append(page)
+        if page in self.failing:
+            self.failing.discard(page)
+            return web.Response(status=500)
+        base = str(request.url.with_query(None))
+        links = [f'<{base}?page={LAST_PAGE}>; rel="last"']
+        if page < LAST_PAGE:
+            links.append(f'<{base}?page={page + 1}>; rel="next"')
+        return web.json_response(
+            [page * 10, page * 10 + 1], headers={"Link": ", ".join(links)}
+        )
+
+
+async def crawl_twice(
+    server: PaginatedServer, checkpoints: CheckpointStore
+) -> tuple[list[int] | Exception, list[int]]:
+    """
+    Crawl the pages twice, returning what each crawl yielded or raised.
+
+    `server.requested` is left with the pages the second crawl requested.
+    """
+    app = web.Application()
+    app.router.add_get("/items", server.handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    async def crawl() -> list[int]:
+        return [
+            item
+            async for item in paginate_requests(
+                session,
+                "GET",
+                f"http://127.0.0.1:{port}/items",
+                retry=False,
+                concurrency=1,
+                checkpoints=checkpoints,
+            )
+        ]
+
+    try:
+        async with with_session() as session:
+            try:
+                first = await crawl()
+            except ServerError as e:
+                first = e
+            server.requested.clear()
+            return first, await crawl()
+    finally:
+        await runner.cleanup()
+
+
+ALL_ITEMS = [page * 10 + i for page in range(1, LAST_PAGE + 1) for i in (0, 1)]
+
+
+def test_crawl_resumes_after_the_checkpointed_pages(tmp_path):
+    server = PaginatedServer(failing={5})
+    first, second = asyncio.run(
+        crawl_twice(server, CheckpointStore(tmp_path, interval=2))
+    )
+
+    assert isinstance(first, ServerError)
+    assert second == ALL_ITEMS
+    # Pages 1 to 4 were checkpointed, only the rest is fetched again
+    assert server.requested == [5, 6]
+    assert list(tmp_path.iterdir()) == []  # Completed, its checkpoint is deleted
+
+
+def test_completed_crawl_starts_over(tmp_path):
+    server = PaginatedServer()
+    first, second = asyncio.run(
+        crawl_twice(server, CheckpointStore(tmp_path, interval=2))
+    )
+
+    assert first == second == ALL_ITEMS
+    assert server.requested == list(range(1, LAST_PAGE + 1))
+
+
+def save_checkpoint(store: CheckpointStore, key: str, *, age: float = 0.0):
+    checkpoint = store.open(key)
+    checkpoint.add_page([1], next_url="https://api.github.test/items?page=2")
+    checkpoint.close()
+    updated = time.time() - age
+    for entry in os.scandir(checkpoint.path):
+        os.utime(entry.path, (updated, updated))
+    return checkpoint.path
+
+
+def test_expired_checkpoints_are_collected(tmp_path):
+    store = CheckpointStore(tmp_path, max_age=60)
+    expired = save_checkpoint(store, "expired", age=120)
+    recent = save_checkpoint(store, "recent")
+
+    assert store.collect_garbage() == 1
+    assert not expired.exists()
+    assert store.open("recent").cursor.pages_done == 1
+    assert recent.exists()
+
+
+def test_running_crawl_isnt_collected_or_opened_twice(tmp_path):
+    store = CheckpointStore(tmp_path, max_age=60)
+    path = save_checkpoint(store, "running", age=120)
+    running = store.open("running")
+
+    assert store.open("running") is None
+    assert store.collect_garbage() == 0
+    assert path.exists()
+
+    running.close(completed=True)
+    assert not path.exists()
@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import pytest
+from prefect.exceptions import ObjectNotFound
+
+IMAGE_NAME = "user/project"
+
+
+class FakeClient:
+    """Prefect client knowing at most one deployment, deployed with these arguments."""
+
+    def __init__(self, deployed: dict | None = None):
+        self.deployed = deployed
+
+    def read_deployment_by_name(self, name: str):
+        if self.deployed is None:
+            raise ObjectNotFound(http_exc=Exception(name))
+        # Prefect stores the image with the job variables
+        return SimpleNamespace(
+            tags=self.deployed["tags"],
+            job_variables={"image": self.deployed["image"].reference},
+        )
+
+
+class FakeFlow:
+    """Records the arguments of `deploy` instead of deploying."""
+
+    name = "flow"
+
+    def __init__(self):
+        self.deployed: dict | None = None
+
+    def deploy(self, **kwargs):
+        self.deployed = kwargs
+        return "deployment-id"
+
+
+@pytest.fixture
+def deployment(deploy_modules):
+    return deploy_modules("deployment")
+
+
+def deploy(deployment, client, *, image_name=IMAGE_NAME, force=False, **kwargs) -> dict:
+    flow = FakeFlow()
+    kwargs = {
+        "name": "dev",
+        "tags": ["env:dev"],
+        "cron": "0 0 * * *",
+        "parameters": {},
+        **kwargs,
+    }
+    assert (
+        deployment.deploy_flow(
+            flow, client, image_name=image_name, force=force, **kwargs
+        )
+        == "deployment-id"
+    )
+    return flow.deployed
+
+
+def fingerprint_tag(deployed: dict) -> str:
+    (tag,) = [tag for tag in deployed["tags"] if tag.startswith("fingerprint:")]
+    return tag
+
+
+def test_new_deployment_builds(deployment):
+    deployed = deploy(deployment, FakeClient())
+
+    assert deployed["build"] and deployed["push"]
+    fingerprint = fingerprint_tag(deployed).removeprefix("fingerprint:")
+    assert deployed["image"].reference == f"{IMAGE_NAME}:{fingerprint}"
+    assert deployed["tags"][0] == "env:dev"
+
+
+def test_unchanged_fingerprint_reuses_image(deployment):
+    first = deploy(deployment, FakeClient())
+    deployed = deploy(deployment, FakeClient(first))
+
+    assert not deployed["build"] and not deployed["push"]
+    assert deployed["image"].reference == first["image"].reference
+    assert deployed["tags"] == first["tags"]
+
+
+def test_force_builds_unchanged_source(deployment):
+    first = deploy(deployment, FakeClient())
+    deployed = deploy(deployment, FakeClient(first), force=True)
+
+    assert deployed["build"] and deployed["push"]
+    assert deployed["image"].reference == first["image"].reference
+
+
+def test_changed_parameters_build_new_image(deployment):
+    first = deploy(deployment, FakeClient())
+    deployed = deploy(deployment, FakeClient(first), parameters={"repos": ["a/b"]})
+
+    assert deployed["build"] and deployed["push"]
+    assert fingerprint_tag(deployed) != fingerprint_tag(first)
+    assert deployed["image"].reference != first["image"].reference
+
+
+def test_metadata_changes_reuse_image(deployment):
+    first = deploy(deployment, FakeClient())
+    deployed = deploy(
+        deployment,
+        FakeClient(first),
+        cron="0 12 * * *",
+        tags=["env:dev", "team:data"],
+        work_pool_name="other-pool",
+        job_variables={"env": {"APP_ENVIRONMENT": "dev"}},
+    )
+
+    assert not deployed["build"] and not deployed["push"]
+    assert deployed["image"].reference == first["image"].reference
+    assert fingerprint_tag(deployed) == fingerprint_tag(first)
+
+
+def test_renamed_image_builds(deployment):
+    first = deploy(deployment, FakeClient())
+    deployed = deploy(deployment, FakeClient(first), image_name="user/renamed")
+
+    assert deployed["build"] and deployed["push"]
+    assert fingerprint_tag(deployed) == fingerprint_tag(first)
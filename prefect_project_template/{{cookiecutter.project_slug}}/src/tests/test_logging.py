@@ -0,0 +1,75 @@
+import io
+import logging
+
+import pytest
+
+from settings import config
+from utils import logging as app_logging
+from utils.logging import RateLimitFilter
+
+
+def record(msg: str, *args, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("app", level, __file__, 1, msg, args, None)
+
+
+def test_distinct_messages_all_pass():
+    rate_limit = RateLimitFilter(limit=20, period=60)
+    records = [record("%s - Stars: %d", f"owner/repo{i}", i) for i in range(30)]
+
+    assert all(rate_limit.filter(r) for r in records)
+
+
+def test_identical_messages_are_limited():
+    rate_limit = RateLimitFilter(limit=2, period=60)
+    passed = [rate_limit.filter(record("Retrying %s", "owner/repo")) for _ in range(5)]
+
+    assert passed == [True, True, False, False, False]
+    (flushed,) = rate_limit.flush()
+    assert flushed.suppressed == 3
+    assert rate_limit.flush() == []
+
+
+def test_warnings_are_never_dropped():
+    rate_limit = RateLimitFilter(limit=1, period=60)
+
+    assert all(
+        rate_limit.filter(record("%s failed", "owner/repo", level=logging.WARNING))
+        for _ in range(5)
+    )
+
+
+def test_next_window_reports_suppressed(monkeypatch):
+    now = 0.0
+    monkeypatch.setattr(app_logging.time, "monotonic", lambda: now)
+    rate_limit = RateLimitFilter(limit=1, period=60)
+    for _ in range(3):
+        rate_limit.filter(record("Retrying"))
+
+    now = 61.0
+    next_record = record("Retrying")
+    assert rate_limit.filter(next_record)
+    assert next_record.suppressed == 2
+
+
+@pytest.fixture
+def output(monkeypatch) -> io.StringIO:
+    """What the app's logger writes, rate limited to one identical record."""
+    monkeypatch.setattr(config.logging, "RATE_LIMIT", 1)
+    app_logging.shutdown_logger()
+    logger = app_logging.setup_logger()
+    (console_handler,) = app_logging._installed_handler(logger).queue_listener.handlers
+    stream = io.StringIO()
+    console_handler.setStream(stream)
+    yield stream
+    app_logging.shutdown_logger()
+
+
+def test_shutdown_flushes_suppressed_counts(output):
+    logger = logging.getLogger(config.app.SLUG)
+    for _ in range(4):
+        logger.info("Retrying owner/repo")
+    app_logging.shutdown_logger()
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[-1].endswith("Retrying owner/repo (3 similar messages suppressed)")
@@ -0,0 +1,57 @@
+import asyncio
+
+from aiohttp import web
+
+from utils.requests import Histogram, RequestMetrics, stream_request, with_session
+from utils.requests import streaming
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.1, 1, 10))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.quantile(0.25) == 0.1
+    assert histogram.quantile(0.5) == 0.55
+    assert histogram.quantile(1) == 10
+
+
+def test_histogram_quantile_skips_empty_buckets():
+    histogram = Histogram(buckets=(0.1, 1, 10))
+    histogram.observe(5)
+
+    assert histogram.quantile(0) == 1
+    assert histogram.quantile(1) == 10
+
+
+def test_streamed_bytes_are_counted(monkeypatch):
+    recorded = RequestMetrics()
+    monkeypatch.setattr(streaming, "request_metrics", recorded)
+
+    async def handler(request):
+        return web.Response(body=b"x" * 100_000)
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/body", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with with_session() as session:
+                chunks = [
+                    chunk
+                    async for chunk in stream_request(
+                        session, "GET", f"http://127.0.0.1:{port}/body", chunk_size=4096
+                    )
+                ]
+        finally:
+            await runner.cleanup()
+        return chunks
+
+    chunks = asyncio.run(main())
+    assert sum(map(len, chunks)) == 100_000
+    assert recorded.bytes_received["127.0.0.1"] == 100_000
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.pipeline import Pipeline, Stage
+
+
+def collect(pipeline: Pipeline) -> list:
+    async def main():
+        return [output async for output in pipeline]
+
+    return asyncio.run(main())
+
+
+async def finish_in_reverse(item: int) -> int:
+    """Later items finish first."""
+    await asyncio.sleep(0.01 * (10 - item))
+    return item
+
+
+def test_ordered_stage_keeps_input_order():
+    pipeline = Pipeline(
+        range(10), [Stage("slow", finish_in_reverse, concurrency=10, ordered=True)]
+    )
+    assert collect(pipeline) == list(range(10))
+
+
+def test_unordered_stage_emits_as_ready():
+    pipeline = Pipeline(range(10), [Stage("slow", finish_in_reverse, concurrency=10)])
+    assert collect(pipeline) == list(reversed(range(10)))
+
+
+def test_async_generator_outputs_stay_together():
+    async def split(item: int):
+        await asyncio.sleep(0.01 * (3 - item))
+        yield item
+        yield item
+
+    pipeline = Pipeline(range(3), [Stage("split", split, concurrency=3, ordered=True)])
+    assert collect(pipeline) == [0, 0, 1, 1, 2, 2]
+
+
+def test_backpressure_bounds_items_in_flight():
+    pulled, consumed, most_in_flight = 0, 0, 0
+
+    def source():
+        nonlocal pulled
+        for item in range(50):
+            pulled += 1
+            yield item
+
+    stage = Stage("double", lambda item: item * 2, concurrency=2, buffer=2)
+    pipeline = Pipeline(source(), [stage])
+
+    async def main():
+        nonlocal consumed, most_in_flight
+        async for _ in pipeline:
+            consumed += 1
+            most_in_flight = max(most_in_flight, pulled - consumed)
+            await asyncio.sleep(0.001)  # A slow consumer
+
+    asyncio.run(main())
+    assert consumed == 50
+    # The source's pending put, the inbox, the workers and the outbox
+    assert most_in_flight <= 1 + 2 + 2 + 2
+    assert stage.stats.max_queued <= 2
+    assert stage.stats.blocked > 0
+
+
+def test_stage_error_ends_the_pipeline_after_queued_items():
+    def check(item: int) -> int:
+        if item == 3:
+            raise ValueError(item)
+        return item
+
+    outputs = []
+
+    async def main():
+        pipeline = Pipeline(
+            range(10),
+            [
+                Stage("check", check, ordered=True),
+                Stage("passthrough", lambda item: item),
+            ],
+        )
+        async for output in pipeline:
+            outputs.append(output)
+
+    with pytest.raises(ValueError, match="3"):
+        asyncio.run(main())
+    assert outputs == [0, 1, 2]
+
+
+def test_source_error_is_raised():
+    def source():
+        yield 1
+        raise RuntimeError("source failed")
+
+    pipeline = Pipeline(source(), [Stage("passthrough", lambda item: item)])
+    with pytest.raises(RuntimeError, match="source failed"):
+        collect(pipeline)
+
+
+def test_threaded_stage_runs_in_the_pipelines_threads():
+    stage = Stage(
+        "thread",
+        lambda item: threading.current_thread().name,
+        concurrency=2,
+        threaded=True,
+    )
+    names = collect(Pipeline(range(4), [stage]))
+    assert all(name.startswith("pipeline") for name in names)
@@ -0,0 +1,328 @@
+import base64
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from nacl.public import PrivateKey, SealedBox
+
+SECRETS_PATH = "/repos/owner/repo/actions/secrets"
+
+
+class GitHubStub(ThreadingHTTPServer):
+    """The repository secrets endpoints of the GitHub API, for `owner/repo`."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SecretsHandler)
+        self.url = f"http://127.0.0.1:{self.server_port}"
+        self.private_key = PrivateKey.generate()
+        self.secrets: dict[str, str] = {}  # Decrypted values
+        self.failing: set[str] = set()
+        self.requests: list[tuple[str, str, str]] = []  # Method, path, Authorization
+        self.lock = threading.Lock()
+
+    def requested(self, method: str, path: str) -> int:
+        return sum(request[:2] == (method, path) for request in self.requests)
+
+
+class _SecretsHandler(BaseHTTPRequestHandler):
+    server: GitHubStub
+
+    def do_GET(self):
+        path = self._record()
+        if path == SECRETS_PATH:
+            with self.server.lock:
+                names = sorted(self.server.secrets)
+            self._reply(
+                200,
+                {
+                    "total_count": len(names),
+                    "secrets": [
+                        {
+                            "name": name,
+                            "created_at": "2024-01-01T00:00:00Z",
+                            "updated_at": "2024-01-01T00:00:00Z",
+                        }
+                        for name in names
+                    ],
+                },
+            )
+        elif path == f"{SECRETS_PATH}/public-key":
+            public_key = bytes(self.server.private_key.public_key)
+            self._reply(
+                200, {"key_id": "1", "key": base64.b64encode(public_key).decode()}
+            )
+        else:
+            self._reply(404, {"message": "Not Found"})
+
+    def do_PUT(self):
+        path = self._record()
+        name = path.removeprefix(f"{SECRETS_PATH}/")
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not path.startswith(f"{SECRETS_PATH}/") or body.get("key_id") != "1":
+            self._reply(404, {"message": "Not Found"})
+            return
+        if name in self.server.failing:
+            self._reply(422, {"message": "Unprocessable"})
+            return
+        encrypted = base64.b64decode(body["encrypted_value"])
+        value = SealedBox(self.server.private_key).decrypt(encrypted).decode()
+        with self.server.lock:
+            existed = name in self.server.secrets
+            self.server.secrets[name] = value
+        self._reply(204 if existed else 201)
+
+    def _record(self) -> str:
+        path = self.path.partition("?")[0]
+        with self.server.lock:
+            self.server.requests.append(
+                (self.command, path, self.headers.get("Authorization", ""))
+            )
+        return path
+
+    def _reply(self, status: int, body: dict | None = None):
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def github():
+    server = GitHubStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def secrets_manager(deploy_modules, monkeypatch, tmp_path):
+    secrets_manager = deploy_modules("secrets_manager")
+    monkeypatch.setattr(secrets_manager, "_index", None)
+    # The discovery index is cached in the working directory
+    monkeypatch.chdir(tmp_path)
+    return secrets_manager
+
+
+@pytest.fixture
+def git(deploy_modules, secrets_manager, github, monkeypatch, tmp_path):
+    """`secrets_manager.git` talking to `github`, with an empty manifest."""
+    git = deploy_modules("secrets_manager.git")
+    monkeypatch.setattr(git.config.git, "API_URL", github.url)
+    monkeypatch.setattr(git, "_clients", {})
+    monkeypatch.setattr(
+        git, "_manifest", git._SecretsManifest(tmp_path / "manifest.json")
+    )
+    return git
+
+
+@pytest.fixture
+def saved_blocks(deploy_modules, monkeypatch) -> dict[str, str]:
+    """Names and tokens of the GitHub credentials blocks saved, instead of saving them."""
+    blocks = deploy_modules("secrets_manager.blocks")
+    saved = {}
+
+    class GitHubCredentials:
+        def __init__(self, token: str):
+            self.token = token
+
+        def save(self, name: str, overwrite: bool = False):
+            saved[name] = self.token
+
+    monkeypatch.setattr(blocks, "GitHubCredentials", GitHubCredentials)
+    return saved
+
+
+def new_run(git):
+    """Forget the clients and reload the manifest, as the next `push_secrets` run would."""
+    git._clients.clear()
+    git._manifest = git._SecretsManifest(git._manifest.path)
+
+
+def upsert_all(git, secrets: dict[str, str | None]) -> Counter:
+    return Counter(
+        git._upsert_github_secret(name, value, repo_name="owner/repo")
+        for name, value in secrets.items()
+    )
+
+
+def test_upsert_outcomes(git, github):
+    github.secrets["EXISTING"] = "old"
+    github.failing.add("BROKEN")
+    secrets = {"NEW": "a", "EXISTING": "b", "BROKEN": "c", "MISSING": None}
+
+    assert upsert_all(git, secrets) == Counter(created=1, updated=1, failed=2)
+    assert github.secrets == {"NEW": "a", "EXISTING": "b"}
+    # One client for every upsert, authenticated with the token
+    assert github.requested("GET", SECRETS_PATH) == 1
+    assert all(auth.endswith(" test-token") for *_, auth in github.requests)
+
+    new_run(git)
+    assert upsert_all(git, secrets) == Counter(skipped=2, failed=2)
+
+
+def test_changed_value_is_updated(git, github):
+    assert upsert_all(git, {"TOKEN": "a"}) == Counter(created=1)
+    new_run(git)
+    assert upsert_all(git, {"TOKEN": "b"}) == Counter(updated=1)
+    assert github.secrets["TOKEN"] == "b"
+
+
+def test_manifest_skips_only_existing_secrets(git, github):
+    assert upsert_all(git, {"TOKEN": "a"}) == Counter(created=1)
+
+    # Deleted in the repository settings, the manifest alone doesn't skip it
+    del github.secrets["TOKEN"]
+    new_run(git)
+    assert upsert_all(git, {"TOKEN": "a"}) == Counter(created=1)
+    assert github.secrets == {"TOKEN": "a"}
+
+
+def test_manifest_doesnt_store_values(git):
+    upsert_all(git, {"TOKEN": "hunter2"})
+    assert "hunter2" not in git._manifest.path.read_text()
+
+
+def test_execute_all_modules(secrets_manager, git, github, saved_blocks):
+    github.secrets["DOCKER_USERNAME"] = "someone-else"
+
+    summary = secrets_manager.execute_all_modules(max_workers=4)
+
+    assert summary == Counter(created=7, updated=2)
+    assert github.secrets["GIT_ACCESS_TOKEN"] == "test-token"
+    assert github.secrets["DOCKER_USERNAME"] == "test-user"
+    assert len(github.secrets) == 8
+    assert github.requested("GET", SECRETS_PATH) == 1
+    assert saved_blocks == {"test-credentials": "test-token"}
+
+    new_run(git)
+    assert secrets_manager.execute_all_modules(max_workers=4) == Counter(
+        skipped=8, updated=1
+    )
+
+
+def test_format_summary(secrets_manager):
+    summary = Counter(created=1, skipped=2, done=1)
+    assert (
+        secrets_manager.format_summary(summary)
+        == "Secrets: 1 created, 0 updated, 2 skipped, 0 failed, 1 done"
+    )
+
+
+def test_push_secrets_exit_code(deploy_modules, git, github, capsys):
+    push_secrets = deploy_modules("push_secrets")
+
+    assert push_secrets.main(["upsert_git_repository_link"]) == 0
+    assert "1 created" in capsys.readouterr().out
+
+    github.failing.add("GIT_ACCESS_TOKEN")
+    assert push_secrets.main(["upsert_git_access_token"]) == 1
+    assert "1 failed" in capsys.readouterr().out
+
+    assert push_secrets.main(["upsert_nothing"]) == 0
+    assert "No modules found" in capsys.readouterr().out
+
+
+def test_push_one_secret_imports_only_its_module(deploy_modules, git, monkeypatch):
+    push_secrets = deploy_modules("push_secrets")
+    monkeypatch.delitem(sys.modules, "secrets_manager.blocks", raising=False)
+
+    assert push_secrets.main(["upsert_git_repository_link"]) == 0
+    assert "secrets_manager.blocks" not in sys.modules
+
+
+@pytest.fixture
+def modules(tmp_path):
+    """A folder of secrets modules for the discovery index."""
+    folder = tmp_path / "modules"
+    folder.mkdir()
+    (folder / "__init__.py").write_text("")
+    (folder / "a.py").write_text(
+        "def upsert_a():\n    pass\n\n\ndef _helper():\n    pass\n"
+    )
+    (folder / "b.py").write_text("def upsert_b():\n    pass\n")
+    return folder
+
+
+@pytest.fixture
+def scanned(secrets_manager, monkeypatch) -> list[bytes]:
+    """Sources the discovery index scans."""
+    sources, scan = [], secrets_manager._scan_functions
+
+    def scan_functions(source: bytes) -> list[str]:
+        sources.append(source)
+        return scan(source)
+
+    monkeypatch.setattr(secrets_manager, "_scan_functions", scan_functions)
+    return sources
+
+
+def load_index(secrets_manager, modules) -> dict[str, list[str]]:
+    """Index `modules` as a new `push_secrets` run would, with the index cached next to them."""
+    return secrets_manager._load_index(modules.parent / "index.json", modules)
+
+
+def cached_index(modules) -> dict:
+    return json.loads((modules.parent / "index.json").read_text())
+
+
+def test_index_is_cached(secrets_manager, modules, scanned):
+    index = {"a": ["upsert_a"], "b": ["upsert_b"]}
+    assert load_index(secrets_manager, modules) == index
+    assert len(scanned) == 2
+
+    assert load_index(secrets_manager, modules) == index
+    assert len(scanned) == 2
+
+
+def test_touched_module_isnt_scanned(secrets_manager, modules, scanned):
+    load_index(secrets_manager, modules)
+    stat = (modules / "a.py").stat()
+    mtime_ns = stat.st_mtime_ns + 10**9
+    os.utime(modules / "a.py", ns=(stat.st_atime_ns, mtime_ns))
+
+    assert load_index(secrets_manager, modules)["a"] == ["upsert_a"]
+    assert len(scanned) == 2
+    assert cached_index(modules)["modules"]["a"]["mtime_ns"] == mtime_ns
+
+
+def test_changed_module_is_scanned(secrets_manager, modules, scanned):
+    load_index(secrets_manager, modules)
+    (modules / "a.py").write_text(
+        "def upsert_a():\n    pass\n\n\ndef upsert_c():\n    pass\n"
+    )
+
+    assert load_index(secrets_manager, modules)["a"] == ["upsert_a", "upsert_c"]
+    assert len(scanned) == 3
+
+
+def test_deleted_module_leaves_the_index(secrets_manager, modules, scanned):
+    load_index(secrets_manager, modules)
+    (modules / "b.py").unlink()
+
+    assert load_index(secrets_manager, modules) == {"a": ["upsert_a"]}
+    assert list(cached_index(modules)["modules"]) == ["a"]
+    assert len(scanned) == 2
+
+
+def test_index_of_another_version_is_ignored(secrets_manager, modules, scanned):
+    load_index(secrets_manager, modules)
+    index_path = modules.parent / "index.json"
+    index_path.write_text(json.dumps({**cached_index(modules), "version": 0}))
+
+    assert load_index(secrets_manager, modules) == {
+        "a": ["upsert_a"],
+        "b": ["upsert_b"],
+    }
+    assert len(scanned) == 4
+    assert cached_index(modules)["version"] == secrets_manager._INDEX_VERSION
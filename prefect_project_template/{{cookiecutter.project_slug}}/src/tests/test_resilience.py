@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from utils.requests import (
+    CircuitBreaker,
+    CircuitBreakers,
+    CircuitOpenError,
+    RetryBudget,
+    RetryPolicy,
+    ServerError,
+    make_request,
+    with_session,
+)
+from utils.requests.breaker import CircuitState
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list[float]:
+    """`time.monotonic`, moved forward by adding to `clock[0]`."""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_breaker_opens_on_failures_and_closes_after_a_probe(clock):
+    breaker = CircuitBreaker(
+        failure_threshold=0.5, min_requests=4, window=30, open_for=10
+    )
+    for failed in (False, True, False):
+        assert breaker.allow()
+        breaker.record(failed)
+    assert breaker.state is CircuitState.CLOSED  # Too few requests to judge
+
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10
+
+    clock[0] += 10
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # A single probe at a time
+    breaker.record(False)
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.stats().opened == 1
+    assert breaker.stats().rejected == 2
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(min_requests=1, open_for=10)
+    breaker.allow()
+    breaker.record(True)
+    clock[0] += 10
+
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.stats().opened == 2
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = CircuitBreaker(min_requests=2, window=30)
+    breaker.allow()
+    breaker.record(True)
+    clock[0] += 31
+    breaker.allow()
+    breaker.record(True)
+
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.stats().requests == 1
+
+
+def test_budget_denies_retries_once_spent(clock):
+    budget = RetryBudget(ratio=0.5, window=10, min_per_second=0)
+    for _ in range(4):
+        budget.record_request()
+
+    assert [budget.try_retry() for _ in range(3)] == [True, True, False]
+    assert budget.stats().denied == 1
+
+    # Requests and retries leave the window, new requests refill it
+    clock[0] += 11
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_retry()
+
+
+class FailingServer:
+    def __init__(self):
+        self.requests = 0
+
+    async def handler(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        return web.Response(status=500)
+
+
+async def request_failing_server(server: FailingServer, times: int, **kwargs) -> list:
+    """Send `times` requests to `server`, returning the error of each."""
+    app = web.Application()
+    app.router.add_get("/", server.handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    errors = []
+    try:
+        async with with_session() as session:
+            for _ in range(times):
+                try:
+                    await make_request(
+                        session, "GET", f"http://127.0.0.1:{port}/", **kwargs
+                    )
+                except Exception as e:
+                    errors.append(e)
+    finally:
+        await runner.cleanup()
+    return errors
+
+
+def test_exhausted_budget_stops_retries():
+    server = FailingServer()
+    budget = RetryBudget(ratio=1.0, window=60, min_per_second=0)
+    policy = RetryPolicy(max_attempts=3, wait_min=0, wait_max=0, logger=None)
+
+    errors = asyncio.run(
+        request_failing_server(server, 1, retry_policy=policy, retry_budget=budget)
+    )
+
+    assert [type(e) for e in errors] == [ServerError]
+    assert server.requests == 2  # The budget only had one of the two retries
+    assert (budget.stats().retries, budget.stats().denied) == (1, 1)
+
+
+def test_open_circuit_fails_fast():
+    server = FailingServer()
+    breakers = CircuitBreakers(min_requests=2, open_for=60)
+
+    errors = asyncio.run(
+        request_failing_server(server, 4, retry=False, circuit_breakers=breakers)
+    )
+
+    assert [type(e) for e in errors] == [ServerError] * 2 + [CircuitOpenError] * 2
+    assert server.requests == 2
+    assert breakers.stats()["127.0.0.1"].state is CircuitState.OPEN
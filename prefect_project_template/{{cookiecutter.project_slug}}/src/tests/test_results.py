@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+
+import pytest
+from prefect.serializers import PickleSerializer
+
+from core.models import Contributor, ContributorDelta, Repository, RepoSummary
+from utils.results import MsgpackSerializer
+
+CONTRIBUTORS = [
+    Contributor(contributions=1000 - i, id=1_000_000 + i, login=f"contributor-{i}")
+    for i in range(1000)
+]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        CONTRIBUTORS,
+        Repository(full_name="owner/repo", stargazers_count=1, contributors_url="u"),
+        RepoSummary(full_name="owner/repo", stargazers_count=1, error="boom"),
+        ContributorDelta(full_name="owner/repo", added=CONTRIBUTORS[:2], total=2),
+        {"repos": ["owner/repo"], "count": 1, "score": 0.5},
+        [],
+        None,
+    ],
+)
+def test_round_trip(value):
+    serializer = MsgpackSerializer()
+    loaded = serializer.loads(serializer.dumps(value))
+    assert loaded == value
+    assert type(loaded) is type(value)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        (1, 2),
+        {1, 2},
+        datetime(2024, 1, 1),
+        {"pushed": datetime.now(timezone.utc), "ids": (1, 2)},
+    ],
+)
+def test_values_msgpack_would_change_are_pickled(value):
+    serializer = MsgpackSerializer()
+    loaded = serializer.loads(serializer.dumps(value))
+    assert loaded == value
+    assert type(loaded) is type(value)
+
+
+def test_structs_are_smaller_than_pickle():
+    msgpack_size = len(MsgpackSerializer().dumps(CONTRIBUTORS))
+    assert msgpack_size < len(PickleSerializer().dumps(CONTRIBUTORS))
@@ -0,0 +1,77 @@
+from core.models import Contributor, ContributorChange
+from core.snapshots import ContributorSnapshots
+
+PUSHED_AT = "2024-01-01T00:00:00Z"
+
+
+def contributors(counts: dict[int, int]) -> list[Contributor]:
+    return [
+        Contributor(
+            contributions=count, id=contributor_id, login=f"user{contributor_id}"
+        )
+        for contributor_id, count in counts.items()
+    ]
+
+
+def test_first_sync_adds_everyone(tmp_path):
+    snapshots = ContributorSnapshots(tmp_path)
+    assert snapshots.is_empty()
+
+    delta = snapshots.sync("owner/repo", contributors({1: 10, 2: 5}), PUSHED_AT)
+
+    assert delta.initial and delta.total == 2
+    assert [c.id for c in delta.added] == [1, 2]
+    assert not snapshots.is_empty()
+
+
+def test_delta_against_the_last_sync(tmp_path):
+    snapshots = ContributorSnapshots(tmp_path)
+    snapshots.sync("owner/repo", contributors({1: 10, 2: 5, 3: 1}), PUSHED_AT)
+
+    delta = snapshots.sync("owner/repo", contributors({1: 12, 2: 5, 4: 1}), PUSHED_AT)
+
+    assert not delta.initial
+    assert [c.id for c in delta.added] == [4]
+    assert delta.removed == [3]
+    assert delta.changed == [
+        ContributorChange(id=1, before=10, after=12, login="user1")
+    ]
+    assert delta.total == 3
+
+    # Replayed from the base and its log, as the next run reads it
+    reloaded = ContributorSnapshots(tmp_path)
+    assert reloaded.load("owner/repo").counts == {1: 12, 2: 5, 4: 1}
+    assert reloaded.sync("owner/repo", contributors({1: 12, 2: 5, 4: 1})).empty
+
+
+def test_compaction_keeps_the_log_bounded(tmp_path):
+    snapshots = ContributorSnapshots(tmp_path, min_compaction_bytes=1)
+    base_path, log_path = snapshots._paths("owner/repo")
+    counts = {contributor_id: 1 for contributor_id in range(100)}
+
+    for sync in range(50):
+        counts = {contributor_id: count + 1 for contributor_id, count in counts.items()}
+        snapshots.sync("owner/repo", contributors(counts))
+        log_size = log_path.stat().st_size if log_path.exists() else 0
+        # At most one update past the size of the base that triggers a compaction
+        assert log_size <= 2 * base_path.stat().st_size + 64
+
+    snapshot = snapshots.load("owner/repo")
+    assert snapshot.counts == counts
+    assert snapshot.generation > 10
+
+
+def test_incomplete_update_is_dropped(tmp_path):
+    snapshots = ContributorSnapshots(tmp_path)
+    snapshots.sync("owner/repo", contributors({1: 10}))
+    snapshots.sync("owner/repo", contributors({1: 11}))
+    _, log_path = snapshots._paths("owner/repo")
+    with open(log_path, "ab") as file:
+        file.write(b"\x00\x00\x01\x00partial")  # Crashed while appending
+
+    assert snapshots.load("owner/repo").counts == {1: 11}
+    delta = snapshots.sync("owner/repo", contributors({1: 12}))
+    assert delta.changed == [
+        ContributorChange(id=1, before=11, after=12, login="user1")
+    ]
+    assert ContributorSnapshots(tmp_path).load("owner/repo").counts == {1: 12}
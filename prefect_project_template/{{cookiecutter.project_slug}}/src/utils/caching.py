@@ -0,0 +1,98 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Mapping
+
+from prefect import task
+from prefect.cache_policies import CachePolicy
+from prefect.context import TaskRunContext
+
+from utils.requests import HTTPCache, RequestSpec, request_key
+
+__all__ = ["RequestCachePolicy", "cached_request_task"]
+
+
+@dataclass
+class RequestCachePolicy(CachePolicy):
+    """
+    Cache key built from the request a task sends instead of its raw inputs.
+
+    `request` receives the task's parameters and returns the URL (or `RequestSpec`)
+    the task fetches. The key covers the task's code, the method, the normalized
+    URL and params, and a hash of the `Accept`/`Authorization` headers, so two
+    credentials never share results; pass the same `headers` the task's session
+    sends. With `validate=True` the key also includes the ETag that `http_cache`
+    holds for the request, so results are only reused while that response is
+    fresh. Otherwise the task runs and its own request revalidates the entry,
+    usually with a cheap 304. That needs an `http_cache` stored on disk, a new
+    process would never find validators kept in memory and never reuse a result.
+    """
+
+    request: Callable[..., RequestSpec | str] | None = None
+    headers: Mapping[str, str] | None = None
+    validate: bool = False
+    http_cache: HTTPCache | None = None
+
+    def __post_init__(self) -> None:
+        if self.validate and (
+            self.http_cache is None or self.http_cache.directory is None
+        ):
+            raise ValueError(
+                "validate=True needs an http_cache with a directory, so that "
+                "its validators outlive the process"
+            )
+
+    def compute_key(
+        self,
+        task_ctx: TaskRunContext,
+        inputs: dict[str, Any],
+        flow_parameters: dict[str, Any],
+        **kwargs: Any,
+    ) -> str | None:
+        spec = self.request(**inputs)
+        if isinstance(spec, str):
+            spec = RequestSpec(url=spec)
+        headers = {**(self.headers or {}), **(spec.options.get("headers") or {})}
+        key = request_key(spec.method, spec.url, spec.options.get("params"), headers)
+
+        if self.validate:
+            validator = self.http_cache.fresh_validator(
+                spec.method, spec.url, spec.options.get("params"), headers
+            )
+            if validator is None:
+                return None  # Nothing fresh to validate against, don't trust the cache
+            key = f"{key} {validator}"
+
+        return hashlib.sha256(f"{task_ctx.task.task_key} {key}".encode()).hexdigest()
+
+
+def cached_request_task(
+    request: Callable[..., RequestSpec | str],
+    *,
+    expiration: timedelta | None = None,
+    validate: bool = False,
+    headers: Mapping[str, str] | None = None,
+    http_cache: HTTPCache | None = None,
+    **task_kwargs: Any,
+) -> Callable[[Callable[..., Any]], Any]:
+    """
+    `@task` whose results are reused while the request it sends stays the same.
+
+        @cached_request_task(lambda owner, name: f"{API}/repos/{owner}/{name}")
+        async def get_repo(owner: str, name: str) -> Repository: ...
+
+    Results are persisted and reused for `expiration` (forever when `None`),
+    across retries, reruns and overlapping flow runs. See `RequestCachePolicy`
+    for `validate`, `headers` and `http_cache`; other kwargs go to `@task`.
+    """
+    return task(
+        cache_policy=RequestCachePolicy(
+            request=request,
+            headers=headers,
+            validate=validate,
+            http_cache=http_cache,
+        ),
+        cache_expiration=expiration,
+        persist_result=True,
+        **task_kwargs,
+    )
@@ -1,25 +1,205 @@
+import atexit
+import copy
 import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import msgspec
+
 from settings import config
 
 
-__all__ = ["setup_logger", "get_log_format"]
+__all__ = [
+    "setup_logger",
+    "shutdown_logger",
+    "get_log_format",
+    "JSONFormatter",
+    "RateLimitFilter",
+]
+
+_setup_lock = threading.Lock()
+
+# Distinct messages `RateLimitFilter` tracks before forgetting expired ones
+_MAX_RATE_LIMIT_WINDOWS = 1024
 
 
 def get_log_format() -> str:
     return "%(asctime)s - %(levelname)s - %(message)s"
 
 
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `limit` identical records every `period` seconds.
+
+    Records are grouped by logger, level and formatted message, so a retry
+    message repeated for every request of a burst is limited while distinct
+    messages logged from the same line all go through. Warnings and errors are
+    never dropped. The first record let through after some were dropped
+    carries how many as `record.suppressed`, and `flush` returns the counts
+    still pending once logging stops.
+    """
+
+    def __init__(self, limit: int, period: float):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        # Message -> [window start, records let through, records dropped, last dropped]
+        self._windows: dict[tuple[str, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                if len(self._windows) >= _MAX_RATE_LIMIT_WINDOWS:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0, None]
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                return True
+            if window[1] < self.limit:
+                window[1] += 1
+                return True
+            window[2] += 1
+            window[3] = record
+            return False
+
+    def flush(self) -> list[logging.LogRecord]:
+        """Forget every window, returning the last dropped record of each with its count."""
+        with self._lock:
+            windows, self._windows = self._windows, {}
+        records = []
+        for _, _, suppressed, record in windows.values():
+            if suppressed:
+                record.suppressed = suppressed
+                records.append(record)
+        return records
+
+    def _prune(self, now: float) -> None:
+        # Messages logged once, like one per repository, would otherwise pile up
+        self._windows = {
+            key: window
+            for key, window in self._windows.items()
+            if window[2] or now - window[0] < self.period
+        }
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, encoded with msgspec."""
+
+    _encoder = msgspec.json.Encoder()
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return self._encoder.encode(entry).decode()
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            return f"{text} ({suppressed} similar messages suppressed)"
+        return text
+
+
+class _QueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.SimpleQueue, listener: QueueListener):
+        super().__init__(log_queue)
+        self.queue_listener = listener
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments, which may change once we return, and leave
+        # formatting the message and traceback to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
 def setup_logger() -> logging.Logger:
+    """
+    Log the app's records to stderr from a background thread.
+
+    The logger only puts records on a queue, so code running on the event loop
+    never waits on formatting or writes; a `QueueListener` thread does both.
+    Repeated records below WARNING are rate limited (see `RateLimitFilter`) and
+    `LOGGING_JSON=true` switches to JSON lines. Calling it again is a no-op.
+    """
     logger = logging.getLogger(config.app.SLUG)
-    console_handler = logging.StreamHandler()
 
     if config.app.DEBUG is True:
         logger.setLevel(logging.DEBUG)
     else:
         logger.setLevel(logging.INFO)
 
-    console_formatter = logging.Formatter(get_log_format())
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    with _setup_lock:
+        if _installed_handler(logger) is not None:
+            return logger
+
+        console_handler = logging.StreamHandler()
+        if config.logging.JSON:
+            console_handler.setFormatter(JSONFormatter())
+        else:
+            console_handler.setFormatter(_TextFormatter(get_log_format()))
+
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        queue_handler = _QueueHandler(log_queue, listener)
+        if config.logging.RATE_LIMIT > 0:
+            queue_handler.addFilter(
+                RateLimitFilter(
+                    config.logging.RATE_LIMIT, config.logging.RATE_LIMIT_PERIOD
+                )
+            )
+
+        listener.start()
+        logger.addHandler(queue_handler)
+        atexit.register(shutdown_logger)
 
     return logger
+
+
+def shutdown_logger() -> None:
+    """Write out the queued records and remove the handler `setup_logger` added."""
+    logger = logging.getLogger(config.app.SLUG)
+    with _setup_lock:
+        queue_handler = _installed_handler(logger)
+        if queue_handler is None:
+            return
+        logger.removeHandler(queue_handler)
+        # Report what the rate limit dropped since the last record let through
+        for log_filter in queue_handler.filters:
+            if isinstance(log_filter, RateLimitFilter):
+                for record in log_filter.flush():
+                    queue_handler.emit(record)
+        queue_handler.queue_listener.stop()
+
+
+def _installed_handler(logger: logging.Logger) -> _QueueHandler | None:
+    # Looked up on the logger, the module may be imported more than once
+    for handler in logger.handlers:
+        if hasattr(handler, "queue_listener"):
+            return handler
+    return None
@@ -1,4 +1,36 @@
-from .requests import create_session, with_session, make_request, RetryPolicy
+from .sessions import (
+    SessionPool,
+    session_pool,
+    create_session,
+    with_session,
+    close_pooled_sessions,
+)
+from .breaker import (
+    CircuitBreaker,
+    CircuitBreakers,
+    CircuitBreakerStats,
+    CircuitState,
+)
+from .budget import RetryBudget, RetryBudgetStats
+from .cache import HTTPCache, CachedResponse, CacheStats
+from .checkpoint import CheckpointStore, CrawlCheckpoint, CrawlCursor
+from .coalesce import RequestCoalescer, CoalescerStats
+from .hedge import RequestHedger, HedgeStats
+from .keys import request_key
+from .metrics import Histogram, RequestMetrics, request_metrics
+from .ratelimit import RateLimiter, TokenBucket, RateLimiterStats
+from .requests import (
+    make_request,
+    make_requests,
+    gather_requests,
+    paginate_requests,
+    parse_link_header,
+    RetryPolicy,
+    RequestSpec,
+    RequestOutcome,
+    BulkResult,
+)
+from .streaming import stream_request, stream_json_items, download_to_file
 from .exceptions import (
     RequestError,
     RequestHTTPError,
@@ -9,13 +41,50 @@ from .exceptions import (
     ContentTooLargeError,
     UnprocessableEntityError,
     RateLimitError,
+    CircuitOpenError,
 )
 
 __all__ = [
+    "SessionPool",
+    "session_pool",
     "create_session",
     "with_session",
+    "close_pooled_sessions",
     "make_request",
+    "make_requests",
+    "gather_requests",
+    "paginate_requests",
+    "stream_request",
+    "stream_json_items",
+    "download_to_file",
+    "parse_link_header",
     "RetryPolicy",
+    "RequestSpec",
+    "RequestOutcome",
+    "BulkResult",
+    "HTTPCache",
+    "CachedResponse",
+    "CacheStats",
+    "CircuitBreaker",
+    "CircuitBreakers",
+    "CircuitBreakerStats",
+    "CircuitState",
+    "RetryBudget",
+    "RetryBudgetStats",
+    "CheckpointStore",
+    "CrawlCheckpoint",
+    "CrawlCursor",
+    "RequestCoalescer",
+    "CoalescerStats",
+    "RequestHedger",
+    "HedgeStats",
+    "request_key",
+    "Histogram",
+    "RequestMetrics",
+    "request_metrics",
+    "RateLimiter",
+    "TokenBucket",
+    "RateLimiterStats",
     "RequestError",
     "RequestHTTPError",
     "ServerError",
@@ -25,4 +94,5 @@ __all__ = [
     "ContentTooLargeError",
     "UnprocessableEntityError",
     "RateLimitError",
+    "CircuitOpenError",
 ]
@@ -0,0 +1,249 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+
+from yarl import URL
+
+from .exceptions import CircuitOpenError, ClientError, RequestError
+from .metrics import _counter_lines, _gauge_lines
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitBreakers",
+    "CircuitBreakerStats",
+    "CircuitState",
+    "counts_as_failure",
+]
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass(kw_only=True, slots=True)
+class CircuitBreakerStats:
+    state: CircuitState
+    requests: int  # Outcomes in the current window
+    failure_rate: float  # Of those outcomes
+    opened: int = 0  # Times the circuit opened
+    rejected: int = 0  # Requests failed fast while it was open
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """Server errors and failed connections count against a host, 4xx responses don't."""
+    return isinstance(error, RequestError) and not isinstance(
+        error, (ClientError, CircuitOpenError)
+    )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one host.
+
+    Closed, it lets every request through and keeps their outcomes over the last
+    `window` seconds; once it saw at least `min_requests` and `failure_threshold`
+    of them failed, it opens. Open, requests fail fast with `CircuitOpenError`
+    for `open_for` seconds. Then it is half-open: `half_open_requests` probes go
+    through, a success closes it again and a failure reopens it.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: float = 0.5,
+        min_requests: int = 20,
+        window: float = 30.0,
+        open_for: float = 30.0,
+        half_open_requests: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.open_for = open_for
+        self.half_open_requests = half_open_requests
+
+        # Requests of every task-runner thread go through the same breaker
+        self._lock = threading.Lock()
+        self._outcomes: deque[tuple[float, bool]] = deque()  # (time, failed)
+        self._failures = 0
+        self._state = CircuitState.CLOSED
+        self._changed_at = time.monotonic()
+        self._probes = 0
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._update_state(time.monotonic())
+            return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through, 0 if it would now."""
+        with self._lock:
+            now = time.monotonic()
+            self._update_state(now)
+            if self._state is CircuitState.CLOSED:
+                return 0.0
+            if self._state is CircuitState.OPEN:
+                return self._changed_at + self.open_for - now
+            return 0.0 if self._probes < self.half_open_requests else self.open_for
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; a half-open circuit counts it as a probe."""
+        with self._lock:
+            now = time.monotonic()
+            self._update_state(now)
+            if self._state is CircuitState.CLOSED:
+                return True
+            if (
+                self._state is CircuitState.HALF_OPEN
+                and self._probes < self.half_open_requests
+            ):
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record(self, failed: bool) -> None:
+        """Record the outcome of a request that `allow` let through."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state is CircuitState.HALF_OPEN:
+                self._transition(
+                    CircuitState.OPEN if failed else CircuitState.CLOSED, now
+                )
+                return
+            if self._state is CircuitState.OPEN:
+                return  # Sent before the circuit opened
+
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            self._prune(now)
+            if len(
+                self._outcomes
+            ) >= self.min_requests and self._failures >= self.failure_threshold * len(
+                self._outcomes
+            ):
+                self._transition(CircuitState.OPEN, now)
+
+    def stats(self) -> CircuitBreakerStats:
+        with self._lock:
+            now = time.monotonic()
+            self._update_state(now)
+            self._prune(now)
+            requests = len(self._outcomes)
+            return CircuitBreakerStats(
+                state=self._state,
+                requests=requests,
+                failure_rate=self._failures / requests if requests else 0.0,
+                opened=self._opened,
+                rejected=self._rejected,
+            )
+
+    def _update_state(self, now: float) -> None:
+        if self._state is CircuitState.OPEN and now - self._changed_at >= self.open_for:
+            self._transition(CircuitState.HALF_OPEN, now)
+        elif (
+            self._state is CircuitState.HALF_OPEN
+            and now - self._changed_at >= self.open_for
+        ):
+            # Probes that never reported back (e.g. cancelled) don't block it forever
+            self._transition(CircuitState.HALF_OPEN, now)
+
+    def _transition(self, state: CircuitState, now: float) -> None:
+        if state is CircuitState.OPEN:
+            self._opened += 1
+        self._state = state
+        self._changed_at = now
+        self._probes = 0
+        self._outcomes.clear()
+        self._failures = 0
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+
+class CircuitBreakers:
+    """
+    One `CircuitBreaker` per host, all created with the same options.
+
+    Pass it to `make_request(..., circuit_breakers=...)`: every attempt first asks
+    the breaker of its host and fails fast with `CircuitOpenError` while it is
+    open, so concurrent requests stop piling retries onto a failing upstream.
+    """
+
+    def __init__(self, **breaker_options: float):
+        self.breaker_options = breaker_options
+        self._lock = threading.Lock()
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = URL(url).host or ""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(**self.breaker_options)
+            return breaker
+
+    def check(self, method: str, url: str) -> CircuitBreaker:
+        """The breaker of `url`'s host, raising `CircuitOpenError` if it doesn't allow a request."""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            host = URL(url).host or ""
+            retry_in = breaker.retry_in()
+            raise CircuitOpenError(
+                message=f"Circuit open for {host}, not sending {method} {url} "
+                f"(next probe in {retry_in:.0f}s)",
+                response_content=None,
+                method=method,
+                url=url,
+                host=host,
+                retry_in=retry_in,
+            )
+        return breaker
+
+    def stats(self) -> dict[str, CircuitBreakerStats]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.stats() for host, breaker in sorted(breakers.items())}
+
+    def to_prometheus(self, prefix: str = "http_client") -> str:
+        """Render the state of every breaker in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        _gauge_lines(
+            lines,
+            f"{prefix}_circuit_state",
+            "1 for the current state of the circuit breaker of each host.",
+            {
+                (("host", host), ("state", state.value)): float(s.state is state)
+                for host, s in stats.items()
+                for state in CircuitState
+            },
+        )
+        _gauge_lines(
+            lines,
+            f"{prefix}_circuit_failure_rate",
+            "Failure rate over the circuit breaker's sliding window.",
+            {(("host", host),): s.failure_rate for host, s in stats.items()},
+        )
+        _counter_lines(
+            lines,
+            f"{prefix}_circuit_opened_total",
+            "Times the circuit breaker opened.",
+            {(("host", host),): s.opened for host, s in stats.items()},
+        )
+        _counter_lines(
+            lines,
+            f"{prefix}_circuit_rejected_total",
+            "Requests failed fast while the circuit was open.",
+            {(("host", host),): s.rejected for host, s in stats.items()},
+        )
+        return "\n".join(lines) + "\n"
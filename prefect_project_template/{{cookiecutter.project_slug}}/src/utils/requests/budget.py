@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from .metrics import _counter_lines, _gauge_lines
+
+__all__ = ["RetryBudget", "RetryBudgetStats"]
+
+
+@dataclass(kw_only=True, slots=True)
+class RetryBudgetStats:
+    requests: int = 0  # First attempts
+    retries: int = 0  # Retries the budget allowed
+    denied: int = 0  # Retries it refused
+    available: float = 0.0  # Retries it would allow right now
+
+
+class RetryBudget:
+    """
+    Retries shared by every request, capped to `ratio` of the requests sent over
+    the last `window` seconds plus `min_per_second` so a quiet client can still
+    retry. When an upstream degrades, retries then stay a fraction of the
+    traffic instead of multiplying it by `RetryPolicy.max_attempts`.
+    """
+
+    def __init__(
+        self, *, ratio: float = 0.2, window: float = 10.0, min_per_second: float = 1.0
+    ):
+        self.ratio = ratio
+        self.window = window
+        self.min_per_second = min_per_second
+        self._lock = threading.Lock()
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+        self._stats = RetryBudgetStats()
+
+    def record_request(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._requests.append(now)
+            self._stats.requests += 1
+            self._prune(now)
+
+    def try_retry(self) -> bool:
+        """Spend a retry if the budget has one left."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if self._available() < 1:
+                self._stats.denied += 1
+                return False
+            self._retries.append(now)
+            self._stats.retries += 1
+            return True
+
+    def stats(self) -> RetryBudgetStats:
+        with self._lock:
+            self._prune(time.monotonic())
+            return RetryBudgetStats(
+                requests=self._stats.requests,
+                retries=self._stats.retries,
+                denied=self._stats.denied,
+                available=max(self._available(), 0.0),
+            )
+
+    def to_prometheus(self, prefix: str = "http_client") -> str:
+        """Render the budget in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        _counter_lines(
+            lines,
+            f"{prefix}_retry_budget_total",
+            "Retries allowed or denied by the retry budget.",
+            {
+                (("outcome", "allowed"),): stats.retries,
+                (("outcome", "denied"),): stats.denied,
+            },
+        )
+        _gauge_lines(
+            lines,
+            f"{prefix}_retry_budget_available",
+            "Retries the budget would allow right now.",
+            {(): stats.available},
+        )
+        return "\n".join(lines) + "\n"
+
+    def _available(self) -> float:
+        allowed = self.ratio * len(self._requests) + self.min_per_second * self.window
+        return allowed - len(self._retries)
+
+    def _prune(self, now: float) -> None:
+        for timestamps in (self._requests, self._retries):
+            while timestamps and now - timestamps[0] > self.window:
+                timestamps.popleft()
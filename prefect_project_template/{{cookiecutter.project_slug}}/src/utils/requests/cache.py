@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, Mapping
+
+import msgspec
+
+from .keys import request_key
+
+__all__ = ["HTTPCache", "CachedResponse", "CacheStats"]
+
+
+class CachedResponse(msgspec.Struct, frozen=True):
+    """A stored response body plus the validators needed to revalidate it."""
+
+    body: bytes
+    content_type: str
+    encoding: str
+    headers: dict[str, str]
+    etag: str | None = None
+    last_modified: str | None = None
+    stored_at: float = 0.0  # Unix time the response was last confirmed upstream
+
+    @property
+    def validator(self) -> str | None:
+        return self.etag or self.last_modified
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        """Whether the response is still within the `max-age` it was served with."""
+        max_age = _max_age(self.headers)
+        if max_age is None:
+            return False
+        return (time.time() if now is None else now) - self.stored_at < max_age
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass(kw_only=True, slots=True)
+class CacheStats:
+    hits: int = 0  # Served from cache after a 304
+    misses: int = 0  # Nothing usable stored, or the resource changed
+    revalidations: int = 0  # Conditional requests sent upstream
+
+
+class HTTPCache:
+    """
+    Conditional-request (ETag / Last-Modified) cache for GET responses.
+
+    Entries live in an in-memory LRU tier and, when `directory` is set, in an
+    on-disk tier that is evicted oldest-first once it grows past `max_disk_bytes`.
+    Pass it to `make_request(..., cache=...)`: stored validators are sent as
+    `If-None-Match`/`If-Modified-Since` and a 304 is answered from the cache.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        directory: str | Path | None = None,
+        max_disk_bytes: int = 100 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = CacheStats()
+
+        # The cache may be shared by tasks running in task-runner threads
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._disk_sizes: OrderedDict[str, int] | None = None  # Lazily scanned
+        self._encoder = msgspec.msgpack.Encoder()
+        self._decoder = msgspec.msgpack.Decoder(CachedResponse)
+
+    @staticmethod
+    def key(
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> str:
+        """Identify a request by method, full URL and the headers that vary it."""
+        return request_key(method, url, params, headers)
+
+    def fresh_validator(
+        self,
+        method: str,
+        url: str,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> str | None:
+        """
+        ETag (or Last-Modified) of the stored response to this request, while it
+        is fresh. Synchronous, for callers outside an event loop such as cache
+        policies; a stale or missing entry returns `None`.
+        """
+        key = self.key(method, url, params, headers)
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                data = (self.directory / _file_name(key)).read_bytes()
+            except FileNotFoundError:
+                return None
+            entry = self._decoder.decode(data)
+        if entry is None or not entry.is_fresh():
+            return None
+        return entry.validator
+
+    def record(self, event: Literal["hits", "misses", "revalidations"]) -> None:
+        with self._lock:
+            setattr(self.stats, event, getattr(self.stats, event) + 1)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        if self.directory is None:
+            return None
+        disk_sizes = await self._get_disk_sizes()
+        name = _file_name(key)
+        if name not in disk_sizes:
+            return None
+
+        data = await asyncio.to_thread(_read_and_touch, self.directory / name)
+        with self._lock:
+            if data is None:
+                disk_sizes.pop(name, None)
+                return None
+            if name in disk_sizes:
+                disk_sizes.move_to_end(name)
+
+        entry = self._decoder.decode(data)
+        self._store_in_memory(key, entry)
+        return entry
+
+    async def put(self, key: str, entry: CachedResponse) -> None:
+        self._store_in_memory(key, entry)
+
+        if self.directory is None:
+            return
+        disk_sizes = await self._get_disk_sizes()
+        name = _file_name(key)
+        data = self._encoder.encode(entry)
+        await asyncio.to_thread(_write_atomic, self.directory / name, data)
+        with self._lock:
+            disk_sizes[name] = len(data)
+            disk_sizes.move_to_end(name)
+        await self._evict_disk(disk_sizes)
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    def _store_in_memory(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    async def _get_disk_sizes(self) -> OrderedDict[str, int]:
+        if self._disk_sizes is None:
+            self._disk_sizes = await asyncio.to_thread(_scan_directory, self.directory)
+        return self._disk_sizes
+
+    async def _evict_disk(self, disk_sizes: OrderedDict[str, int]) -> None:
+        evicted = []
+        with self._lock:
+            total = sum(disk_sizes.values())
+            while total > self.max_disk_bytes and len(disk_sizes) > 1:
+                name, size = disk_sizes.popitem(last=False)
+                evicted.append(self.directory / name)
+                total -= size
+        if evicted:
+            await asyncio.to_thread(_unlink_all, evicted)
+
+
+def _max_age(headers: Mapping[str, str]) -> int | None:
+    cache_control = next(
+        (value for name, value in headers.items() if name.lower() == "cache-control"),
+        "",
+    )
+    for directive in cache_control.split(","):
+        name, _, value = directive.strip().partition("=")
+        if name.lower() == "no-cache":
+            return None
+        if name.lower() == "max-age" and value.isdigit():
+            return int(value)
+    return None
+
+
+def _file_name(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest() + ".msgpack"
+
+
+def _scan_directory(directory: Path) -> OrderedDict[str, int]:
+    """Return cached files ordered from least to most recently used."""
+    directory.mkdir(parents=True, exist_ok=True)
+    files = [
+        (entry.stat().st_mtime, entry.name, entry.stat().st_size)
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(".msgpack")
+    ]
+    return OrderedDict((name, size) for _, name, size in sorted(files))
+
+
+def _read_and_touch(path: Path) -> bytes | None:
+    try:
+        data = path.read_bytes()
+        os.utime(path)  # mtime doubles as the LRU timestamp across processes
+        return data
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _unlink_all(paths: list[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,223 @@
+import hashlib
+import os
+import shutil
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import msgspec
+
+try:
+    import fcntl
+except ImportError:  # Windows, only crawls within this process are told apart
+    fcntl = None
+
+__all__ = ["CheckpointStore", "CrawlCheckpoint", "CrawlCursor"]
+
+_FRAME_HEADER = struct.Struct(">I")  # Length of each msgpack-encoded page
+
+
+class CrawlCursor(msgspec.Struct):
+    """Where a paginated crawl stands once `pages_done` pages were yielded."""
+
+    pages_done: int = 0
+    next_url: str | None = None  # Crawls following `next` links
+    last_url: str | None = None  # Crawls whose page URLs were expanded from `last`
+    updated_at: float = 0.0
+
+
+class CrawlCheckpoint:
+    """
+    Progress of one crawl: the pages fetched so far, appended to `pages.msgpack`,
+    and the cursor saved next to them in `cursor.json`.
+
+    Pages are buffered and written out together with the cursor every
+    `interval` pages (see `add_page`) and by `flush`. The cursor is only ever
+    saved after the pages it counts, so the two can't disagree after a crash.
+    """
+
+    def __init__(self, path: Path, interval: int, release: Callable[[], None]):
+        self.path = path
+        self.interval = interval
+        self._release = release
+        self._pending: list[bytes] = []
+        try:
+            self.cursor = msgspec.json.decode(
+                (path / "cursor.json").read_bytes(), type=CrawlCursor
+            )
+        except (OSError, msgspec.DecodeError):
+            self.cursor = CrawlCursor()
+        self._saved = self.cursor
+
+    @property
+    def resumable(self) -> bool:
+        return self.cursor.pages_done > 0
+
+    def load_pages(self, response_type: Any | None = None) -> list[Any]:
+        """Decode the saved pages, dropping any written after the cursor was last saved."""
+        decoder = (
+            msgspec.msgpack.Decoder(response_type)
+            if response_type is not None
+            else msgspec.msgpack.Decoder()
+        )
+        pages, offset = [], 0
+        try:
+            with open(self.path / "pages.msgpack", "r+b") as file:
+                data = file.read()
+                while len(pages) < self.cursor.pages_done:
+                    (size,) = _FRAME_HEADER.unpack_from(data, offset)
+                    start = offset + _FRAME_HEADER.size
+                    pages.append(decoder.decode(data[start : start + size]))
+                    offset = start + size
+                file.truncate(offset)
+        except (OSError, struct.error, msgspec.DecodeError, msgspec.ValidationError):
+            # Unreadable pages can't be replayed, the crawl starts over
+            pages = []
+            self._reset()
+        return pages
+
+    def add_page(
+        self, content: Any, *, next_url: str | None = None, last_url: str | None = None
+    ) -> bool:
+        """Record a page that was yielded, returning whether it's time to `flush`."""
+        frame = msgspec.msgpack.encode(content)
+        self._pending.append(_FRAME_HEADER.pack(len(frame)) + frame)
+        self.cursor = CrawlCursor(
+            pages_done=self.cursor.pages_done + 1,
+            next_url=next_url,
+            last_url=last_url or self.cursor.last_url,
+        )
+        return len(self._pending) >= self.interval
+
+    def flush(self) -> None:
+        """Append the buffered pages and save the cursor that counts them."""
+        if not self._pending and self.cursor == self._saved:
+            return
+        with open(self.path / "pages.msgpack", "ab") as file:
+            file.write(b"".join(self._pending))
+            file.flush()
+            os.fsync(file.fileno())
+        self._pending.clear()
+
+        cursor = msgspec.structs.replace(self.cursor, updated_at=time.time())
+        tmp_path = self.path / f"cursor.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path.write_bytes(msgspec.json.encode(cursor))
+        os.replace(tmp_path, self.path / "cursor.json")
+        self._saved = self.cursor
+
+    def close(self, completed: bool = False) -> None:
+        """Save the progress so far, or delete the checkpoint once the crawl completed."""
+        try:
+            if completed:
+                shutil.rmtree(self.path, ignore_errors=True)
+            else:
+                self.flush()
+        finally:
+            self._release()
+
+    def _reset(self) -> None:
+        self._pending.clear()
+        self.cursor = self._saved = CrawlCursor()
+        (self.path / "pages.msgpack").unlink(missing_ok=True)
+        (self.path / "cursor.json").unlink(missing_ok=True)
+
+
+class CheckpointStore:
+    """
+    Directory of crawl checkpoints, so a retried crawl resumes where the failed
+    attempt stopped instead of fetching every page again.
+
+    Pass it to `paginate_requests(..., checkpoints=...)`: each crawl is keyed by
+    its request (see `request_key`) and saved every `interval` pages and when it
+    fails. A completed crawl deletes its checkpoint, and checkpoints left
+    untouched for `max_age` seconds are garbage-collected. A crawl that is
+    already running, here or in another process, isn't checkpointed twice.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        interval: int = 10,
+        max_age: float = 24 * 60 * 60,
+    ):
+        self.directory = Path(directory)
+        self.interval = max(interval, 1)
+        self.max_age = max_age
+
+        # The store may be shared by tasks running in task-runner threads
+        self._lock = threading.Lock()
+        self._claimed: set[str] = set()
+        self._collected = False
+
+    def open(self, key: str) -> CrawlCheckpoint | None:
+        """Claim the checkpoint of `key`, or None while another crawl of it runs."""
+        name = hashlib.sha256(key.encode()).hexdigest()
+        if not self._collected:
+            self._collected = True
+            self.collect_garbage()
+
+        path = self.directory / name
+        with self._lock:
+            if name in self._claimed:
+                return None
+            path.mkdir(parents=True, exist_ok=True)
+            lock_file = _try_lock(path)
+            if lock_file is None:
+                return None
+            self._claimed.add(name)
+
+        def release() -> None:
+            with self._lock:
+                self._claimed.discard(name)
+                lock_file.close()
+
+        return CrawlCheckpoint(path, self.interval, release)
+
+    def collect_garbage(self) -> int:
+        """Delete checkpoints of crawls abandoned for `max_age` seconds, returning how many."""
+        if not self.directory.is_dir():
+            return 0
+        expired_before = time.time() - self.max_age
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            path = Path(entry.path)
+            with self._lock:
+                if entry.name in self._claimed or _last_update(path) > expired_before:
+                    continue
+                lock_file = _try_lock(path)
+                if lock_file is None:
+                    continue  # Resumed by a crawl in another process
+                try:
+                    shutil.rmtree(path, ignore_errors=True)
+                finally:
+                    lock_file.close()
+            removed += 1
+        return removed
+
+
+def _try_lock(path: Path) -> Any:
+    """Open and lock the crawl's lock file, or None if another process holds it."""
+    try:
+        lock_file = open(path / "lock", "a+b")
+    except OSError:
+        return None  # Just garbage-collected by another process
+    if fcntl is not None:
+        try:
+            # Released by the OS if the process dies, so a crash never blocks a retry
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def _last_update(path: Path) -> float:
+    try:
+        return max(entry.stat().st_mtime for entry in os.scandir(path))
+    except (OSError, ValueError):
+        return 0.0
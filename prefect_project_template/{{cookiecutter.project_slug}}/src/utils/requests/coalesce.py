@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+__all__ = ["RequestCoalescer", "CoalescerStats"]
+
+T = TypeVar("T")
+
+
+@dataclass(kw_only=True, slots=True)
+class CoalescerStats:
+    requests: int = 0
+    coalesced: int = 0  # Callers that joined a request already in flight
+
+
+class RequestCoalescer:
+    """
+    Single-flight coalescing of identical idempotent requests.
+
+    Concurrent callers with the same key share one in-flight task and all receive
+    its result, or its exception. The result object itself is shared, so callers
+    must not mutate it. Cancelling one caller doesn't cancel the shared request.
+    Requests are only shared between callers running on the same event loop.
+    """
+
+    def __init__(self, *, methods: frozenset[str] = frozenset({"GET", "HEAD"})):
+        self.methods = methods
+        self.stats = CoalescerStats()
+        self._lock = threading.Lock()  # Guards stats shared by task-runner threads
+        self._in_flight: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[Hashable, asyncio.Task]
+        ] = weakref.WeakKeyDictionary()
+
+    def can_coalesce(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+    async def run(self, key: Hashable, request: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            in_flight = self._in_flight.setdefault(loop, {})
+            self.stats.requests += 1
+            task = in_flight.get(key)
+            if task is not None:
+                self.stats.coalesced += 1
+
+        if task is None:
+            task = asyncio.ensure_future(request())
+            in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(in_flight, key, done))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _forget(
+        in_flight: dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task
+    ) -> None:
+        if in_flight.get(key) is task:
+            del in_flight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller was cancelled
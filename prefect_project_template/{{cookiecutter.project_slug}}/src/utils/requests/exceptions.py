@@ -55,3 +55,9 @@ class UnprocessableEntityError(ClientError):
 @error_dataclass
 class RateLimitError(ClientError):
     status: ClassVar[int] = 429
+
+
+@error_dataclass
+class CircuitOpenError(RequestError):
+    host: str
+    retry_in: float  # Seconds until the circuit lets a probe through
@@ -0,0 +1,191 @@
+import asyncio
+import dataclasses
+import math
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from yarl import URL
+
+from .metrics import _counter_lines, _gauge_lines
+
+__all__ = ["RequestHedger", "HedgeStats"]
+
+T = TypeVar("T")
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class HedgeStats:
+    requests: int = 0  # Attempts that could have been hedged
+    hedged: int = 0  # Duplicates sent
+    won: int = 0  # Duplicates that answered before the original
+    capped: int = 0  # Duplicates not sent, `max_ratio` was reached
+
+
+class RequestHedger:
+    """
+    Hedged idempotent requests, trading a little extra load for a shorter tail.
+
+    When an attempt hasn't answered after the `quantile` of its host's recent
+    latencies (within `min_delay`..`max_delay`), a duplicate is sent; whichever
+    succeeds first is used and the other is cancelled. Hosts are only hedged once
+    `min_samples` latencies were seen, and at most `max_ratio` of the requests
+    get a duplicate. Pass it to `make_request(..., hedger=...)`.
+    """
+
+    def __init__(
+        self,
+        *,
+        quantile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 10.0,
+        max_ratio: float = 0.1,
+        min_samples: int = 20,
+        samples: int = 500,
+        methods: frozenset[str] = frozenset({"GET", "HEAD"}),
+    ):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.samples = samples
+        self.methods = methods
+        self.stats = HedgeStats()
+
+        # Shared by the requests of every task-runner thread
+        self._lock = threading.Lock()
+        self._latencies: dict[str, deque[float]] = {}
+
+    def can_hedge(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+    def delay(self, url: str) -> float | None:
+        """How long to wait for an answer before hedging, None while too few latencies are known."""
+        return self._host_delay(URL(url).host or "")
+
+    def _host_delay(self, host: str) -> float | None:
+        with self._lock:
+            latencies = sorted(self._latencies.get(host, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        rank = min(math.ceil(self.quantile * len(latencies)), len(latencies)) - 1
+        return min(max(latencies[rank], self.min_delay), self.max_delay)
+
+    async def run(
+        self,
+        url: str,
+        send: Callable[[], Awaitable[T]],
+        *,
+        acquire: Callable[[], Awaitable[object]] | None = None,
+    ) -> T:
+        """
+        Await `send()`, sending it a second time if the first is slow.
+
+        `acquire` is awaited before the duplicate is sent, e.g. for a rate limiter
+        token. Only the time `send()` takes is measured, the caller sends the
+        first attempt as soon as it may.
+        """
+        delay = self.delay(url)
+        with self._lock:
+            self.stats.requests += 1
+        primary = asyncio.ensure_future(_timed(send))
+        if delay is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(primary), delay)
+            except asyncio.TimeoutError:
+                if self._may_hedge():
+                    return await self._race(url, primary, send, acquire)
+            except BaseException:
+                primary.cancel()
+                raise
+
+        result, seconds = await primary
+        self._observe(url, seconds)
+        return result
+
+    def _may_hedge(self) -> bool:
+        with self._lock:
+            if self.stats.hedged + 1 > self.max_ratio * self.stats.requests:
+                self.stats.capped += 1
+                return False
+            self.stats.hedged += 1
+            return True
+
+    async def _race(
+        self,
+        url: str,
+        primary: asyncio.Future,
+        send: Callable[[], Awaitable[T]],
+        acquire: Callable[[], Awaitable[object]] | None,
+    ) -> T:
+        hedge = asyncio.ensure_future(_timed(send, acquire))
+        pending, error = {primary, hedge}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # The first success wins, a failure leaves it to the other one
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            with self._lock:
+                                self.stats.won += 1
+                        result, seconds = task.result()
+                        self._observe(url, seconds)
+                        return result
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
+            await asyncio.gather(primary, hedge, return_exceptions=True)
+
+    def _observe(self, url: str, seconds: float) -> None:
+        host = URL(url).host or ""
+        with self._lock:
+            latencies = self._latencies.get(host)
+            if latencies is None:
+                latencies = self._latencies[host] = deque(maxlen=self.samples)
+            latencies.append(seconds)
+
+    def to_prometheus(self, prefix: str = "http_client") -> str:
+        """Render the hedging counters in the Prometheus text exposition format."""
+        with self._lock:
+            stats = dataclasses.replace(self.stats)
+            hosts = sorted(self._latencies)
+        lines = []
+        _counter_lines(
+            lines,
+            f"{prefix}_hedge_total",
+            "Hedged duplicates sent, won against the original, or not sent because of the cap.",
+            {
+                (("outcome", "sent"),): stats.hedged,
+                (("outcome", "won"),): stats.won,
+                (("outcome", "capped"),): stats.capped,
+            },
+        )
+        _gauge_lines(
+            lines,
+            f"{prefix}_hedge_delay_seconds",
+            "Current delay before an attempt is hedged.",
+            {
+                (("host", host),): delay
+                for host in hosts
+                if (delay := self._host_delay(host)) is not None
+            },
+        )
+        return "\n".join(lines) + "\n"
+
+
+async def _timed(
+    send: Callable[[], Awaitable[T]],
+    acquire: Callable[[], Awaitable[object]] | None = None,
+) -> tuple[T, float]:
+    """Await `acquire()` then `send()`, returning its result and how long sending took."""
+    if acquire is not None:
+        await acquire()
+    started = time.monotonic()
+    return await send(), time.monotonic() - started
@@ -0,0 +1,32 @@
+import hashlib
+from typing import Any, Iterable, Mapping
+
+from yarl import URL
+
+__all__ = ["request_key"]
+
+VARYING_HEADERS = frozenset({"accept", "authorization"})
+
+
+def request_key(
+    method: str,
+    url: str,
+    params: Mapping[str, Any] | None = None,
+    headers: Mapping[str, str] | None = None,
+    vary: Iterable[str] = VARYING_HEADERS,
+) -> str:
+    """
+    Identify a request by method, full URL and the headers that change its response.
+    Header values are hashed so credentials never end up in keys or file names.
+    """
+    full_url = URL(url)
+    if params:
+        full_url = full_url.update_query(params)
+    vary = {name.lower() for name in vary}
+    varying = sorted(
+        (name.lower(), value)
+        for name, value in (headers or {}).items()
+        if name.lower() in vary
+    )
+    varying_digest = hashlib.sha256(repr(varying).encode()).hexdigest()[:16]
+    return f"{method.upper()} {full_url} {varying_digest}"
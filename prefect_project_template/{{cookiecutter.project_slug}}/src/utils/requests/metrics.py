@@ -0,0 +1,469 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Iterable
+
+from yarl import URL
+
+from settings import config
+
+if TYPE_CHECKING:
+    from aiohttp import (
+        ClientSession,
+        TraceConfig,
+        TraceConnectionCreateEndParams,
+        TraceConnectionCreateStartParams,
+        TraceConnectionQueuedEndParams,
+        TraceConnectionQueuedStartParams,
+        TraceDnsResolveHostEndParams,
+        TraceDnsResolveHostStartParams,
+        TraceRequestChunkSentParams,
+        TraceRequestEndParams,
+        TraceRequestExceptionParams,
+        TraceRequestHeadersSentParams,
+        TraceRequestStartParams,
+        TraceResponseChunkReceivedParams,
+    )
+
+__all__ = ["Histogram", "RequestMetrics", "request_metrics"]
+
+# Seconds, Prometheus' default buckets plus a few for sub-5ms local phases
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5, 10)
+
+# queue: waiting for a free connection in the pool
+# dns: resolving the host
+# connect: opening the TCP connection and TLS handshake, DNS excluded
+# wait: from sending the request headers until the response headers arrived
+# transfer: reading the response body
+PHASES = ("queue", "dns", "connect", "wait", "transfer")
+
+
+class Histogram:
+    """Counts of observations per upper bound (`le`), as Prometheus exposes them."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """(upper bound, observations <= bound) pairs, ending with +Inf."""
+        pairs, total = [], 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket, like `histogram_quantile`."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        lower, seen = 0.0, 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            lower, seen = bound, seen + count
+        return self.buckets[-1]  # The estimate can't go past the last finite bucket
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class RequestMetrics:
+    """
+    Per-host timings of the HTTP requests sent through instrumented sessions.
+
+    `trace_config()` hooks a session so every request records how long it spent
+    in each of `PHASES`, its status code and the bytes sent and received;
+    `make_request` adds how many attempts each call needed. Everything can be
+    exported with `to_prometheus()` or summarized with `to_markdown()`.
+    """
+
+    def __init__(
+        self, *, enabled: bool = True, buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        # Observations come from every task-runner thread
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.phases: dict[tuple[str, str], Histogram] = {}
+            self.durations: dict[tuple[str, str, str], Histogram] = {}
+            self.attempts: dict[tuple[str, str], Histogram] = {}
+            self.responses: Counter[tuple[str, str, str]] = Counter()
+            self.bytes_sent: Counter[str] = Counter()
+            self.bytes_received: Counter[str] = Counter()
+
+    def observe_phase(self, host: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.phases.get((host, phase))
+            if histogram is None:
+                histogram = self.phases[(host, phase)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_response(
+        self, host: str, method: str, status: str, seconds: float
+    ) -> None:
+        key = (host, method, status)
+        with self._lock:
+            self.responses[key] += 1
+            histogram = self.durations.get(key)
+            if histogram is None:
+                histogram = self.durations[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def observe_attempts(self, method: str, url: str, attempts: int) -> None:
+        """Record how many attempts a `make_request` call took, retries included."""
+        if not self.enabled or not attempts:
+            return
+        key = (URL(url).host or "", method.upper())
+        with self._lock:
+            histogram = self.attempts.get(key)
+            if histogram is None:
+                histogram = self.attempts[key] = Histogram(ATTEMPT_BUCKETS)
+            histogram.observe(attempts)
+
+    def add_bytes(self, host: str, *, sent: int = 0, received: int = 0) -> None:
+        with self._lock:
+            self.bytes_sent[host] += sent
+            self.bytes_received[host] += received
+
+    def trace_config(self) -> TraceConfig:
+        """A `TraceConfig` recording into these metrics, for `ClientSession(trace_configs=...)`."""
+        from aiohttp import TraceConfig
+
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_queued_start.append(self._on_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_queued_end)
+        trace_config.on_dns_resolvehost_start.append(self._on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(self._on_dns_end)
+        trace_config.on_connection_create_start.append(self._on_connect_start)
+        trace_config.on_connection_create_end.append(self._on_connect_end)
+        trace_config.on_request_headers_sent.append(self._on_headers_sent)
+        trace_config.on_request_chunk_sent.append(self._on_chunk_sent)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        trace_config.on_response_chunk_received.append(self._on_chunk_received)
+        trace_config.freeze()
+        return trace_config
+
+    def to_prometheus(self, prefix: str = "http_client") -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            _histogram_lines(
+                lines,
+                f"{prefix}_phase_seconds",
+                "Time spent in each phase of an HTTP request.",
+                {
+                    (("host", host), ("phase", phase)): histogram
+                    for (host, phase), histogram in sorted(self.phases.items())
+                },
+            )
+            _histogram_lines(
+                lines,
+                f"{prefix}_request_duration_seconds",
+                "Time from starting a request until its response headers arrived.",
+                {
+                    (("host", host), ("method", method), ("status", status)): histogram
+                    for (host, method, status), histogram in sorted(
+                        self.durations.items()
+                    )
+                },
+            )
+            _histogram_lines(
+                lines,
+                f"{prefix}_attempts",
+                "Attempts needed per request, retries included.",
+                {
+                    (("host", host), ("method", method)): histogram
+                    for (host, method), histogram in sorted(self.attempts.items())
+                },
+            )
+            _counter_lines(
+                lines,
+                f"{prefix}_responses_total",
+                "Responses received, by status code.",
+                {
+                    (("host", host), ("method", method), ("status", status)): count
+                    for (host, method, status), count in sorted(self.responses.items())
+                },
+            )
+            _counter_lines(
+                lines,
+                f"{prefix}_sent_bytes_total",
+                "Request body bytes sent.",
+                {(("host", host),): n for host, n in sorted(self.bytes_sent.items())},
+            )
+            _counter_lines(
+                lines,
+                f"{prefix}_received_bytes_total",
+                "Response body bytes received.",
+                {
+                    (("host", host),): n
+                    for host, n in sorted(self.bytes_received.items())
+                },
+            )
+            return "\n".join(lines) + "\n"
+
+    def to_markdown(self) -> str:
+        """Summarize the phase timings, responses and retries per host as markdown tables."""
+        with self._lock:
+            lines = [
+                "### HTTP phases",
+                "",
+                "| Host | Phase | Count | Mean (ms) | p50 (ms) | p95 (ms) | p99 (ms) |",
+                "|---|---|---:|---:|---:|---:|---:|",
+            ]
+            for (host, phase), histogram in sorted(
+                self.phases.items(),
+                key=lambda item: (item[0][0], PHASES.index(item[0][1])),
+            ):
+                lines.append(
+                    f"| {host} | {phase} | {histogram.count} "
+                    f"| {histogram.mean * 1000:.1f} "
+                    + " ".join(
+                        f"| {histogram.quantile(q) * 1000:.1f}"
+                        for q in (0.5, 0.95, 0.99)
+                    )
+                    + " |"
+                )
+
+            lines += [
+                "",
+                "### HTTP responses",
+                "",
+                "| Host | Responses | Statuses | Retries | Sent (KiB) | Received (KiB) |",
+                "|---|---:|---|---:|---:|---:|",
+            ]
+            hosts = sorted(
+                {host for host, _, _ in self.responses}
+                | {host for host, _ in self.attempts}
+            )
+            for host in hosts:
+                statuses = Counter()
+                for (response_host, _, status), count in self.responses.items():
+                    if response_host == host:
+                        statuses[status] += count
+                retries = sum(
+                    histogram.sum - histogram.count
+                    for (attempt_host, _), histogram in self.attempts.items()
+                    if attempt_host == host
+                )
+                lines.append(
+                    f"| {host} | {sum(statuses.values())} "
+                    f"| {', '.join(f'{s}: {n}' for s, n in sorted(statuses.items()))} "
+                    f"| {retries:.0f} "
+                    f"| {self.bytes_sent[host] / 1024:.1f} "
+                    f"| {self.bytes_received[host] / 1024:.1f} |"
+                )
+            return "\n".join(lines) + "\n"
+
+    async def _on_request_start(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestStartParams,
+    ) -> None:
+        context.host = params.url.host or ""
+        context.started = context.phase_started = time.perf_counter()
+        context.dns = 0.0
+        context.response_at = None
+
+    async def _on_queued_start(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceConnectionQueuedStartParams,
+    ) -> None:
+        context.phase_started = time.perf_counter()
+
+    async def _on_queued_end(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceConnectionQueuedEndParams,
+    ) -> None:
+        self.observe_phase(
+            context.host, "queue", time.perf_counter() - context.phase_started
+        )
+
+    async def _on_dns_start(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceDnsResolveHostStartParams,
+    ) -> None:
+        context.dns_started = time.perf_counter()
+
+    async def _on_dns_end(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceDnsResolveHostEndParams,
+    ) -> None:
+        elapsed = time.perf_counter() - context.dns_started
+        context.dns += elapsed
+        self.observe_phase(context.host, "dns", elapsed)
+
+    async def _on_connect_start(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceConnectionCreateStartParams,
+    ) -> None:
+        context.phase_started = time.perf_counter()
+        context.dns = 0.0
+
+    async def _on_connect_end(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceConnectionCreateEndParams,
+    ) -> None:
+        # DNS is resolved while the connection is created, it has its own phase
+        elapsed = time.perf_counter() - context.phase_started - context.dns
+        self.observe_phase(context.host, "connect", max(elapsed, 0.0))
+
+    async def _on_headers_sent(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestHeadersSentParams,
+    ) -> None:
+        context.phase_started = time.perf_counter()
+
+    async def _on_chunk_sent(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestChunkSentParams,
+    ) -> None:
+        self.add_bytes(context.host, sent=len(params.chunk))
+
+    async def _on_request_end(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestEndParams,
+    ) -> None:
+        now = time.perf_counter()
+        context.response_at = now
+        self.observe_phase(context.host, "wait", now - context.phase_started)
+        self.observe_response(
+            context.host,
+            params.method.upper(),
+            str(params.response.status),
+            now - context.started,
+        )
+
+    async def _on_request_exception(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceRequestExceptionParams,
+    ) -> None:
+        self.observe_response(
+            context.host,
+            params.method.upper(),
+            "error",
+            time.perf_counter() - context.started,
+        )
+
+    async def _on_chunk_received(
+        self,
+        session: ClientSession,
+        context: SimpleNamespace,
+        params: TraceResponseChunkReceivedParams,
+    ) -> None:
+        # Only sent for bodies read whole, `streaming` counts the bytes it streams itself
+        if context.response_at is not None:
+            self.observe_phase(
+                context.host, "transfer", time.perf_counter() - context.response_at
+            )
+            context.response_at = None
+        self.add_bytes(context.host, received=len(params.chunk))
+
+
+request_metrics = RequestMetrics(enabled=config.http.METRICS_ENABLED)
+
+
+def _sample(name: str, labels: tuple[tuple[str, str], ...], value: float) -> str:
+    if not labels:
+        return f"{name} {value:g}"
+    formatted = ",".join(
+        '%s="%s"'
+        % (label, text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for label, text in labels
+    )
+    # Braces are concatenated, the project is rendered as a Jinja template
+    return name + "{" + formatted + "} " + f"{value:g}"
+
+
+def _histogram_lines(
+    lines: list[str],
+    name: str,
+    help_text: str,
+    histograms: dict[tuple[tuple[str, str], ...], Histogram],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in histograms.items():
+        for bound, count in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(_sample(f"{name}_bucket", (*labels, ("le", le)), count))
+        lines.append(_sample(f"{name}_sum", labels, histogram.sum))
+        lines.append(_sample(f"{name}_count", labels, histogram.count))
+
+
+def _counter_lines(
+    lines: list[str],
+    name: str,
+    help_text: str,
+    counters: dict[tuple[tuple[str, str], ...], int],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, count in counters.items():
+        lines.append(_sample(name, labels, count))
+
+
+def _gauge_lines(
+    lines: list[str],
+    name: str,
+    help_text: str,
+    gauges: dict[tuple[tuple[str, str], ...], float],
+) -> None:
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in gauges.items():
+        lines.append(_sample(name, labels, value))
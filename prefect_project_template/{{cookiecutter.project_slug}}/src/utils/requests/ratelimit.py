@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Mapping
+
+from multidict import CIMultiDict
+from yarl import URL
+
+__all__ = ["RateLimiter", "TokenBucket", "RateLimiterStats"]
+
+
+@dataclass(kw_only=True, slots=True)
+class RateLimiterStats:
+    acquired: int = 0
+    delayed: int = 0  # Acquisitions that had to wait for a token
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens/s up to `capacity`.
+
+    Tokens are reserved synchronously, so callers never hold a lock while waiting
+    and are served in arrival order: a negative balance is the queue of reserved
+    tokens. The short critical sections are guarded for task-runner threads.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._adapted_until = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self._paused_until - now)
+
+    def adapt(self, remaining: int, reset_in: float, pace_below: int = 0) -> None:
+        """
+        Once fewer than `pace_below` upstream requests remain, spread them evenly
+        over the `reset_in` seconds left; with none left, pause until the reset.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            reset_in = max(reset_in, 1.0)
+            if remaining <= 0:
+                self._paused_until = now + reset_in
+                self.tokens = min(self.tokens, 0)
+            if remaining < pace_below:
+                self.rate = min(self.max_rate, max(remaining, 1) / reset_in)
+                self._adapted_until = now + reset_in
+
+    def _refill(self, now: float) -> None:
+        if self._adapted_until and now >= self._adapted_until:
+            # The upstream window was reset, go back to the configured rate
+            self.rate = self.max_rate
+            self._adapted_until = 0.0
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter shared by concurrent requests.
+
+    Keeps one `TokenBucket` per host (and per credential, when
+    `per_credential` is set) and adapts each bucket's refill rate to the
+    `X-RateLimit-Remaining`/`X-RateLimit-Reset` headers of its responses: below
+    `pace_below` remaining requests the rest of the quota is spread over the
+    window. Time spent waiting for tokens is collected in `stats`.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = 10.0,
+        capacity: float | None = None,
+        per_credential: bool = True,
+        pace_below: int = 500,
+    ):
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.per_credential = per_credential
+        self.pace_below = pace_below
+        self.stats = RateLimiterStats()
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple[str, str | None], TokenBucket] = {}
+
+    def bucket(self, url: str, headers: Mapping[str, str] | None = None) -> TokenBucket:
+        key = self._key(url, headers)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    async def acquire(
+        self, url: str, headers: Mapping[str, str] | None = None
+    ) -> float:
+        """Wait for a token for `url` and return the seconds spent waiting."""
+        delay = self.bucket(url, headers).reserve()
+        with self._lock:
+            self.stats.acquired += 1
+            if delay > 0:
+                self.stats.delayed += 1
+                self.stats.total_wait += delay
+                self.stats.max_wait = max(self.stats.max_wait, delay)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def update(
+        self,
+        url: str,
+        headers: Mapping[str, str] | None,
+        response_headers: Mapping[str, str],
+    ) -> None:
+        """Adapt the bucket for `url` to the rate-limit headers of a response."""
+        remaining = response_headers.get("X-RateLimit-Remaining")
+        reset = response_headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            reset_in = float(reset) - time.time()
+            self.bucket(url, headers).adapt(int(remaining), reset_in, self.pace_below)
+        except ValueError:
+            return
+
+    def _key(
+        self, url: str, headers: Mapping[str, str] | None
+    ) -> tuple[str, str | None]:
+        host = URL(url).host or ""
+        if not self.per_credential or not headers:
+            return host, None
+        authorization = CIMultiDict(headers).get("Authorization")
+        if authorization is None:
+            return host, None
+        return host, hashlib.sha256(authorization.encode()).hexdigest()[:16]
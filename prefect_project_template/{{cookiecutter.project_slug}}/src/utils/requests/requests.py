@@ -1,32 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import functools
 import logging
+import re
+import time
 import traceback
-from contextlib import asynccontextmanager
-from typing import Any, Generator, TypeAlias
+from collections import deque
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Mapping,
+)
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
-from aiohttp import ClientTimeout, ContentTypeError
+import msgspec
+from multidict import CIMultiDict, CIMultiDictProxy
 
-from aiohttp import ClientSession as AiohttpClientSession
-from aiohttp.client_exceptions import ClientError as AiohttpClientError
 from .exceptions import (
     RequestError,
+    RequestHTTPError,
     ServerError,
-    RateLimitError,
+    ClientError,
+    UnauthorizedError,
     NotFoundError,
-)
-from tenacity import (
-    AsyncRetrying,
-    before_sleep_log,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_random_exponential,
+    ContentTooLargeError,
+    UnprocessableEntityError,
+    RateLimitError,
 )
 from settings import config
-from .serializers import json_serialize
+from .breaker import CircuitBreakers, counts_as_failure
+from .budget import RetryBudget
+from .cache import CachedResponse, HTTPCache
+from .checkpoint import CheckpointStore, CrawlCursor
+from .coalesce import RequestCoalescer
+from .hedge import RequestHedger
+from .keys import request_key
+from .metrics import request_metrics
+from .ratelimit import RateLimiter
+from .serializers import json_deserialize
+
+if TYPE_CHECKING:
+    # aiohttp and tenacity are imported where requests are made, not on import
+    from aiohttp import ClientResponse
+    from tenacity import AsyncRetrying, RetryCallState
+    from tenacity.wait import wait_base
+
+    from .sessions import ClientSession
 
 _logger = logging.getLogger(config.app.SLUG)
 
+_LINK_RE = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+_JSON_CONTENT_TYPE_RE = re.compile(r"^application/(?:[\w.+-]+?\+)?json")
+
+_CLIENT_ERRORS_BY_STATUS: dict[int, type[ClientError]] = {
+    error.status: error
+    for error in (
+        ClientError,
+        UnauthorizedError,
+        NotFoundError,
+        ContentTooLargeError,
+        UnprocessableEntityError,
+        RateLimitError,
+    )
+}
+
+
+class wait_retry_after:
+    """
+    Wait exactly as long as the server asked for, via `Retry-After` or an
+    exhausted `X-RateLimit-Reset`, and defer to `fallback` otherwise.
+    """
+
+    def __init__(self, fallback: wait_base, max_wait: float | None = None):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exception = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(exception, RequestError) and exception.headers:
+            delay = retry_after_delay(exception.headers)
+            if delay is not None:
+                return delay if self.max_wait is None else min(delay, self.max_wait)
+        return self.fallback(retry_state)
+
+
+@dataclass(frozen=True, kw_only=True, slots=True)
+class RequestSpec:
+    """One request of a `make_requests` batch, `options` are `make_request` kwargs."""
+
+    url: str
+    method: str = "GET"
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(kw_only=True, slots=True)
+class RequestOutcome:
+    index: int  # Position of the spec in the input
+    spec: RequestSpec
+    response: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
-ClientSession: TypeAlias = AiohttpClientSession  # Alias for easy reference
+@dataclass(kw_only=True, slots=True)
+class BulkResult:
+    successes: list[RequestOutcome] = field(default_factory=list)
+    failures: list[RequestOutcome] = field(default_factory=list)
+
+    def add(self, outcome: RequestOutcome) -> None:
+        (self.successes if outcome.ok else self.failures).append(outcome)
 
 
 class RetryPolicy:
@@ -38,8 +130,9 @@ class RetryPolicy:
             RateLimitError,
         ),
         wait_multiplier: int = 1,
-        wait_max: int = 10,
-        wait_min: int = 60,
+        wait_max: int = 60,
+        wait_min: int = 1,
+        retry_after_max: float | None = 3600,
         reraise: bool = True,
         logger: logging.Logger | None = _logger,
     ):
@@ -48,45 +141,425 @@ class RetryPolicy:
         self.wait_multiplier = wait_multiplier
         self.wait_max = wait_max
         self.wait_min = wait_min
+        self.retry_after_max = retry_after_max
         self.reraise = reraise
         self.logger = logger
 
-    def retry_attempts(self) -> AsyncRetrying:
+    def retry_attempts(self, retry_budget: RetryBudget | None = None) -> AsyncRetrying:
+        from tenacity import (
+            AsyncRetrying,
+            before_sleep_log,
+            retry_if_exception_type,
+            stop_after_attempt,
+            wait_random_exponential,
+        )
+
+        retry = retry_if_exception_type(self.exceptions_to_retry)
+        if retry_budget is not None:
+
+            def within_budget(retry_state: RetryCallState) -> bool:
+                # The last attempt is stopped anyway, it mustn't spend the budget
+                if retry_state.attempt_number >= self.max_attempts:
+                    return True
+                if retry_budget.try_retry():
+                    return True
+                if self.logger:
+                    self.logger.warning(
+                        "Retry budget exhausted, not retrying: %s",
+                        retry_state.outcome.exception(),
+                    )
+                return False
+
+            retry = retry & within_budget
+
         return AsyncRetrying(
             stop=stop_after_attempt(self.max_attempts),
-            wait=wait_random_exponential(
-                min=self.wait_min, max=self.wait_max, multiplier=self.wait_multiplier
+            # Honour Retry-After / X-RateLimit-Reset, else jittered exponential backoff
+            wait=wait_retry_after(
+                wait_random_exponential(
+                    min=self.wait_min,
+                    max=self.wait_max,
+                    multiplier=self.wait_multiplier,
+                ),
+                max_wait=self.retry_after_max,
             ),
             before_sleep=before_sleep_log(self.logger, logging.WARNING)
             if self.logger
             else None,
             reraise=self.reraise,
-            retry=retry_if_exception_type(self.exceptions_to_retry),
+            retry=retry,
         )
 
 
-def create_session(
-    *, timeout: int = 30, headers: dict[str, str] | None = None, **kwargs: Any
-) -> ClientSession:
-    return ClientSession(
-        timeout=ClientTimeout(total=timeout),
-        json_serialize=kwargs.pop(
-            "json_serialize", lambda obj: json_serialize(obj).decode()
-        ),
-        headers=headers,
+async def make_request(
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    logger: logging.Logger | None = None,
+    retry: bool = True,
+    retry_policy: RetryPolicy | None = None,
+    none_on_404: bool = False,
+    response_type: Any | None = None,
+    cache: HTTPCache | None = None,
+    rate_limiter: RateLimiter | None = None,
+    coalescer: RequestCoalescer | None = None,
+    circuit_breakers: CircuitBreakers | None = None,
+    retry_budget: RetryBudget | None = None,
+    hedger: RequestHedger | None = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    Send a request and return its decoded body.
+
+    When `response_type` is given (e.g. a `msgspec.Struct` or `list[Struct]`) the
+    body is decoded straight into it, skipping every field the type doesn't declare.
+    With a `cache`, GET responses are revalidated with ETag/Last-Modified and a
+    304 is served from the cache. A `rate_limiter` is acquired before every attempt.
+    With a `coalescer`, identical concurrent GET/HEAD requests share one response.
+    With `circuit_breakers`, requests to a failing host fail fast with
+    `CircuitOpenError`, and a shared `retry_budget` caps how many are retried.
+    With a `hedger`, a slow GET/HEAD attempt is sent a second time and the first
+    answer wins.
+    """
+    response_content, _ = await _request_with_retry(
+        session,
+        method,
+        url,
+        logger=logger,
+        retry=retry,
+        retry_policy=retry_policy,
+        none_on_404=none_on_404,
+        response_type=response_type,
+        cache=cache,
+        rate_limiter=rate_limiter,
+        coalescer=coalescer,
+        circuit_breakers=circuit_breakers,
+        retry_budget=retry_budget,
+        hedger=hedger,
         **kwargs,
     )
+    return response_content
+
+
+async def paginate_requests(
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    logger: logging.Logger | None = None,
+    retry: bool = True,
+    retry_policy: RetryPolicy | None = None,
+    concurrency: int = 5,
+    page_param: str = "page",
+    response_type: Any | None = None,
+    cache: HTTPCache | None = None,
+    rate_limiter: RateLimiter | None = None,
+    coalescer: RequestCoalescer | None = None,
+    circuit_breakers: CircuitBreakers | None = None,
+    retry_budget: RetryBudget | None = None,
+    hedger: RequestHedger | None = None,
+    checkpoints: CheckpointStore | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[Any]:
+    """
+    Iterate over every item of a paginated endpoint that uses `Link` headers.
+
+    The first page is fetched on its own to discover the `last` relation; the
+    remaining pages are then fetched concurrently (at most `concurrency` at a
+    time) while items are still yielded in page order. Each page goes through
+    its own `RetryPolicy`, so a failing page is retried without restarting the
+    crawl. Endpoints that only advertise `next` are followed sequentially.
+    `response_type` describes a whole page, e.g. `list[Contributor]`.
+
+    With `checkpoints`, the pages fetched so far and the crawl's cursor are
+    saved as it goes: when the crawl fails and is started again, the saved
+    pages are yielded from disk and fetching resumes after the last of them.
+    """
+    request = functools.partial(
+        _request_with_retry,
+        session,
+        method,
+        logger=logger,
+        retry=retry,
+        retry_policy=retry_policy,
+        response_type=response_type,
+        cache=cache,
+        rate_limiter=rate_limiter,
+        coalescer=coalescer,
+        circuit_breakers=circuit_breakers,
+        retry_budget=retry_budget,
+        hedger=hedger,
+    )
 
+    crawl = None
+    if checkpoints is not None:
+        key = request_key(
+            method,
+            url,
+            kwargs.get("params"),
+            {**session.headers, **(kwargs.get("headers") or {})},
+        )
+        crawl = await asyncio.to_thread(checkpoints.open, key)
 
-@asynccontextmanager
-async def with_session(
-    *, timeout: int = 30, headers: dict[str, str] | None = None, **kwargs: Any
-) -> Generator[ClientSession, None, None]:
-    async with create_session(timeout=timeout, headers=headers, **kwargs) as session:
-        yield session
+    completed = False
+    try:
+        cursor = CrawlCursor()
+        if crawl is not None and crawl.resumable:
+            pages = await asyncio.to_thread(crawl.load_pages, response_type)
+            cursor = crawl.cursor
+            if pages:
+                (logger or _logger).info(
+                    "Resuming %s after %d checkpointed pages", url, len(pages)
+                )
+            for content in pages:
+                for item in _page_items(content):
+                    yield item
 
+        async for content, next_url, last_url in _crawl_pages(
+            request,
+            url,
+            cursor,
+            page_param=page_param,
+            concurrency=concurrency,
+            **kwargs,
+        ):
+            if crawl is not None and crawl.add_page(
+                content, next_url=next_url, last_url=last_url
+            ):
+                await asyncio.to_thread(crawl.flush)
+            for item in _page_items(content):
+                yield item
+        completed = True
+    finally:
+        if crawl is not None:
+            await asyncio.to_thread(crawl.close, completed)
 
-async def make_request(
+
+async def _crawl_pages(
+    request: Callable[..., Awaitable[tuple[Any, Mapping[str, str]]]],
+    url: str,
+    cursor: CrawlCursor,
+    *,
+    page_param: str,
+    concurrency: int,
+    **kwargs: Any,
+) -> AsyncIterator[tuple[Any, str | None, str | None]]:
+    """Yield each page after the first `cursor.pages_done`, with its `next` and `last` URLs."""
+    next_url, last_url = cursor.next_url, cursor.last_url
+    if cursor.pages_done == 0:
+        content, headers = await request(url, **kwargs)
+        links = parse_link_header(headers.get("Link"))
+        next_url = links.get("next")
+        if _expand_page_urls(links.get("last"), page_param) is not None:
+            last_url = links.get("last")
+        yield content, next_url, last_url
+
+    # Follow-up URLs already carry the query string, so params must not be re-applied
+    kwargs.pop("params", None)
+
+    page_urls = _expand_page_urls(last_url, page_param)
+    if page_urls is None:
+        while next_url:
+            content, headers = await request(next_url, **kwargs)
+            next_url = parse_link_header(headers.get("Link")).get("next")
+            yield content, next_url, None
+        return
+
+    # Page URLs start at page 2, the pages done include the first one
+    page_urls = page_urls[max(cursor.pages_done, 1) - 1 :]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(page_url: str) -> Any:
+        async with semaphore:
+            page_content, _ = await request(page_url, **kwargs)
+            return page_content
+
+    # Only keep a bounded window of pages scheduled ahead of the one being yielded
+    pending_urls = iter(page_urls)
+    in_flight: deque[asyncio.Task] = deque()
+    try:
+        for page_url in pending_urls:
+            in_flight.append(asyncio.create_task(fetch_page(page_url)))
+            if len(in_flight) >= 2 * concurrency:
+                break
+        while in_flight:
+            content = await in_flight.popleft()
+            next_page_url = next(pending_urls, None)
+            if next_page_url is not None:
+                in_flight.append(asyncio.create_task(fetch_page(next_page_url)))
+            yield content, None, last_url
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def make_requests(
+    session: ClientSession,
+    specs: Iterable[RequestSpec | str],
+    *,
+    concurrency: int = 10,
+    ordered: bool = False,
+    return_exceptions: bool = True,
+    **kwargs: Any,
+) -> AsyncIterator[RequestOutcome]:
+    """
+    Send many requests with at most `concurrency` in flight and yield an outcome
+    per spec as soon as it completes, or in input order with `ordered=True`.
+
+    Specs are pulled lazily, so a generator of millions of specs never has more
+    than `2 * concurrency` requests scheduled or buffered at once. Every request
+    goes through `make_request` (and its `RetryPolicy`); `kwargs` apply to all of
+    them and a spec's own `options` take precedence. With `return_exceptions=False`
+    the first failure is raised and the remaining requests are cancelled.
+    """
+    pending_specs = enumerate(specs)
+    max_outstanding = 2 * concurrency if ordered else concurrency
+    in_flight: set[asyncio.Task[RequestOutcome]] = set()
+    buffered: dict[int, RequestOutcome] = {}
+    next_index = 0
+    exhausted = False
+
+    async def send(index: int, spec: RequestSpec) -> RequestOutcome:
+        outcome = RequestOutcome(index=index, spec=spec)
+        try:
+            outcome.response = await make_request(
+                session, spec.method, spec.url, **{**kwargs, **spec.options}
+            )
+        except Exception as e:
+            outcome.error = e
+        return outcome
+
+    def schedule() -> None:
+        nonlocal exhausted
+        while (
+            not exhausted
+            and len(in_flight) < concurrency
+            and len(in_flight) + len(buffered) < max_outstanding
+        ):
+            try:
+                index, spec = next(pending_specs)
+            except StopIteration:
+                exhausted = True
+                return
+            if isinstance(spec, str):
+                spec = RequestSpec(url=spec)
+            in_flight.add(asyncio.create_task(send(index, spec)))
+
+    try:
+        schedule()
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight.difference_update(done)
+
+            for task in sorted(done, key=lambda task: task.result().index):
+                outcome = task.result()
+                if not outcome.ok and not return_exceptions:
+                    raise outcome.error
+                if ordered:
+                    buffered[outcome.index] = outcome
+                else:
+                    yield outcome
+
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+
+            schedule()
+    finally:
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+
+async def gather_requests(
+    session: ClientSession,
+    specs: Iterable[RequestSpec | str],
+    *,
+    concurrency: int = 10,
+    return_exceptions: bool = True,
+    **kwargs: Any,
+) -> BulkResult:
+    """Run `make_requests` to completion and split the outcomes by success."""
+    result = BulkResult()
+    async for outcome in make_requests(
+        session,
+        specs,
+        concurrency=concurrency,
+        ordered=True,
+        return_exceptions=return_exceptions,
+        **kwargs,
+    ):
+        result.add(outcome)
+    return result
+
+
+def parse_link_header(value: str | None) -> dict[str, str]:
+    """Parse an RFC 8288 `Link` header into a `{rel: url}` mapping."""
+    if not value:
+        return {}
+    return {rel: link for link, rel in _LINK_RE.findall(value)}
+
+
+def retry_after_delay(headers: dict[str, str]) -> float | None:
+    """
+    Seconds the server asked us to wait, from `Retry-After` (seconds or HTTP date)
+    or, once the rate limit is exhausted, from `X-RateLimit-Reset` (epoch seconds).
+    """
+    headers = CIMultiDict(headers)
+
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(
+                0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+            )
+        except (TypeError, ValueError):
+            pass
+
+    reset = headers.get("X-RateLimit-Reset")
+    if reset is not None and headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return max(0.0, float(reset) - time.time())
+        except ValueError:
+            pass
+
+    return None
+
+
+def _expand_page_urls(last_url: str | None, page_param: str) -> list[str] | None:
+    """Build the URLs of pages 2..last from the `last` link, if it is numbered."""
+    if last_url is None:
+        return None
+
+    parts = urlsplit(last_url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    try:
+        last_page = int(query[page_param][-1])
+    except (KeyError, ValueError):
+        return None
+
+    urls = []
+    for page in range(2, last_page + 1):
+        query[page_param] = [str(page)]
+        urls.append(urlunsplit(parts._replace(query=urlencode(query, doseq=True))))
+    return urls
+
+
+def _page_items(content: Any) -> list[Any]:
+    if content is None:
+        return []
+    return content if isinstance(content, list) else [content]
+
+
+async def _request_with_retry(
     session: ClientSession,
     method: str,
     url: str,
@@ -95,26 +568,90 @@ async def make_request(
     retry: bool = True,
     retry_policy: RetryPolicy | None = None,
     none_on_404: bool = False,
+    response_type: Any | None = None,
+    cache: HTTPCache | None = None,
+    rate_limiter: RateLimiter | None = None,
+    coalescer: RequestCoalescer | None = None,
+    circuit_breakers: CircuitBreakers | None = None,
+    retry_budget: RetryBudget | None = None,
+    hedger: RequestHedger | None = None,
     **kwargs: Any,
-) -> Any:
+) -> tuple[Any, CIMultiDictProxy[str] | dict[str, str]]:
+    if coalescer is not None and coalescer.can_coalesce(method):
+        key = (
+            request_key(
+                method,
+                url,
+                kwargs.get("params"),
+                {**session.headers, **(kwargs.get("headers") or {})},
+            ),
+            response_type,
+            none_on_404,
+        )
+        return await coalescer.run(
+            key,
+            lambda: _request_with_retry(
+                session,
+                method,
+                url,
+                logger=logger,
+                retry=retry,
+                retry_policy=retry_policy,
+                none_on_404=none_on_404,
+                response_type=response_type,
+                cache=cache,
+                rate_limiter=rate_limiter,
+                circuit_breakers=circuit_breakers,
+                retry_budget=retry_budget,
+                hedger=hedger,
+                **kwargs,
+            ),
+        )
+
     response_content: Any | None = None
+    attempts = 0
+    if retry_budget is not None:
+        retry_budget.record_request()
     try:
         if not retry:
-            response_content = await _make_request(session, method, url, **kwargs)
+            attempts = 1
+            return await _guarded_request(
+                session,
+                method,
+                url,
+                response_type=response_type,
+                cache=cache,
+                rate_limiter=rate_limiter,
+                circuit_breakers=circuit_breakers,
+                hedger=hedger,
+                **kwargs,
+            )
 
         if retry_policy is None:
             retry_policy = RetryPolicy(logger=logger)
 
-        async for attempt in retry_policy.retry_attempts():
+        async for attempt in retry_policy.retry_attempts(retry_budget):
             with attempt:
-                response_content = await _make_request(session, method, url, **kwargs)
+                attempts += 1
+                response_content, headers = await _guarded_request(
+                    session,
+                    method,
+                    url,
+                    response_type=response_type,
+                    cache=cache,
+                    rate_limiter=rate_limiter,
+                    circuit_breakers=circuit_breakers,
+                    hedger=hedger,
+                    **kwargs,
+                )
 
-        return response_content
+        return response_content, headers
     except NotFoundError as e:
         if none_on_404:
             if logger:
                 logger.warning(e.message)
-            return None
+            return None, {}
+        raise
     except RequestError:
         raise
     except Exception as e:
@@ -125,24 +662,145 @@ async def make_request(
             method=method,
             url=url,
         )
+    finally:
+        request_metrics.observe_attempts(method, url, attempts)
+
+
+async def _guarded_request(
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    circuit_breakers: CircuitBreakers | None = None,
+    **kwargs: Any,
+) -> tuple[Any, CIMultiDictProxy[str]]:
+    """Send one attempt through the circuit breaker of its host, if any."""
+    if circuit_breakers is None:
+        return await _make_request(session, method, url, **kwargs)
+
+    breaker = circuit_breakers.check(method, url)
+    try:
+        result = await _make_request(session, method, url, **kwargs)
+    except Exception as e:
+        breaker.record(failed=counts_as_failure(e))
+        raise
+    breaker.record(failed=False)
+    return result
 
 
 async def _make_request(
-    session: ClientSession, method: str, url: str, **kwargs: Any
-) -> Any:
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    response_type: Any | None = None,
+    cache: HTTPCache | None = None,
+    rate_limiter: RateLimiter | None = None,
+    hedger: RequestHedger | None = None,
+    **kwargs: Any,
+) -> tuple[Any, CIMultiDictProxy[str]]:
+    # Session headers carry the credential that responses and limits depend on
+    request_headers = {**session.headers, **(kwargs.get("headers") or {})}
+
+    cache_key: str | None = None
+    cached: CachedResponse | None = None
+    if cache is not None and method.upper() == "GET":
+        cache_key = cache.key(method, url, kwargs.get("params"), request_headers)
+        cached = await cache.get(cache_key)
+        if cached is None:
+            cache.record("misses")
+        else:
+            cache.record("revalidations")
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}),
+                **cached.conditional_headers(),
+            }
+
+    async def acquire() -> None:
+        if rate_limiter is not None:
+            await rate_limiter.acquire(url, request_headers)
+
+    async def send() -> tuple[Any, CIMultiDictProxy[str], CachedResponse | None]:
+        return await _send_request(
+            session,
+            method,
+            url,
+            response_type=response_type,
+            cache=cache,
+            cached=cached,
+            store=cache_key is not None,
+            rate_limiter=rate_limiter,
+            request_headers=request_headers,
+            **kwargs,
+        )
+
+    await acquire()
+    # Hedging only races the requests themselves, not the wait for a token
+    if hedger is not None and hedger.can_hedge(method):
+        content, headers, entry = await hedger.run(url, send, acquire=acquire)
+    else:
+        content, headers, entry = await send()
+
+    if entry is not None:
+        await cache.put(cache_key, entry)
+    return content, headers
+
+
+async def _send_request(
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    response_type: Any | None,
+    cache: HTTPCache | None,
+    cached: CachedResponse | None,
+    store: bool,
+    rate_limiter: RateLimiter | None,
+    request_headers: dict[str, str],
+    **kwargs: Any,
+) -> tuple[Any, CIMultiDictProxy[str], CachedResponse | None]:
+    """
+    Send the request and decode its response, answering a 304 from `cached`.
+    Also returns the entry to store in the cache, if any, which the caller
+    writes once the request is answered.
+    """
+    from aiohttp import ClientError as AiohttpClientError
+
     response_content: Any | None = None
     try:
         async with session.request(method, url, **kwargs) as response:
-            response.raise_for_status()
+            if rate_limiter is not None:
+                rate_limiter.update(url, request_headers, response.headers)
+            if cached is not None and response.status == 304:
+                cache.record("hits")
+                body = cached.body
+                response_content = _decode_body(
+                    body, cached.content_type, cached.encoding, response_type
+                )
+                headers = CIMultiDict(cached.headers)
+                headers.update(response.headers)
+                # Confirmed unchanged, it is fresh again for another max-age
+                refreshed = msgspec.structs.replace(
+                    cached, headers=dict(headers), stored_at=time.time()
+                )
+                return response_content, CIMultiDictProxy(headers), refreshed
+            if cached is not None:
+                cache.record("misses")
 
-            response_content = None
-            try:
-                response_content = await response.json()
-            except ContentTypeError:
-                # Fallback to plain text if unsuccessful
-                response_content = await response.text()
+            await _raise_for_status(response, method, url)
+
+            # Read the body once and decode it ourselves instead of response.json()
+            body = await response.read()
+            response_content = _decode_body(
+                body, response.content_type, response.get_encoding(), response_type
+            )
 
-            return response_content
+            entry = (
+                _cache_entry(response, body)
+                if store and response.status == 200
+                else None
+            )
+            return response_content, response.headers, entry
     except AiohttpClientError as e:
         raise RequestError(
             message=f"Request failed for {method} {url}: {str(e)}",
@@ -150,3 +808,69 @@ async def _make_request(
             method=method,
             url=url,
         )
+    except msgspec.DecodeError as e:
+        raise RequestError(
+            message=f"Failed to decode response for {method} {url}: {str(e)}",
+            response_content=body.decode(errors="replace"),
+            method=method,
+            url=url,
+        )
+
+
+async def _raise_for_status(response: ClientResponse, method: str, url: str) -> None:
+    """Raise the typed `RequestError` matching an error status code."""
+    if response.status < 400:
+        return
+
+    body = await response.read()
+    error_kwargs = dict(
+        message=f"{response.status} {response.reason} for {method} {url}",
+        response_content=body.decode(response.get_encoding(), errors="replace"),
+        method=method,
+        url=url,
+        headers=dict(response.headers),
+    )
+
+    if response.status >= 500:
+        raise ServerError(**error_kwargs)
+    # GitHub signals exhausted (secondary) rate limits with 403 as well as 429
+    if response.status == 403 and (
+        response.headers.get("X-RateLimit-Remaining") == "0"
+        or "Retry-After" in response.headers
+    ):
+        raise RateLimitError(**error_kwargs)
+
+    error = _CLIENT_ERRORS_BY_STATUS.get(response.status)
+    if error is not None:
+        raise error(**error_kwargs)
+    raise RequestHTTPError(status=response.status, **error_kwargs)
+
+
+def _cache_entry(response: ClientResponse, body: bytes) -> CachedResponse | None:
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag is None and last_modified is None:
+        return None  # Nothing to revalidate against
+
+    return CachedResponse(
+        body=body,
+        content_type=response.content_type,
+        encoding=response.get_encoding(),
+        headers=dict(response.headers),
+        etag=etag,
+        last_modified=last_modified,
+        stored_at=time.time(),
+    )
+
+
+def _decode_body(
+    body: bytes, content_type: str, encoding: str, response_type: Any | None
+) -> Any:
+    if not body:
+        return None
+    if response_type is not None:
+        return json_deserialize(body, response_type)
+    if _JSON_CONTENT_TYPE_RE.match(content_type):
+        return json_deserialize(body)
+    # Fallback to plain text for non-JSON responses
+    return body.decode(encoding, errors="replace")
@@ -1,13 +1,20 @@
+from functools import lru_cache
 from typing import Any
 
 import msgspec
 
-__all__ = ["json_serialize", "json_deserialize"]
+__all__ = ["json_serialize", "json_deserialize", "json_decoder"]
 
 
 def json_serialize(obj: Any) -> bytes:
     return msgspec.json.encode(obj)
 
 
-def json_deserialize(obj: str | bytes) -> Any:
-    return msgspec.json.decode(obj)
+def json_deserialize(obj: str | bytes, type: Any = Any) -> Any:
+    return json_decoder(type).decode(obj)
+
+
+@lru_cache(maxsize=None)
+def json_decoder(type: Any = Any) -> msgspec.json.Decoder:
+    """Return a (cached) decoder for `type`, building it is the expensive part."""
+    return msgspec.json.Decoder(type)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Generator, TypeAlias
+
+from settings import config
+from .metrics import request_metrics
+from .serializers import json_serialize
+
+__all__ = [
+    "ClientSession",
+    "SessionPool",
+    "session_pool",
+    "create_session",
+    "with_session",
+    "close_pooled_sessions",
+]
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession, TCPConnector
+
+SessionKey: TypeAlias = tuple[str | None, tuple[tuple[str, str], ...], float]
+
+
+class SessionPool:
+    """
+    Lazily created sessions shared by every task running on the same event loop.
+
+    Sessions are keyed by (base URL, headers, timeout) and all sessions of a loop
+    share a single `TCPConnector`, so open TCP/TLS connections and the DNS cache
+    survive between tasks. Wrap the flow in `lifespan()`, or call `close()` once
+    it is done with them.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int | None = None,
+        limit_per_host: int | None = None,
+        keepalive_timeout: float | None = None,
+        ttl_dns_cache: int | None = None,
+    ):
+        self.limit = config.http.CONNECTOR_LIMIT if limit is None else limit
+        self.limit_per_host = (
+            config.http.CONNECTOR_LIMIT_PER_HOST
+            if limit_per_host is None
+            else limit_per_host
+        )
+        self.keepalive_timeout = (
+            config.http.KEEPALIVE_TIMEOUT
+            if keepalive_timeout is None
+            else keepalive_timeout
+        )
+        self.ttl_dns_cache = (
+            config.http.DNS_CACHE_TTL if ttl_dns_cache is None else ttl_dns_cache
+        )
+        # Sessions and connectors are bound to the loop they were created on
+        self._connectors: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, TCPConnector
+        ] = weakref.WeakKeyDictionary()
+        self._sessions: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[SessionKey, ClientSession]
+        ] = weakref.WeakKeyDictionary()
+        self._managed_loops: weakref.WeakSet[asyncio.AbstractEventLoop] = (
+            weakref.WeakSet()
+        )
+
+    @asynccontextmanager
+    async def lifespan(self) -> AsyncIterator["SessionPool"]:
+        """Keep the running loop's pooled sessions open for the block, then close them."""
+        loop = asyncio.get_running_loop()
+        self._managed_loops.add(loop)
+        try:
+            yield self
+        finally:
+            self._managed_loops.discard(loop)
+            await self.close()
+
+    def is_managed(self) -> bool:
+        """Whether a `lifespan()` is active on the running loop."""
+        return asyncio.get_running_loop() in self._managed_loops
+
+    def get_session(
+        self,
+        *,
+        timeout: int = 30,
+        headers: dict[str, str] | None = None,
+        base_url: str | None = None,
+        **kwargs: Any,
+    ) -> ClientSession:
+        """Return the pooled session for these options, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        sessions = self._sessions.setdefault(loop, {})
+        key = _session_key(base_url, headers, timeout)
+
+        session = sessions.get(key)
+        if session is None or session.closed:
+            session = create_session(
+                timeout=timeout,
+                headers=headers,
+                base_url=base_url,
+                connector=self._get_connector(loop),
+                connector_owner=False,
+                **kwargs,
+            )
+            sessions[key] = session
+        return session
+
+    async def close(self) -> None:
+        """Close every session and the connector owned by the running loop."""
+        loop = asyncio.get_running_loop()
+        sessions = self._sessions.pop(loop, {})
+        await asyncio.gather(*(session.close() for session in sessions.values()))
+
+        connector = self._connectors.pop(loop, None)
+        if connector is not None:
+            await connector.close()
+
+    def _get_connector(self, loop: asyncio.AbstractEventLoop) -> TCPConnector:
+        connector = self._connectors.get(loop)
+        if connector is None or connector.closed:
+            from aiohttp import TCPConnector
+
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._connectors[loop] = connector
+        return connector
+
+
+session_pool = SessionPool()
+
+
+def create_session(
+    *, timeout: int = 30, headers: dict[str, str] | None = None, **kwargs: Any
+) -> ClientSession:
+    from aiohttp import ClientSession, ClientTimeout
+
+    if request_metrics.enabled:
+        kwargs["trace_configs"] = [
+            *kwargs.get("trace_configs", ()),
+            request_metrics.trace_config(),
+        ]
+    return ClientSession(
+        timeout=ClientTimeout(total=timeout),
+        json_serialize=kwargs.pop(
+            "json_serialize", lambda obj: json_serialize(obj).decode()
+        ),
+        headers=headers,
+        **kwargs,
+    )
+
+
+@asynccontextmanager
+async def with_session(
+    *,
+    timeout: int = 30,
+    headers: dict[str, str] | None = None,
+    pooled: bool = False,
+    **kwargs: Any,
+) -> Generator[ClientSession, None, None]:
+    """
+    Yield a session for the duration of the block.
+
+    With `pooled=True` the session is borrowed from `session_pool` and left open,
+    as long as a `session_pool.lifespan()` is active on the running loop. Loops
+    without one, such as the short-lived loops task runners start in worker
+    threads, get a private session instead so nothing outlives its loop.
+    """
+    if pooled and session_pool.is_managed():
+        yield session_pool.get_session(timeout=timeout, headers=headers, **kwargs)
+        return
+
+    async with create_session(timeout=timeout, headers=headers, **kwargs) as session:
+        yield session
+
+
+async def close_pooled_sessions() -> None:
+    await session_pool.close()
+
+
+def __getattr__(name: str) -> Any:
+    # aiohttp takes a while to import, only load it once something needs it
+    if name == "ClientSession":
+        from aiohttp import ClientSession
+
+        return ClientSession  # Alias for easy reference
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _session_key(
+    base_url: str | None, headers: dict[str, str] | None, timeout: float
+) -> SessionKey:
+    return (
+        base_url,
+        tuple(sorted((k.lower(), v) for k, v in (headers or {}).items())),
+        timeout,
+    )
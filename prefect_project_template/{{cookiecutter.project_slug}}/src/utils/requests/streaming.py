@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Literal
+
+from .exceptions import ContentTooLargeError, RequestError
+from .metrics import request_metrics
+from .requests import RetryPolicy, _raise_for_status
+from .serializers import json_decoder
+
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse
+
+    from .sessions import ClientSession
+
+__all__ = ["stream_request", "stream_json_items", "download_to_file"]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_NDJSON_CONTENT_TYPES = {
+    "application/x-ndjson",
+    "application/jsonl",
+    "application/json-seq",
+}
+# Characters that matter to the structure of a JSON document
+_JSON_STRUCTURE_RE = re.compile(rb'[\[\]{}",\\]')
+
+
+async def stream_request(
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    max_body_bytes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retry_policy: RetryPolicy | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the response body in chunks without ever buffering all of it.
+
+    Raises `ContentTooLargeError` as soon as the body is known to exceed
+    `max_body_bytes`, from `Content-Length` when the server sends it. Only opening
+    the request is retried: once chunks were yielded a failure is raised as is.
+    Long downloads usually want `timeout=ClientTimeout(sock_read=...)` rather than
+    the session's total timeout.
+    """
+    async with _open_stream(session, method, url, retry_policy, **kwargs) as response:
+        async for chunk in _iter_chunks(
+            response, method, url, max_body_bytes, chunk_size
+        ):
+            yield chunk
+
+
+async def stream_json_items(
+    session: ClientSession,
+    method: str,
+    url: str,
+    *,
+    item_type: Any = Any,
+    format: Literal["auto", "ndjson", "array"] = "auto",
+    max_body_bytes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retry_policy: RetryPolicy | None = None,
+    **kwargs: Any,
+) -> AsyncIterator[Any]:
+    """
+    Incrementally decode the items of an NDJSON body or a top-level JSON array.
+
+    Items are decoded into `item_type` one at a time as their bytes arrive, so
+    memory stays flat whatever the payload size. With `format="auto"` the
+    content type decides between NDJSON and a JSON array.
+    """
+    decoder = json_decoder(item_type)
+    async with _open_stream(session, method, url, retry_policy, **kwargs) as response:
+        if format == "auto":
+            is_ndjson = response.content_type in _NDJSON_CONTENT_TYPES
+            format = "ndjson" if is_ndjson else "array"
+        splitter = _NDJSONSplitter() if format == "ndjson" else _JSONArraySplitter()
+
+        async for chunk in _iter_chunks(
+            response, method, url, max_body_bytes, chunk_size
+        ):
+            for item in splitter.feed(chunk):
+                yield decoder.decode(item)
+        for item in splitter.close():
+            yield decoder.decode(item)
+
+
+async def download_to_file(
+    session: ClientSession,
+    method: str,
+    url: str,
+    path: str | Path,
+    *,
+    max_body_bytes: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    retry_policy: RetryPolicy | None = None,
+    **kwargs: Any,
+) -> int:
+    """
+    Spool the response body straight to `path` and return the number of bytes written.
+    The file only appears once the download completed.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.part")
+    written = 0
+    try:
+        with open(tmp_path, "wb") as file:
+            async for chunk in stream_request(
+                session,
+                method,
+                url,
+                max_body_bytes=max_body_bytes,
+                chunk_size=chunk_size,
+                retry_policy=retry_policy,
+                **kwargs,
+            ):
+                # Disk writes happen off the event loop
+                await asyncio.to_thread(file.write, chunk)
+                written += len(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return written
+
+
+@asynccontextmanager
+async def _open_stream(
+    session: ClientSession,
+    method: str,
+    url: str,
+    retry_policy: RetryPolicy | None,
+    **kwargs: Any,
+) -> AsyncIterator[ClientResponse]:
+    from aiohttp import ClientError as AiohttpClientError
+
+    if retry_policy is None:
+        retry_policy = RetryPolicy(logger=None)
+
+    try:
+        async for attempt in retry_policy.retry_attempts():
+            with attempt:
+                response = await session.request(method, url, **kwargs)
+                try:
+                    await _raise_for_status(response, method, url)
+                except RequestError:
+                    response.release()
+                    raise
+    except AiohttpClientError as e:
+        raise RequestError(
+            message=f"Request failed for {method} {url}: {str(e)}",
+            response_content=None,
+            method=method,
+            url=url,
+        )
+
+    async with response:
+        yield response
+
+
+async def _iter_chunks(
+    response: ClientResponse,
+    method: str,
+    url: str,
+    max_body_bytes: int | None,
+    chunk_size: int,
+) -> AsyncIterator[bytes]:
+    if max_body_bytes is not None and (response.content_length or 0) > max_body_bytes:
+        raise _too_large(response, method, url, max_body_bytes)
+
+    from aiohttp import ClientError as AiohttpClientError
+
+    received = 0
+    try:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            received += len(chunk)
+            if max_body_bytes is not None and received > max_body_bytes:
+                raise _too_large(response, method, url, max_body_bytes)
+            yield chunk
+    except (AiohttpClientError, asyncio.TimeoutError) as e:
+        raise RequestError(
+            message=f"Streaming failed for {method} {url}: {str(e)}",
+            response_content=None,
+            method=method,
+            url=url,
+        )
+    finally:
+        # iter_chunked fires no trace events, unlike reading the body whole
+        if request_metrics.enabled:
+            request_metrics.add_bytes(response.url.host or "", received=received)
+
+
+def _too_large(
+    response: ClientResponse, method: str, url: str, max_body_bytes: int
+) -> ContentTooLargeError:
+    return ContentTooLargeError(
+        message=f"Response body for {method} {url} exceeds {max_body_bytes} bytes",
+        response_content=None,
+        method=method,
+        url=url,
+        headers=dict(response.headers),
+    )
+
+
+class _NDJSONSplitter:
+    """Split a byte stream into its non-empty lines."""
+
+    def __init__(self):
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        *lines, self._buffer = (self._buffer + chunk).split(b"\n")
+        return [line for line in lines if line.strip()]
+
+    def close(self) -> list[bytes]:
+        line, self._buffer = self._buffer, b""
+        return [line] if line.strip() else []
+
+
+class _JSONArraySplitter:
+    """
+    Split a top-level JSON array into the raw bytes of its elements.
+
+    Only structural characters are inspected (found with a regex rather than a
+    per-byte loop) to track nesting depth and whether we're inside a string.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scanned = 0  # Offset up to which the buffer was already scanned
+        self._item_start: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        self._buffer += chunk
+        items = []
+        position = self._scanned
+        if self._escaped and position < len(self._buffer):
+            # The previous chunk ended on a backslash inside a string
+            self._escaped = False
+            position += 1
+
+        for match in _JSON_STRUCTURE_RE.finditer(self._buffer, position):
+            char = match.group()
+            index = match.start()
+            if self._escaped:
+                if index == position:
+                    self._escaped = False
+                    position = index + 1
+                    continue
+                self._escaped = False
+            position = index + 1
+
+            if self._in_string:
+                if char == b"\\":
+                    self._escaped = True
+                elif char == b'"':
+                    self._in_string = False
+                continue
+
+            if char == b'"':
+                self._in_string = True
+            elif char in (b"[", b"{"):
+                if self._depth == 0:
+                    if char == b"{":
+                        raise ValueError("Expected a top-level JSON array")
+                    self._item_start = index + 1
+                self._depth += 1
+            elif char in (b"]", b"}"):
+                if self._depth == 1:
+                    self._append_item(items, index)
+                self._depth -= 1
+            elif char == b"," and self._depth == 1:
+                self._append_item(items, index)
+                self._item_start = index + 1
+
+        # An escape only carries over when the backslash was the very last byte
+        self._escaped = self._escaped and position == len(self._buffer)
+        self._scanned = len(self._buffer)
+        # Drop the bytes of emitted items so the buffer only holds the current one
+        if self._item_start is not None and self._item_start > 0:
+            del self._buffer[: self._item_start]
+            self._scanned -= self._item_start
+            self._item_start = 0
+        return items
+
+    def close(self) -> list[bytes]:
+        if self._depth != 0 or self._in_string:
+            raise ValueError("Truncated JSON array")
+        return []
+
+    def _append_item(self, items: list[bytes], end: int) -> None:
+        item = bytes(self._buffer[self._item_start : end]).strip()
+        if item:
+            items.append(item)
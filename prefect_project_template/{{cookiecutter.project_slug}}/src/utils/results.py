@@ -0,0 +1,148 @@
+import base64
+import importlib
+from functools import lru_cache
+from typing import Any, Literal
+
+import cloudpickle
+import msgspec
+from prefect.serializers import Serializer
+from pydantic import Field, field_validator
+
+__all__ = ["MsgpackSerializer"]
+
+# Type tag of results msgpack can't represent, they are pickled instead
+_PICKLED = "!pickle"
+
+_Envelope = tuple[str | None, msgspec.Raw]
+
+
+class MsgpackSerializer(Serializer):
+    """
+    Prefect result serializer using msgspec's MessagePack, optionally zstd-compressed.
+
+    Structs, and lists of a single Struct type, are stored as arrays of field
+    values, without repeating field names, and decoded back into their type;
+    anything else as plain msgpack values. Objects that wouldn't come back equal,
+    such as tuples, sets or datetimes outside a typed Struct field, fall back to
+    cloudpickle. Output is base64 encoded, as Prefect stores results inside a
+    JSON record.
+    """
+
+    type: str = Field(default="msgpack", frozen=True)
+
+    compression: Literal["zstd"] | None = None
+    compression_level: int = 3
+
+    @field_validator("compression")
+    @classmethod
+    def check_compression(cls, value: str | None) -> str | None:
+        if value == "zstd":
+            _zstd()
+        return value
+
+    def dumps(self, obj: Any) -> bytes:
+        type_tag = _type_tag(obj)
+        if type_tag is not None:
+            blob = _encoder.encode((type_tag, _as_rows(obj)))
+        else:
+            try:
+                payload = _encoder.encode(obj)
+                # msgpack has no tuples, sets or datetimes: check nothing was lost
+                lossless = _untyped_decoder.decode(payload) == obj
+            except (TypeError, msgspec.DecodeError):
+                lossless = False
+            if lossless:
+                blob = _encoder.encode((None, msgspec.Raw(payload)))
+            else:
+                blob = _encoder.encode((_PICKLED, cloudpickle.dumps(obj)))
+
+        if self.compression == "zstd":
+            blob = _zstd().ZstdCompressor(level=self.compression_level).compress(blob)
+        return base64.b64encode(blob)
+
+    def loads(self, blob: bytes) -> Any:
+        blob = base64.b64decode(blob)
+        if self.compression == "zstd":
+            blob = _zstd().ZstdDecompressor().decompress(blob)
+
+        type_tag, payload = _envelope_decoder.decode(blob)
+        if type_tag == _PICKLED:
+            return cloudpickle.loads(msgspec.msgpack.decode(payload, type=bytes))
+        if type_tag is None:
+            return _untyped_decoder.decode(payload)
+        decoder, result_type = _rows_decoder(type_tag)
+        return msgspec.convert(
+            decoder.decode(payload), result_type, from_attributes=True
+        )
+
+
+_encoder = msgspec.msgpack.Encoder()
+_envelope_decoder = msgspec.msgpack.Decoder(_Envelope)
+_untyped_decoder = msgspec.msgpack.Decoder()
+
+
+def _type_tag(obj: Any) -> str | None:
+    """Name the Struct type of `obj`, or of every item of a list, if there is one."""
+    if isinstance(obj, msgspec.Struct):
+        return _qualified_name(type(obj))
+    if isinstance(obj, list) and obj and isinstance(obj[0], msgspec.Struct):
+        item_type = type(obj[0])
+        if all(type(item) is item_type for item in obj):
+            return f"list[{_qualified_name(item_type)}]"
+    return None
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _as_rows(obj: msgspec.Struct | list[msgspec.Struct]) -> Any:
+    """Field values by position, field names would be repeated in every item."""
+    if isinstance(obj, list):
+        return [msgspec.structs.astuple(item) for item in obj]
+    return msgspec.structs.astuple(obj)
+
+
+@lru_cache(maxsize=None)
+def _rows_decoder(type_tag: str) -> tuple[msgspec.msgpack.Decoder, Any]:
+    """Decoder of what `_as_rows` encodes for `type_tag`, and the type to convert it to."""
+    if type_tag.startswith("list[") and type_tag.endswith("]"):
+        item_type = _import_type(type_tag[5:-1])
+        return msgspec.msgpack.Decoder(list[_row_type(item_type)]), list[item_type]
+    struct_type = _import_type(type_tag)
+    return msgspec.msgpack.Decoder(_row_type(struct_type)), struct_type
+
+
+def _row_type(struct_type: type) -> type:
+    """An array-like copy of `struct_type`, with the same fields in the same order."""
+    fields = []
+    for field in msgspec.structs.fields(struct_type):
+        if field.default is not msgspec.NODEFAULT:
+            fields.append((field.name, field.type, field.default))
+        elif field.default_factory is not msgspec.NODEFAULT:
+            default = msgspec.field(default_factory=field.default_factory)
+            fields.append((field.name, field.type, default))
+        else:
+            fields.append((field.name, field.type))
+    return msgspec.defstruct(
+        f"{struct_type.__name__}Row", fields, array_like=True, module=__name__
+    )
+
+
+def _import_type(qualified_name: str) -> type:
+    module_name, _, qualname = qualified_name.partition(":")
+    obj = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression needs the optional `zstandard` package, "
+            "install it with `poetry install --extras zstd`"
+        ) from e
+    return zstandard